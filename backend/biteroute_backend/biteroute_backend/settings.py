@@ -4,6 +4,7 @@ Generated by 'django-admin startproject' using Django 6.0.
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 import os
 
@@ -47,7 +48,8 @@ INSTALLED_APPS = [
 # ======================
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise that doesn't force the ASGI middleware chain onto a thread
+    "core.middleware.AsyncWhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -64,6 +66,8 @@ MIDDLEWARE = [
 # ======================
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor", "X-Corrected-Query", "Idempotent-Replayed"]
 
 
 # ======================
@@ -93,9 +97,13 @@ TEMPLATES = [
 
 
 # ======================
-# WSGI
+# WSGI / ASGI
 # ======================
+# Production runs the ASGI app under gunicorn with uvicorn workers (see
+# Procfile), so the async read views don't hold a worker per slow client.
+# The WSGI app still works; async views then run one event loop per request.
 WSGI_APPLICATION = "biteroute_backend.wsgi.application"
+ASGI_APPLICATION = "biteroute_backend.asgi.application"
 
 
 # ======================
@@ -136,6 +144,10 @@ TIME_ZONE = "UTC"
 USE_I18N = True
 USE_TZ = True
 
+# Hotel open_time / close_time are wall-clock times in this zone; the
+# open_at= search filter is converted to it.
+HOTEL_TIME_ZONE = os.getenv("HOTEL_TIME_ZONE", "Asia/Kolkata")
+
 
 # ======================
 # STATIC FILES
@@ -151,6 +163,26 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# ======================
+# AUTH PRINCIPAL CACHE
+# ======================
+# Set ALIAS to a shared cache (e.g. Redis) in CACHES to share resolved
+# tokens across gunicorn workers; None keeps a per-process LRU.
+#
+# A change to a user / owner (delete, password change, ...) is seen at once
+# by every worker through the shared cache, so its entries can live for
+# TTL. The per-process LRU is only cleared in the worker that made the
+# change: other workers keep accepting the old principal for up to
+# LOCAL_TTL seconds. Keep LOCAL_TTL short; it trades that window against
+# one User / HotelOwner query per worker every LOCAL_TTL seconds per token.
+AUTH_PRINCIPAL_CACHE = {
+    "ALIAS": os.getenv("AUTH_CACHE_ALIAS") or None,
+    "MAX_ENTRIES": 10000,
+    "TTL": 300,
+    "LOCAL_TTL": 5,
+}
+
+
 # ======================
 # EMAIL CONFIG (SAFE – ENV VARIABLES)
 # ======================
@@ -162,3 +194,45 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+
+# ======================
+# RECEIPT QUEUE
+# ======================
+# Receipts are emailed by worker threads in the web process (SQLite lives on
+# the web instance's disk); set RECEIPT_IN_PROCESS_WORKERS=0 when a separate
+# `python manage.py run_receipt_worker` process shares the database.
+RECEIPT_QUEUE = {
+    "IN_PROCESS_WORKERS": int(os.getenv("RECEIPT_IN_PROCESS_WORKERS", "2")),
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BASE_DELAY": 30,
+}
+
+
+# ======================
+# CART STORE
+# ======================
+# "db" writes cart changes straight to CartItem. "cache" buffers them in the
+# CART_STORE_CACHE_ALIAS cache and writes them back every FLUSH_INTERVAL
+# seconds, on checkout and when a cart is read. The alias must be a cache
+# shared by every worker (e.g. Redis), not the per-process locmem default;
+# without one the "cache" backend falls back to "db".
+CART_STORE = {
+    "BACKEND": os.getenv("CART_STORE_BACKEND", "db"),
+    "ALIAS": os.getenv("CART_STORE_CACHE_ALIAS") or None,
+    "FLUSH_INTERVAL": int(os.getenv("CART_FLUSH_INTERVAL", "30")),
+    "IN_PROCESS_FLUSHER": os.getenv("CART_IN_PROCESS_FLUSHER", "1") == "1",
+}
+
+
+# ======================
+# DELIVERY DISPATCH
+# ======================
+# Pending orders of a hotel placed within WINDOW_MINUTES of each other are
+# planned into rider runs of at most MAX_STOPS drop-offs; 2-opt polishing
+# stops after TIME_BUDGET seconds.
+DISPATCH = {
+    "WINDOW_MINUTES": int(os.getenv("DISPATCH_WINDOW_MINUTES", "15")),
+    "MAX_STOPS": int(os.getenv("DISPATCH_MAX_STOPS", "8")),
+    "TIME_BUDGET": float(os.getenv("DISPATCH_TIME_BUDGET", "2.0")),
+}
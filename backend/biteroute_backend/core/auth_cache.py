@@ -0,0 +1,152 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    "ALIAS": None,
+    "MAX_ENTRIES": 10000,
+    # With a shared ALIAS every worker sees an invalidation at once.
+    "TTL": 300,
+    # Without one, only the worker that saved or deleted the row drops its
+    # entries; the others keep serving them until this runs out.
+    "LOCAL_TTL": 5,
+}
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def principal_key(principal, payload):
+    if isinstance(principal, dict):
+        return (payload.get("role"), principal.get("id"))
+    return (payload.get("role"), principal.pk)
+
+
+class PrincipalCache:
+    """
+    Maps a token digest to the (principal, payload) pair JWTAuthentication
+    resolved for it, so repeat requests skip signature checks and the
+    User / HotelOwner lookup.
+
+    Entries expire at the token's ``exp`` or after TTL (LOCAL_TTL for the
+    per-process LRU), whichever is first, and are dropped when the user /
+    owner row changes (see core/signals.py).
+
+    With AUTH_PRINCIPAL_CACHE["ALIAS"] set, entries live in that Django cache
+    so all workers share them; otherwise in a per-process LRU.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_principal = {}
+
+    @property
+    def config(self):
+        return {**DEFAULTS, **getattr(settings, "AUTH_PRINCIPAL_CACHE", {})}
+
+    def _expiry(self, payload):
+        config = self.config
+        ttl = config["TTL"] if config["ALIAS"] else config["LOCAL_TTL"]
+        expires_at = time.time() + ttl
+        if payload.get("exp"):
+            expires_at = min(expires_at, payload["exp"])
+        return expires_at
+
+    # ---------- shared (Django cache framework) ----------
+
+    def _shared(self):
+        alias = self.config["ALIAS"]
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _entry_key(digest):
+        return f"auth:principal:{digest}"
+
+    @staticmethod
+    def _generation_key(role, principal_id):
+        return f"auth:generation:{role}:{principal_id}"
+
+    # ---------- public API ----------
+
+    def get(self, token):
+        digest = token_digest(token)
+        now = time.time()
+        shared = self._shared()
+
+        if shared is not None:
+            entry = shared.get(self._entry_key(digest))
+            if not entry:
+                return None
+            principal, payload, key, generation = entry
+            if shared.get(self._generation_key(*key), 0) != generation:
+                return None
+            return copy.copy(principal), payload
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if not entry:
+                return None
+            principal, payload, key, expires_at = entry
+            if expires_at <= now:
+                self._discard_locked(digest)
+                return None
+            self._entries.move_to_end(digest)
+        return copy.copy(principal), payload
+
+    def set(self, token, principal, payload):
+        digest = token_digest(token)
+        key = principal_key(principal, payload)
+        expires_at = self._expiry(payload)
+        shared = self._shared()
+
+        if shared is not None:
+            timeout = int(expires_at - time.time())
+            if timeout > 0:
+                generation = shared.get(self._generation_key(*key), 0)
+                shared.set(self._entry_key(digest), (principal, payload, key, generation), timeout)
+            return
+
+        with self._lock:
+            self._discard_locked(digest)
+            self._entries[digest] = (principal, payload, key, expires_at)
+            self._by_principal.setdefault(key, set()).add(digest)
+            while len(self._entries) > self.config["MAX_ENTRIES"]:
+                oldest = next(iter(self._entries))
+                self._discard_locked(oldest)
+
+    def invalidate(self, role, principal_id):
+        shared = self._shared()
+        if shared is not None:
+            generation_key = self._generation_key(role, principal_id)
+            try:
+                shared.incr(generation_key)
+            except ValueError:
+                shared.set(generation_key, 1, None)
+
+        with self._lock:
+            for digest in self._by_principal.pop((role, principal_id), set()):
+                self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_principal.clear()
+
+    def _discard_locked(self, digest):
+        entry = self._entries.pop(digest, None)
+        if entry:
+            digests = self._by_principal.get(entry[2])
+            if digests:
+                digests.discard(digest)
+                if not digests:
+                    del self._by_principal[entry[2]]
+
+
+principal_cache = PrincipalCache()
@@ -1,7 +1,9 @@
 
+from asgiref.sync import sync_to_async
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from .auth_utils import decode_token
+from .auth_cache import principal_cache
 from .models import User, HotelOwner
 
 class JWTAuthentication(BaseAuthentication):
@@ -15,6 +17,12 @@ class JWTAuthentication(BaseAuthentication):
             return None
 
         token = auth_header.split(" ")[1]
+
+        # ⚡ already verified and resolved for an earlier request
+        cached = principal_cache.get(token)
+        if cached:
+            return cached
+
         payload = decode_token(token)
 
         if not payload:
@@ -28,6 +36,7 @@ class JWTAuthentication(BaseAuthentication):
                 user = User.objects.get(id=user_id)
             except User.DoesNotExist:
                 raise AuthenticationFailed("User not found")
+            principal_cache.set(token, user, payload)
             return (user, payload)
 
         elif role == "owner":
@@ -35,11 +44,18 @@ class JWTAuthentication(BaseAuthentication):
                 user = HotelOwner.objects.get(id=user_id)
             except HotelOwner.DoesNotExist:
                 raise AuthenticationFailed("Owner not found")
+            principal_cache.set(token, user, payload)
             return (user, payload)
 
         elif role == "admin":
              # Admin is stateless in current impl but we can mock it
              # Or just pass a dict
-             return ({"id": "admin", "role": "admin"}, payload)
+             admin = {"id": "admin", "role": "admin"}
+             principal_cache.set(token, admin, payload)
+             return (admin, payload)
 
         return None
+
+    async def aauthenticate(self, request):
+        # cache lookup, signature check and row lookup in one thread hop
+        return await sync_to_async(self.authenticate)(request)
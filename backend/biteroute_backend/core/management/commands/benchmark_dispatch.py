@@ -0,0 +1,126 @@
+import random
+import time
+from datetime import time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Hotel, HotelOwner, Order, User
+from core.utils.dispatch import dispatch
+
+# Synthetic city: hotels scattered over roughly 40 x 40 km around Pune,
+# drop-offs within DELIVERY_RADIUS of their hotel.
+CENTER = (18.5204, 73.8567)
+CITY_SPREAD = 0.18  # degrees
+DELIVERY_RADIUS = 0.05  # degrees, about 5 km
+BATCH_SIZE = 5000
+
+
+def seed(hotels, orders, windows, window_minutes):
+    rng = random.Random(23)
+    owner = HotelOwner.objects.create(username="bench", contact="bench@biteroute.invalid", password="!")
+    user = User.objects.create(name="bench", contact="bench-user@biteroute.invalid", password="!")
+
+    positions = [
+        (CENTER[0] + rng.uniform(-CITY_SPREAD, CITY_SPREAD), CENTER[1] + rng.uniform(-CITY_SPREAD, CITY_SPREAD))
+        for _ in range(hotels)
+    ]
+    created_hotels = Hotel.objects.bulk_create([
+        Hotel(
+            owner=owner,
+            hotel_name=f"Bench Hotel {n}",
+            location="Bench",
+            food_type="veg",
+            open_time=clock(9),
+            close_time=clock(23),
+            approved=True,
+            status=Hotel.STATUS_APPROVED,
+            latitude=latitude,
+            longitude=longitude,
+            geohash=Hotel.geohash_for(latitude, longitude),
+        )
+        for n, (latitude, longitude) in enumerate(positions)
+    ])
+
+    order_ids = []
+    for start in range(0, orders, BATCH_SIZE):
+        batch = []
+        for _ in range(start, min(start + BATCH_SIZE, orders)):
+            n = rng.randrange(hotels)
+            latitude, longitude = positions[n]
+            batch.append(Order(
+                user=user,
+                name="bench",
+                mobile="0000000000",
+                address="bench",
+                payment_method="COD",
+                total_amount=0,
+                hotel=created_hotels[n],
+                latitude=latitude + rng.uniform(-DELIVERY_RADIUS, DELIVERY_RADIUS),
+                longitude=longitude + rng.uniform(-DELIVERY_RADIUS, DELIVERY_RADIUS),
+            ))
+        order_ids.extend(order.id for order in Order.objects.bulk_create(batch))
+
+    # spread the orders over the last few dispatch windows (created_at is
+    # auto_now_add, so it is moved afterwards)
+    now = timezone.now()
+    per_window = -(-len(order_ids) // windows)
+    for window in range(windows):
+        Order.objects.filter(id__in=order_ids[window * per_window:(window + 1) * per_window]).update(
+            created_at=now - timedelta(minutes=window * window_minutes)
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic hotels and geolocated orders and time a full dispatch "
+        "planning run (distance matrices, nearest-neighbour, 2-opt, saving). "
+        "Everything runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=10_000)
+        parser.add_argument("--hotels", type=int, default=500)
+        parser.add_argument("--windows", type=int, default=4,
+                            help="Dispatch windows the orders are spread over")
+        parser.add_argument("--window-minutes", type=int, default=15)
+        parser.add_argument("--max-stops", type=int, default=8)
+        parser.add_argument("--time-budget", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            start = time.perf_counter()
+            seed(options["hotels"], options["orders"], options["windows"], options["window_minutes"])
+            self.stdout.write(
+                f"Seeded {options['hotels']} hotels and {options['orders']} orders "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+            start = time.perf_counter()
+            routes, stats = dispatch(
+                window_minutes=options["window_minutes"],
+                max_stops=options["max_stops"],
+                time_budget=options["time_budget"],
+                lookback_hours=max(1, options["windows"] * options["window_minutes"] // 60 + 1),
+            )
+            total = time.perf_counter() - start
+
+            saving = stats["nearest_neighbour_km"] - stats["distance_km"]
+            self.stdout.write(self.style.MIGRATE_HEADING("\nDispatch run"))
+            self.stdout.write(f"  orders routed:         {stats['orders']}")
+            self.stdout.write(f"  hotel windows:         {stats['groups']}")
+            self.stdout.write(f"  routes:                {stats['routes']}")
+            self.stdout.write(f"  stops per route:       {stats['orders'] / max(1, stats['routes']):.1f}")
+            self.stdout.write(f"  matrices + NN:         {stats['matrix_and_nn_ms']:.0f} ms")
+            self.stdout.write(f"  planning total:        {stats['elapsed_ms']:.0f} ms")
+            self.stdout.write(f"  load + plan + save:    {total * 1000:.0f} ms")
+            self.stdout.write(f"  nearest-neighbour:     {stats['nearest_neighbour_km']:.1f} km")
+            self.stdout.write(self.style.SUCCESS(
+                f"  after 2-opt:           {stats['distance_km']:.1f} km "
+                f"(-{saving / max(stats['nearest_neighbour_km'], 1e-9):.1%})"
+            ))
+            if not stats["optimized"]:
+                self.stdout.write(self.style.WARNING("  time budget ran out before 2-opt finished"))
+
+            transaction.set_rollback(True)
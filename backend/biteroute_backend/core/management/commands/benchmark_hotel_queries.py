@@ -0,0 +1,141 @@
+import random
+import time
+from datetime import time as clock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.models import Food, Hotel, HotelOwner
+
+# Indexes added alongside Hotel.status; dropped (inside a savepoint) to get
+# the "before" plans.
+STATUS_INDEXES = ("hotel_status_location_idx", "hotel_owner_name_idx", "food_hotel_category_idx")
+
+LOCATIONS = [f"Area {n}" for n in range(200)]
+CATEGORIES = ("Veg", "Non-Veg", "Desserts", "Beverages", "Snacks")
+BATCH_SIZE = 5000
+
+
+def seed(hotels, foods_per_hotel):
+    rng = random.Random(15)
+    owners = HotelOwner.objects.bulk_create([
+        HotelOwner(username=f"bench{n}", contact=f"bench{n}@biteroute.invalid", password="!")
+        for n in range(max(1, hotels // 50))
+    ])
+
+    created = 0
+    while created < hotels:
+        batch = []
+        for n in range(created, min(created + BATCH_SIZE, hotels)):
+            roll = rng.random()
+            approved, rejected = roll < 0.8, 0.8 <= roll < 0.85
+            batch.append(Hotel(
+                owner=owners[n % len(owners)],
+                hotel_name=f"Bench Hotel {n}",
+                location=rng.choice(LOCATIONS),
+                food_type="veg",
+                open_time=clock(9),
+                close_time=clock(23),
+                approved=approved,
+                rejected=rejected,
+                status=Hotel.status_for(approved, rejected),
+            ))
+        batch = Hotel.objects.bulk_create(batch)
+        Food.objects.bulk_create([
+            Food(hotel=hotel, category=CATEGORIES[i % len(CATEGORIES)],
+                 food_name=f"Dish {i}", price=100 + i)
+            for hotel in batch
+            for i in range(foods_per_hotel)
+        ])
+        created += len(batch)
+
+    return owners[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic hotels and compare query plans / timings of the "
+        "approval-state queries before and after the status column and "
+        "composite indexes. Everything runs in a transaction that is rolled "
+        "back; use a scratch database, the indexes are dropped while measuring."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotels", type=int, default=500_000)
+        parser.add_argument("--foods-per-hotel", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            start = time.perf_counter()
+            owner = seed(options["hotels"], options["foods_per_hotel"])
+            self.stdout.write(f"Seeded {options['hotels']} hotels in {time.perf_counter() - start:.1f}s")
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            hotel_name = Hotel.objects.filter(owner=owner).values_list("hotel_name", flat=True).first()
+            hotel_id = Hotel.objects.filter(owner=owner).values_list("id", flat=True).first()
+
+            cases = [
+                (
+                    "Admin pending list (first page)",
+                    lambda: Hotel.objects.filter(approved=False, rejected=False).order_by("id")[:100],
+                    lambda: Hotel.objects.filter(status=Hotel.STATUS_PENDING).order_by("id")[:100],
+                ),
+                (
+                    "Pending hotel count",
+                    lambda: Hotel.objects.filter(approved=False, rejected=False)
+                    .values("approved").annotate(n=Count("id")).order_by(),
+                    lambda: Hotel.objects.filter(status=Hotel.STATUS_PENDING)
+                    .values("status").annotate(n=Count("id")).order_by(),
+                ),
+                (
+                    "Approved hotels in a location",
+                    lambda: Hotel.objects.filter(approved=True, rejected=False, location=LOCATIONS[7]),
+                    lambda: Hotel.objects.filter(status=Hotel.STATUS_APPROVED, location=LOCATIONS[7]),
+                ),
+                (
+                    "check_hotel_status / add_food lookup",
+                    lambda: Hotel.objects.filter(hotel_name__iexact=hotel_name, owner=owner),
+                    lambda: Hotel.objects.filter(owner=owner, hotel_name__iexact=hotel_name),
+                ),
+                (
+                    "Menu category of a hotel",
+                    lambda: Food.objects.filter(hotel_id=hotel_id, category="Veg"),
+                    lambda: Food.objects.filter(hotel_id=hotel_id, category="Veg"),
+                ),
+            ]
+
+            for label, before, after in cases:
+                with transaction.atomic():
+                    self._drop_indexes()
+                    before_plan, before_time = self._measure(before, options["repeat"])
+                    transaction.set_rollback(True)
+                after_plan, after_time = self._measure(after, options["repeat"])
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+                self.stdout.write(f"  before ({before_time * 1000:.2f} ms):")
+                self.stdout.write(self._indent(before_plan))
+                self.stdout.write(f"  after  ({after_time * 1000:.2f} ms):")
+                self.stdout.write(self.style.SUCCESS(self._indent(after_plan)))
+
+            transaction.set_rollback(True)
+
+    def _drop_indexes(self):
+        with connection.cursor() as cursor:
+            for name in STATUS_INDEXES:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+
+    def _measure(self, build, repeat):
+        plan = build().explain()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(build())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return plan, best
+
+    def _indent(self, text):
+        return "\n".join(f"    {line}" for line in text.splitlines())
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.utils.pdf_receipt import generate_receipt_pdf, generate_receipt_pdfs
+
+
+def sample_order(n, items):
+    return {
+        "order_id": f"BR-{n}",
+        "name": "Benchmark Customer",
+        "email": "customer@example.com",
+        "mobile": "9999999999",
+        "address": "House No: 12, Area: FC Road, City: Pune, Pincode: 411004",
+        "payment_method": "Online Payment",
+        "total": "525.00",
+        "items": [
+            {"name": f"Dish {i}", "qty": 1 + i % 3, "price": 100 + i, "hotel_name": "Spice Hub"}
+            for i in range(items)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure receipt rendering throughput (receipts per second)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500)
+        parser.add_argument("--items", type=int, default=6, help="Line items per receipt")
+
+    def handle(self, *args, **options):
+        orders = [sample_order(n, options["items"]) for n in range(options["count"])]
+
+        start = time.perf_counter()
+        pdfs = [generate_receipt_pdf(order) for order in orders]
+        single = time.perf_counter() - start
+
+        # one document, the static forms defined once for every receipt
+        start = time.perf_counter()
+        batch_pdf = generate_receipt_pdfs(orders)
+        batch = time.perf_counter() - start
+
+        size = sum(len(pdf) for pdf in pdfs) / len(pdfs)
+        self.stdout.write(f"Receipts:      {len(orders)} x {options['items']} items, {size:.0f} bytes avg")
+        self.stdout.write(f"One per call:  {len(orders) / single:.1f} receipts/s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Batched:       {len(orders) / batch:.1f} receipts/s, {len(batch_pdf) / len(orders):.0f} bytes each"
+        ))
@@ -0,0 +1,285 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as clock
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.auth_utils import generate_token
+from core.models import Cart, CartItem, Food, Hotel, HotelOwner, User
+
+# The same project served both ways; only the worker class differs.
+SERVERS = {
+    "wsgi": ["biteroute_backend.wsgi"],
+    "asgi": ["biteroute_backend.asgi", "--worker-class", "uvicorn_worker.UvicornWorker"],
+}
+ENDPOINTS = ("search", "hotels", "cart", "foods")
+
+BENCH_OWNER_CONTACT = "bench-servers@biteroute.invalid"
+BENCH_USER_CONTACT = "bench-servers-user@biteroute.invalid"
+FOOD_NAMES = ("Paneer Tikka", "Paneer Butter Masala", "Veg Biryani", "Masala Dosa", "Idli Sambar")
+CART_ITEMS = 10
+
+STARTUP_TIMEOUT = 30  # seconds
+WARMUP_SECONDS = 2
+REQUEST_TIMEOUT = 30
+# A slow client sends its request one header line per --slow-interval.
+SLOW_HEADER_LINES = 10
+
+
+def seed(hotels):
+    owner = HotelOwner.objects.create(username="bench", contact=BENCH_OWNER_CONTACT, password="!")
+    user = User.objects.create(name="bench", contact=BENCH_USER_CONTACT, password="!")
+    created = Hotel.objects.bulk_create([
+        Hotel(
+            owner=owner,
+            hotel_name=f"Bench Hotel {n}",
+            location="Bench",
+            food_type="veg",
+            open_time=clock(0),
+            close_time=clock(0),
+            approved=True,
+            status=Hotel.STATUS_APPROVED,
+        )
+        for n in range(hotels)
+    ])
+    foods = Food.objects.bulk_create([
+        Food(hotel=hotel, category="Veg", food_name=name, price=100 + n)
+        for n, hotel in enumerate(created)
+        for name in FOOD_NAMES
+    ])
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.bulk_create([CartItem(cart=cart, food=food, quantity=1) for food in foods[:CART_ITEMS]])
+
+    paths = {
+        "search": "/api/user/search-food/?type=Veg&food=paneer&location=bench",
+        "hotels": "/api/hotels/search/?q=bench",
+        "cart": f"/api/cart/{user.id}/",
+        "foods": f"/api/hotels/{created[0].id}/foods/",
+    }
+    return paths, {"Authorization": f"Bearer {generate_token(owner.id, 'owner')}"}
+
+
+def cleanup():
+    HotelOwner.objects.filter(contact=BENCH_OWNER_CONTACT).delete()
+    User.objects.filter(contact=BENCH_USER_CONTACT).delete()
+
+
+def start_server(kind, workers, port):
+    command = [
+        sys.executable, "-m", "gunicorn", *SERVERS[kind],
+        "--workers", str(workers),
+        "--bind", f"127.0.0.1:{port}",
+        "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL)
+
+
+def wait_ready(server, url):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise CommandError(f"Server exited with code {server.returncode}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise CommandError(f"Server didn't answer within {STARTUP_TIMEOUT}s")
+
+
+def process_tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants (Linux only)."""
+    if not os.path.isdir("/proc"):
+        return None
+
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # the command name may contain spaces; fields after it don't
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+
+    tree = {pid}
+    changed = True
+    while changed:
+        children = {child for child, parent in parents.items() if parent in tree} - tree
+        tree |= children
+        changed = bool(children)
+
+    total_kb = 0
+    for member in tree:
+        try:
+            with open(f"/proc/{member}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return total_kb / 1024
+
+
+def fast_client(base_url, paths, headers, offset, deadline):
+    session = requests.Session()
+    session.headers.update(headers)
+    latencies, errors = [], 0
+    n = offset
+    while time.monotonic() < deadline:
+        path = paths[n % len(paths)]
+        n += 1
+        started = time.perf_counter()
+        try:
+            ok = session.get(base_url + path, timeout=REQUEST_TIMEOUT).status_code == 200
+        except requests.RequestException:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    return latencies, errors
+
+
+def slow_client(host, port, path, interval, deadline):
+    """Requests ``path`` over and over like a client on a bad connection."""
+    completed = 0
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=REQUEST_TIMEOUT) as sock:
+                sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n".encode())
+                for n in range(SLOW_HEADER_LINES):
+                    if time.monotonic() >= deadline:
+                        return completed
+                    time.sleep(interval)
+                    sock.sendall(f"X-Slow-{n}: 1\r\n".encode())
+                sock.sendall(b"Connection: close\r\n\r\n")
+                while sock.recv(65536):
+                    pass
+            completed += 1
+        except OSError:
+            time.sleep(interval)
+    return completed
+
+
+def run_load(base_url, paths, headers, concurrency, duration, slow_clients=0, slow_interval=0.5):
+    parts = urlsplit(base_url)
+    started = time.monotonic()
+    deadline = started + duration
+    with ThreadPoolExecutor(concurrency + slow_clients) as pool:
+        slow = [
+            pool.submit(slow_client, parts.hostname, parts.port or 80, paths[n % len(paths)], slow_interval, deadline)
+            for n in range(slow_clients)
+        ]
+        fast = [pool.submit(fast_client, base_url, paths, headers, n, deadline) for n in range(concurrency)]
+        results = [future.result() for future in fast]
+        slow_completed = sum(future.result() for future in slow)
+    elapsed = time.monotonic() - started
+
+    latencies = np.array([latency for client, _ in results for latency in client]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (np.nan,) * 3
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "errors": sum(errors for _, errors in results),
+        "slow_completed": slow_completed,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the hot read endpoints (food search, hotel typeahead, cart, "
+        "owner menu) under gunicorn sync workers (WSGI) and uvicorn workers "
+        "(ASGI) with the same number of worker processes, and report "
+        "throughput, latency and the servers' resident memory. Seeds "
+        "temporary bench rows into the configured database and removes them "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=["wsgi", "asgi"])
+        parser.add_argument("--workers", type=int, default=2,
+                            help="Worker processes for every server (default 2)")
+        parser.add_argument("--concurrency", type=int, default=32,
+                            help="Clients sending requests back to back (default 32)")
+        parser.add_argument("--slow-clients", type=int, default=0,
+                            help="Extra clients that trickle their request headers in")
+        parser.add_argument("--slow-interval", type=float, default=0.5,
+                            help="Seconds between the header lines of a slow client (default 0.5)")
+        parser.add_argument("--duration", type=float, default=10.0,
+                            help="Seconds of load per server (default 10)")
+        parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument("--hotels", type=int, default=200,
+                            help=f"Bench hotels to seed, {len(FOOD_NAMES)} foods each (default 200)")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--url",
+                            help="Load test an already running server instead of starting them "
+                                 "(it must use the same database)")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["concurrency"] < 1 or options["hotels"] < 1:
+            raise CommandError("--workers, --concurrency and --hotels must be at least 1")
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING(
+                "DEBUG is on: every query is recorded and static files are looked up per request, "
+                "so absolute numbers are pessimistic"
+            ))
+
+        cleanup()
+        paths, headers = seed(options["hotels"])
+        paths = [paths[name] for name in options["endpoints"]]
+        try:
+            if options["url"]:
+                targets = [(options["url"], None, options["url"].rstrip("/"))]
+            else:
+                targets = [(kind, kind, f"http://127.0.0.1:{options['port']}") for kind in options["servers"]]
+
+            rows = []
+            for label, kind, base_url in targets:
+                server = start_server(kind, options["workers"], options["port"]) if kind else None
+                try:
+                    if server:
+                        wait_ready(server, base_url + paths[0])
+                    self.stdout.write(f"{label}: warming up")
+                    run_load(base_url, paths, headers, options["concurrency"], WARMUP_SECONDS)
+
+                    self.stdout.write(f"{label}: {options['duration']:g}s of load")
+                    stats = run_load(
+                        base_url, paths, headers, options["concurrency"], options["duration"],
+                        options["slow_clients"], options["slow_interval"],
+                    )
+                    stats["rss"] = process_tree_rss_mb(server.pid) if server else None
+                    rows.append((label, stats))
+                finally:
+                    if server:
+                        server.terminate()
+                        server.wait()
+        finally:
+            cleanup()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{options['workers']} workers, {options['concurrency']} clients, "
+            f"{options['slow_clients']} slow clients, endpoints: {', '.join(options['endpoints'])}"
+        ))
+        self.stdout.write(
+            f"  {'server':<24} {'RSS MB':>7} {'requests':>9} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'slow done':>10}"
+        )
+        for label, stats in rows:
+            rss = f"{stats['rss']:.0f}" if stats["rss"] is not None else "n/a"
+            self.stdout.write(
+                f"  {label:<24} {rss:>7} {stats['requests']:>9} {stats['rps']:>8.1f} "
+                f"{stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f} "
+                f"{stats['errors']:>7} {stats['slow_completed']:>10}"
+            )
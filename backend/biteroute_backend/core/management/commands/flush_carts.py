@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.utils.cart_store import cart_store, store_config
+
+
+class Command(BaseCommand):
+    help = (
+        "Write carts buffered by the cache cart store back to CartItem. "
+        "Needs a cache shared with the web processes (CART_STORE ALIAS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep flushing every FLUSH_INTERVAL seconds")
+
+    def handle(self, *args, **options):
+        store = cart_store()
+        while True:
+            pending = len(store.dirty_carts())
+            flushed = store.flush_all()
+            self.stdout.write(f"Flushed {flushed} of {pending} dirty carts")
+            if not options["loop"]:
+                break
+            time.sleep(store_config()["FLUSH_INTERVAL"])
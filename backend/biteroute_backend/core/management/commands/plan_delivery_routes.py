@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.dispatch import DispatchError, dispatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Batch pending orders (pickup hotel and drop-off position known, not "
+        "routed yet) into multi-stop delivery routes per hotel and time window"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotel", type=int, action="append", dest="hotels",
+                            help="Only plan for this hotel id (repeatable)")
+        parser.add_argument("--window-minutes", type=int, help="Override DISPATCH WINDOW_MINUTES")
+        parser.add_argument("--max-stops", type=int, help="Override DISPATCH MAX_STOPS")
+        parser.add_argument("--time-budget", type=float, help="Override DISPATCH TIME_BUDGET (seconds)")
+        parser.add_argument("--dry-run", action="store_true", help="Plan and print, but save nothing")
+
+    def handle(self, *args, **options):
+        try:
+            routes, stats = dispatch(
+                hotel_ids=options["hotels"],
+                save=not options["dry_run"],
+                window_minutes=options["window_minutes"],
+                max_stops=options["max_stops"],
+                time_budget=options["time_budget"],
+            )
+        except DispatchError as e:
+            raise CommandError(str(e))
+
+        for route in routes:
+            stops = " -> ".join(str(order_id) for order_id, *_ in route["stops"])
+            self.stdout.write(
+                f"Hotel {route['hotel_id']} @ {route['window_start']:%H:%M}: "
+                f"{route['distance_km']:.2f} km, orders {stops}"
+            )
+
+        saved = "Planned" if options["dry_run"] else "Saved"
+        self.stdout.write(self.style.SUCCESS(
+            f"{saved} {stats['routes']} routes for {stats['orders']} orders "
+            f"({stats['distance_km']:.1f} km, nearest-neighbour {stats['nearest_neighbour_km']:.1f} km) "
+            f"in {stats['elapsed_ms']:.0f} ms"
+        ))
+        if not stats["optimized"]:
+            self.stdout.write(self.style.WARNING("Time budget ran out before 2-opt finished every route"))
+        if stats["skipped_groups"]:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {stats['skipped_groups']} hotel windows: hotel has no map position"
+            ))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.food_purge import PURGE_CHUNK_SIZE, PurgeError, purge_foods, purge_queryset
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete foods by hotel, category and/or age, in small chunks, together "
+        "with the cart items and order items that point at them; their sales "
+        "are taken out of the analytics rollups"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotel", type=int, action="append", dest="hotels",
+                            help="Only foods of this hotel id (repeatable)")
+        parser.add_argument("--category", action="append", dest="categories",
+                            help="Only foods in this category, case-insensitive (repeatable)")
+        parser.add_argument("--older-than", type=int, metavar="DAYS",
+                            help="Only foods added more than DAYS days ago")
+        parser.add_argument("--all", action="store_true",
+                            help="Delete every food; required when no other filter is given")
+        parser.add_argument("--chunk-size", type=int, default=PURGE_CHUNK_SIZE,
+                            help=f"Foods deleted per transaction (default {PURGE_CHUNK_SIZE})")
+        parser.add_argument("--sleep", type=float, default=0.1,
+                            help="Seconds to pause between chunks (default 0.1)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count the matching foods")
+
+    def handle(self, *args, **options):
+        scoped = options["hotels"] or options["categories"] or options["older_than"] is not None
+        if not scoped and not options["all"]:
+            raise CommandError("Give --hotel, --category or --older-than, or --all to delete every food")
+
+        foods = purge_queryset(
+            hotel_ids=options["hotels"],
+            categories=options["categories"],
+            older_than_days=options["older_than"],
+        )
+        matching = foods.count()
+        if options["dry_run"] or not matching:
+            self.stdout.write(f"{matching} foods match")
+            return
+
+        def progress(totals):
+            self.stdout.write(f"Deleted {totals.get('core.Food', 0)} of {matching} foods")
+
+        try:
+            totals = purge_foods(foods, chunk_size=options["chunk_size"], pause=options["sleep"], progress=progress)
+        except PurgeError as e:
+            raise CommandError(str(e))
+
+        for label, count in sorted(totals.items()):
+            self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Deleted {totals.get('core.Food', 0)} foods"))
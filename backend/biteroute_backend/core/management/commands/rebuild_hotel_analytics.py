@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the hotel sales rollups behind the analytics dashboard from OrderItem"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotel", type=int, action="append", dest="hotels",
+                            help="Only rebuild this hotel id (repeatable)")
+
+    def handle(self, *args, **options):
+        rebuild_rollups(hotel_ids=options["hotels"])
+        scope = f"hotels {', '.join(map(str, options['hotels']))}" if options["hotels"] else "all hotels"
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {scope}"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.opening_hours import rebuild_open_intervals
+
+
+class Command(BaseCommand):
+    help = "Recompute the opening-hours ranges behind the open_at= search filter from Hotel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotel", type=int, action="append", dest="hotels",
+                            help="Only rebuild this hotel id (repeatable)")
+
+    def handle(self, *args, **options):
+        count = rebuild_open_intervals(hotel_ids=options["hotels"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt opening hours for {count} hotels"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Food, Hotel, SearchTerm
+from core.utils.fuzzy import rebuild_terms
+
+
+class Command(BaseCommand):
+    help = "Rebuild the fuzzy search vocabulary from Food and Hotel names"
+
+    def handle(self, *args, **options):
+        foods = Food.objects.values_list("food_name", flat=True).iterator(chunk_size=2000)
+        count = rebuild_terms(SearchTerm.KIND_FOOD, foods)
+        self.stdout.write(f"Indexed {count} food words")
+
+        hotels = Hotel.objects.values_list("hotel_name", flat=True).iterator(chunk_size=2000)
+        count = rebuild_terms(SearchTerm.KIND_HOTEL, hotels)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} hotel words"))
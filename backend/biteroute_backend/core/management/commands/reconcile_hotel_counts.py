@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.models import HotelStatusCounts
+from core.utils.hotel_counts import COUNTS_ROW_ID, STATUSES, reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount hotels by status and correct the admin dashboard counters"
+
+    def handle(self, *args, **options):
+        before = HotelStatusCounts.objects.filter(id=COUNTS_ROW_ID).values(*STATUSES).first()
+        after = reconcile()
+
+        for status in STATUSES:
+            drift = after[status] - before[status] if before else 0
+            note = f" (corrected by {drift:+d})" if drift else ""
+            self.stdout.write(f"{status}: {after[status]}{note}")
+        self.stdout.write(self.style.SUCCESS("Hotel counters reconciled"))
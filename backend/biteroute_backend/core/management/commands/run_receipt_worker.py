@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.utils.receipt_queue import queue_config, run_pending, worker_pool
+
+
+class Command(BaseCommand):
+    help = "Render and email queued order receipts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Worker threads")
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the jobs that are due now and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            sent = run_pending(limit=10_000)
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} receipts"))
+            return
+
+        worker_pool.start(options["workers"])
+        self.stdout.write(f"Receipt worker running with {options['workers']} threads")
+        try:
+            while True:
+                time.sleep(queue_config()["POLL_INTERVAL"])
+                worker_pool.wake()
+        except KeyboardInterrupt:
+            worker_pool.stop()
@@ -4,6 +4,16 @@ from django.db import migrations, models
 import django.db.models.deletion
 
 
+def create_missing_tables(apps, schema_editor):
+    # 0002 already creates Order and OrderItem; only databases that applied an
+    # older 0002 without them still need the tables.
+    existing = schema_editor.connection.introspection.table_names()
+    for name in ("Order", "OrderItem"):
+        model = apps.get_model("core", name)
+        if model._meta.db_table not in existing:
+            schema_editor.create_model(model)
+
+
 class Migration(migrations.Migration):
 
     dependencies = [
@@ -11,27 +21,34 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.CreateModel(
-            name='Order',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.CharField(max_length=200)),
-                ('mobile', models.CharField(max_length=15)),
-                ('address', models.TextField()),
-                ('payment_method', models.CharField(max_length=100)),
-                ('total_amount', models.FloatField()),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.user')),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_missing_tables, migrations.RunPython.noop),
             ],
-        ),
-        migrations.CreateModel(
-            name='OrderItem',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('quantity', models.IntegerField()),
-                ('price_at_time', models.IntegerField()),
-                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.food')),
-                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.order')),
+            state_operations=[
+                migrations.CreateModel(
+                    name='Order',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('name', models.CharField(max_length=200)),
+                        ('mobile', models.CharField(max_length=15)),
+                        ('address', models.TextField()),
+                        ('payment_method', models.CharField(max_length=100)),
+                        ('total_amount', models.FloatField()),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.user')),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='OrderItem',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('quantity', models.IntegerField()),
+                        ('price_at_time', models.IntegerField()),
+                        ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.food')),
+                        ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.order')),
+                    ],
+                ),
             ],
         ),
     ]
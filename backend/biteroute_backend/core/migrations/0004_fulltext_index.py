@@ -0,0 +1,187 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:57
+
+import core.utils.fulltext
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE core_food_fts USING fts5(
+        food_name, description, category,
+        content='core_food', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    # bm25 column weights: name > category > description
+    "INSERT INTO core_food_fts(core_food_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0)')",
+    """
+    CREATE TRIGGER core_food_fts_ai AFTER INSERT ON core_food BEGIN
+        INSERT INTO core_food_fts(rowid, food_name, description, category)
+        VALUES (new.id, new.food_name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER core_food_fts_ad AFTER DELETE ON core_food BEGIN
+        INSERT INTO core_food_fts(core_food_fts, rowid, food_name, description, category)
+        VALUES ('delete', old.id, old.food_name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER core_food_fts_au AFTER UPDATE ON core_food BEGIN
+        INSERT INTO core_food_fts(core_food_fts, rowid, food_name, description, category)
+        VALUES ('delete', old.id, old.food_name, old.description, old.category);
+        INSERT INTO core_food_fts(rowid, food_name, description, category)
+        VALUES (new.id, new.food_name, new.description, new.category);
+    END
+    """,
+    "INSERT INTO core_food_fts(core_food_fts) VALUES ('rebuild')",
+    """
+    CREATE VIRTUAL TABLE core_hotel_fts USING fts5(
+        hotel_name,
+        content='core_hotel', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_ai AFTER INSERT ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(rowid, hotel_name) VALUES (new.id, new.hotel_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_ad AFTER DELETE ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(core_hotel_fts, rowid, hotel_name)
+        VALUES ('delete', old.id, old.hotel_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_au AFTER UPDATE OF hotel_name ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(core_hotel_fts, rowid, hotel_name)
+        VALUES ('delete', old.id, old.hotel_name);
+        INSERT INTO core_hotel_fts(rowid, hotel_name) VALUES (new.id, new.hotel_name);
+    END
+    """,
+    "INSERT INTO core_hotel_fts(core_hotel_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_food_fts_ai",
+    "DROP TRIGGER IF EXISTS core_food_fts_ad",
+    "DROP TRIGGER IF EXISTS core_food_fts_au",
+    "DROP TABLE IF EXISTS core_food_fts",
+    "DROP TRIGGER IF EXISTS core_hotel_fts_ai",
+    "DROP TRIGGER IF EXISTS core_hotel_fts_ad",
+    "DROP TRIGGER IF EXISTS core_hotel_fts_au",
+    "DROP TABLE IF EXISTS core_hotel_fts",
+]
+
+FOOD_TSVECTOR = (
+    "setweight(to_tsvector('simple', coalesce({row}.food_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({row}.category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce({row}.description, '')), 'C')"
+)
+HOTEL_TSVECTOR = "to_tsvector('simple', coalesce({row}.hotel_name, ''))"
+
+# Rows are removed by the ON DELETE CASCADE foreign key, so only inserts and
+# updates need a trigger.
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE core_food_fts (
+        rowid bigint PRIMARY KEY REFERENCES core_food(id) ON DELETE CASCADE,
+        core_food_fts tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX core_food_fts_gin ON core_food_fts USING GIN (core_food_fts)",
+    f"""
+    CREATE FUNCTION core_food_fts_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO core_food_fts(rowid, core_food_fts)
+        VALUES (NEW.id, {FOOD_TSVECTOR.format(row="NEW")})
+        ON CONFLICT (rowid) DO UPDATE SET core_food_fts = EXCLUDED.core_food_fts;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_food_fts_sync AFTER INSERT OR UPDATE ON core_food
+    FOR EACH ROW EXECUTE FUNCTION core_food_fts_sync()
+    """,
+    f"INSERT INTO core_food_fts SELECT f.id, {FOOD_TSVECTOR.format(row='f')} FROM core_food f",
+    """
+    CREATE TABLE core_hotel_fts (
+        rowid bigint PRIMARY KEY REFERENCES core_hotel(id) ON DELETE CASCADE,
+        core_hotel_fts tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX core_hotel_fts_gin ON core_hotel_fts USING GIN (core_hotel_fts)",
+    f"""
+    CREATE FUNCTION core_hotel_fts_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO core_hotel_fts(rowid, core_hotel_fts)
+        VALUES (NEW.id, {HOTEL_TSVECTOR.format(row="NEW")})
+        ON CONFLICT (rowid) DO UPDATE SET core_hotel_fts = EXCLUDED.core_hotel_fts;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_sync AFTER INSERT OR UPDATE OF hotel_name ON core_hotel
+    FOR EACH ROW EXECUTE FUNCTION core_hotel_fts_sync()
+    """,
+    f"INSERT INTO core_hotel_fts SELECT h.id, {HOTEL_TSVECTOR.format(row='h')} FROM core_hotel h",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_food_fts_sync ON core_food",
+    "DROP FUNCTION IF EXISTS core_food_fts_sync()",
+    "DROP TABLE IF EXISTS core_food_fts",
+    "DROP TRIGGER IF EXISTS core_hotel_fts_sync ON core_hotel",
+    "DROP FUNCTION IF EXISTS core_hotel_fts_sync()",
+    "DROP TABLE IF EXISTS core_hotel_fts",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_fulltext_index(apps, schema_editor):
+    run_statements(schema_editor, {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    run_statements(schema_editor, {"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_add_orders_OrderItem_manual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodSearchEntry',
+            fields=[
+                ('food', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='core.food')),
+                ('document', core.utils.fulltext.FullTextField(db_column='core_food_fts')),
+            ],
+            options={
+                'db_table': 'core_food_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HotelSearchEntry',
+            fields=[
+                ('hotel', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='core.hotel')),
+                ('document', core.utils.fulltext.FullTextField(db_column='core_hotel_fts')),
+            ],
+            options={
+                'db_table': 'core_hotel_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:58
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The tokenizer and trigram padding of core/utils/fuzzy.py as of this
+# migration, kept here so it doesn't load the live models.
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_WORD_LENGTH = 100
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def vocabulary_words(text):
+    return {word for word in TOKEN_RE.findall((text or "").lower()) if len(word) <= MAX_WORD_LENGTH}
+
+
+def build_vocabulary(apps, schema_editor):
+    SearchTerm = apps.get_model("core", "SearchTerm")
+    SearchTermTrigram = apps.get_model("core", "SearchTermTrigram")
+    Food = apps.get_model("core", "Food")
+    Hotel = apps.get_model("core", "Hotel")
+
+    sources = [
+        ("food", Food.objects.values_list("food_name", flat=True)),
+        ("hotel", Hotel.objects.values_list("hotel_name", flat=True)),
+    ]
+    for kind, names in sources:
+        counts = {}
+        for name in names.iterator():
+            for word in vocabulary_words(name):
+                counts[word] = counts.get(word, 0) + 1
+
+        for word, occurrences in counts.items():
+            grams = trigrams(word)
+            term = SearchTerm.objects.create(
+                kind=kind, word=word, occurrences=occurrences, trigram_count=len(grams)
+            )
+            SearchTermTrigram.objects.bulk_create([
+                SearchTermTrigram(term=term, kind=kind, trigram=gram) for gram in grams
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('food', 'Food'), ('hotel', 'Hotel')], max_length=10)),
+                ('word', models.CharField(max_length=100)),
+                ('occurrences', models.IntegerField(default=0)),
+                ('trigram_count', models.IntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'word'), name='unique_search_term')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTermTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('trigram', models.CharField(max_length=3)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='core.searchterm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'trigram'], name='search_trigram_idx')],
+            },
+        ),
+        migrations.RunPython(build_vocabulary, migrations.RunPython.noop),
+    ]
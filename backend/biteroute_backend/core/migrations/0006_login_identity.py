@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+def build_identities(apps, schema_editor):
+    LoginIdentity = apps.get_model("core", "LoginIdentity")
+    User = apps.get_model("core", "User")
+    HotelOwner = apps.get_model("core", "HotelOwner")
+
+    for role, model in (("user", User), ("owner", HotelOwner)):
+        seen = set()
+        identities = []
+        for pk, contact, password in model.objects.order_by("id").values_list("id", "contact", "password"):
+            contact = contact.strip().lower()
+            # contacts that only differ by case: the oldest account keeps it
+            if contact in seen:
+                continue
+            seen.add(contact)
+            identities.append(LoginIdentity(contact=contact, role=role, principal_id=pk, password=password))
+        LoginIdentity.objects.bulk_create(identities, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_fuzzy_search_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contact', models.CharField(max_length=100)),
+                ('role', models.CharField(choices=[('user', 'User'), ('owner', 'Hotel Owner')], max_length=10)),
+                ('principal_id', models.BigIntegerField()),
+                ('password', models.CharField(max_length=100)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('contact', 'role'), name='unique_login_contact_role'), models.UniqueConstraint(fields=('role', 'principal_id'), name='unique_login_principal')],
+            },
+        ),
+        migrations.RunPython(build_identities, migrations.RunPython.noop),
+    ]
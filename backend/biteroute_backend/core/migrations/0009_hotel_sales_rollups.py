@@ -0,0 +1,117 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    # Same figures as core.utils.analytics.rebuild_rollups(), computed with
+    # the historical models.
+    OrderItem = apps.get_model("core", "OrderItem")
+    HotelDailySales = apps.get_model("core", "HotelDailySales")
+    HotelMonthlySales = apps.get_model("core", "HotelMonthlySales")
+    HotelFoodSales = apps.get_model("core", "HotelFoodSales")
+
+    def grouped(period, trunc):
+        return (
+            OrderItem.objects
+            .annotate(**{period: trunc("order__created_at")})
+            .values("food__hotel_id", period)
+            .annotate(
+                revenue=Sum("price_at_time"),
+                orders=Count("order", distinct=True),
+                items_sold=Sum("quantity"),
+            )
+            .order_by()
+        )
+
+    def as_date(value):
+        return timezone.localtime(value).date() if hasattr(value, "hour") else value
+
+    HotelDailySales.objects.bulk_create(
+        (
+            HotelDailySales(
+                hotel_id=row["food__hotel_id"], day=row["day"],
+                revenue=row["revenue"], orders=row["orders"], items_sold=row["items_sold"],
+            )
+            for row in grouped("day", TruncDate).iterator()
+        ),
+        batch_size=1000,
+    )
+    HotelMonthlySales.objects.bulk_create(
+        (
+            HotelMonthlySales(
+                hotel_id=row["food__hotel_id"], month=as_date(row["month"]),
+                revenue=row["revenue"], orders=row["orders"], items_sold=row["items_sold"],
+            )
+            for row in grouped("month", TruncMonth).iterator()
+        ),
+        batch_size=1000,
+    )
+    HotelFoodSales.objects.bulk_create(
+        (
+            HotelFoodSales(hotel_id=row["food__hotel_id"], food_id=row["food_id"], sold=row["sold"])
+            for row in (
+                OrderItem.objects.values("food__hotel_id", "food_id")
+                .annotate(sold=Sum("quantity"))
+                .order_by()
+                .iterator()
+            )
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('orders', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='core.hotel')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'day'), name='unique_hotel_daily_sales')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HotelFoodSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sold', models.IntegerField(default=0)),
+                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='core.food')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='food_sales', to='core.hotel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hotel', '-sold'], name='hotel_best_sellers_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'food'), name='unique_hotel_food_sales')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HotelMonthlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('orders', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_sales', to='core.hotel')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'month'), name='unique_hotel_monthly_sales')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+from core.utils.hotel_counts import reconcile
+
+
+def backfill_counts(apps, schema_editor):
+    reconcile(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_hotel_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelStatusCounts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('approved', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+# SQLite adds a column with a default by rebuilding the table, and the
+# full-text triggers from 0004 are dropped together with the old
+# core_hotel. Re-create them and rebuild the index from core_hotel.
+SQLITE_RESTORE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS core_hotel_fts_ai AFTER INSERT ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(rowid, hotel_name) VALUES (new.id, new.hotel_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_hotel_fts_ad AFTER DELETE ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(core_hotel_fts, rowid, hotel_name)
+        VALUES ('delete', old.id, old.hotel_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_hotel_fts_au AFTER UPDATE OF hotel_name ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(core_hotel_fts, rowid, hotel_name)
+        VALUES ('delete', old.id, old.hotel_name);
+        INSERT INTO core_hotel_fts(rowid, hotel_name) VALUES (new.id, new.hotel_name);
+    END
+    """,
+    "INSERT INTO core_hotel_fts(core_hotel_fts) VALUES ('rebuild')",
+]
+
+
+def backfill_status(apps, schema_editor):
+    Hotel = apps.get_model("core", "Hotel")
+    Hotel.objects.filter(rejected=True).update(status="rejected")
+    Hotel.objects.filter(approved=True, rejected=False).update(status="approved")
+
+
+def restore_fulltext_triggers(apps, schema_editor):
+    # Postgres alters core_hotel in place and keeps its trigger.
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_RESTORE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_hotel_status_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+        migrations.RunPython(restore_fulltext_triggers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='food',
+            index=models.Index(fields=['hotel', 'category'], name='food_hotel_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['status', 'location'], name='hotel_status_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['owner', 'hotel_name'], name='hotel_owner_name_idx'),
+        ),
+    ]
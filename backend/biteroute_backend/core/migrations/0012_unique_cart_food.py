@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:14
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    # Racing add_to_cart calls could create the same food twice in a cart;
+    # keep the oldest row with the summed quantity.
+    CartItem = apps.get_model("core", "CartItem")
+    duplicates = (
+        CartItem.objects.values("cart_id", "food_id")
+        .annotate(rows=Count("id"), keep=Min("id"), quantity=Sum("quantity"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for dup in list(duplicates):
+        CartItem.objects.filter(id=dup["keep"]).update(quantity=dup["quantity"])
+        CartItem.objects.filter(cart_id=dup["cart_id"], food_id=dup["food_id"]).exclude(id=dup["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_hotel_status_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'food'), name='unique_cart_food'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_unique_cart_food'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='food',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+from django.db import migrations
+
+# SQLite can't alter most column definitions in place, so 0013 rebuilt
+# core_food, and the triggers from 0004 were dropped together with the
+# old table. Foods written since then never reached the full-text index.
+# Re-create the triggers and rebuild the index from core_food.
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER IF NOT EXISTS core_food_fts_ai AFTER INSERT ON core_food BEGIN
+        INSERT INTO core_food_fts(rowid, food_name, description, category)
+        VALUES (new.id, new.food_name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_food_fts_ad AFTER DELETE ON core_food BEGIN
+        INSERT INTO core_food_fts(core_food_fts, rowid, food_name, description, category)
+        VALUES ('delete', old.id, old.food_name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_food_fts_au AFTER UPDATE ON core_food BEGIN
+        INSERT INTO core_food_fts(core_food_fts, rowid, food_name, description, category)
+        VALUES ('delete', old.id, old.food_name, old.description, old.category);
+        INSERT INTO core_food_fts(rowid, food_name, description, category)
+        VALUES (new.id, new.food_name, new.description, new.category);
+    END
+    """,
+    "INSERT INTO core_food_fts(core_food_fts) VALUES ('rebuild')",
+]
+
+
+def restore_fulltext_triggers(apps, schema_editor):
+    # Postgres alters core_food in place and keeps its trigger.
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_food_created_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_fulltext_triggers, migrations.RunPython.noop),
+    ]
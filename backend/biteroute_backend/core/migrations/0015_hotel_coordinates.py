@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_restore_fulltext_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['status', 'geohash'], name='hotel_status_geohash_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def backfill_open_intervals(apps, schema_editor):
+    # Same ranges as core.utils.opening_hours.weekly_intervals(): one
+    # [start, end) per day, past midnight when the close time is at or
+    # before the open time, Sunday night wrapping to Monday morning.
+    Hotel = apps.get_model("core", "Hotel")
+    HotelOpenInterval = apps.get_model("core", "HotelOpenInterval")
+
+    batch = []
+    for hotel_id, open_time, close_time in Hotel.objects.values_list("id", "open_time", "close_time").iterator(
+        chunk_size=2000
+    ):
+        opens = open_time.hour * 60 + open_time.minute
+        closes = close_time.hour * 60 + close_time.minute
+        length = (closes - opens) % MINUTES_PER_DAY or MINUTES_PER_DAY
+        for day in range(7):
+            start = day * MINUTES_PER_DAY + opens
+            end = start + length
+            if end > MINUTES_PER_WEEK:
+                batch.append(HotelOpenInterval(hotel_id=hotel_id, start_minute=0, end_minute=end - MINUTES_PER_WEEK))
+                end = MINUTES_PER_WEEK
+            batch.append(HotelOpenInterval(hotel_id=hotel_id, start_minute=start, end_minute=end))
+        if len(batch) >= 2000:
+            HotelOpenInterval.objects.bulk_create(batch)
+            batch = []
+    HotelOpenInterval.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_hotel_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelOpenInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_minute', models.IntegerField()),
+                ('end_minute', models.IntegerField()),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_intervals', to='core.hotel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['start_minute', 'end_minute', 'hotel'], name='open_interval_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_open_intervals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_order_hotels(apps, schema_editor):
+    # Orders whose items all come from one hotel get it as their pickup.
+    Order = apps.get_model("core", "Order")
+    OrderItem = apps.get_model("core", "OrderItem")
+
+    single_hotel = (
+        OrderItem.objects.values("order_id")
+        .annotate(hotels=Count("food__hotel_id", distinct=True), hotel_id=Max("food__hotel_id"))
+        .filter(hotels=1)
+        .values_list("order_id", "hotel_id")
+    )
+    by_hotel = {}
+    for order_id, hotel_id in single_hotel.iterator(chunk_size=2000):
+        by_hotel.setdefault(hotel_id, []).append(order_id)
+    for hotel_id, order_ids in by_hotel.items():
+        for start in range(0, len(order_ids), 500):
+            Order.objects.filter(id__in=order_ids[start:start + 500]).update(hotel_id=hotel_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_hotel_open_intervals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField()),
+                ('distance_km', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeliveryRouteStop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.IntegerField()),
+                ('leg_km', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='hotel',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='core.hotel'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['hotel', 'created_at'], name='order_hotel_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='deliveryroute',
+            name='hotel',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_routes', to='core.hotel'),
+        ),
+        migrations.AddField(
+            model_name='deliveryroutestop',
+            name='order',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='route_stop', to='core.order'),
+        ),
+        migrations.AddField(
+            model_name='deliveryroutestop',
+            name='route',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stops', to='core.deliveryroute'),
+        ),
+        migrations.AddIndex(
+            model_name='deliveryroute',
+            index=models.Index(fields=['hotel', '-created_at'], name='route_hotel_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='deliveryroutestop',
+            constraint=models.UniqueConstraint(fields=('route', 'sequence'), name='unique_route_sequence'),
+        ),
+        migrations.RunPython(backfill_order_hotels, migrations.RunPython.noop),
+    ]
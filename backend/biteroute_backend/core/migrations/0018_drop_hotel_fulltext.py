@@ -0,0 +1,102 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:05
+
+from django.db import migrations
+
+# Hotel-name typeahead is answered from the in-process index in
+# core/utils/hotel_index.py, so nothing reads core_hotel_fts any more and
+# its triggers only slowed down every hotel write.
+SQLITE_FORWARD = [
+    "DROP TRIGGER IF EXISTS core_hotel_fts_ai",
+    "DROP TRIGGER IF EXISTS core_hotel_fts_ad",
+    "DROP TRIGGER IF EXISTS core_hotel_fts_au",
+    "DROP TABLE IF EXISTS core_hotel_fts",
+]
+
+SQLITE_BACKWARD = [
+    """
+    CREATE VIRTUAL TABLE core_hotel_fts USING fts5(
+        hotel_name,
+        content='core_hotel', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_ai AFTER INSERT ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(rowid, hotel_name) VALUES (new.id, new.hotel_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_ad AFTER DELETE ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(core_hotel_fts, rowid, hotel_name)
+        VALUES ('delete', old.id, old.hotel_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_au AFTER UPDATE OF hotel_name ON core_hotel BEGIN
+        INSERT INTO core_hotel_fts(core_hotel_fts, rowid, hotel_name)
+        VALUES ('delete', old.id, old.hotel_name);
+        INSERT INTO core_hotel_fts(rowid, hotel_name) VALUES (new.id, new.hotel_name);
+    END
+    """,
+    "INSERT INTO core_hotel_fts(core_hotel_fts) VALUES ('rebuild')",
+]
+
+HOTEL_TSVECTOR = "to_tsvector('simple', coalesce({row}.hotel_name, ''))"
+
+POSTGRES_FORWARD = [
+    "DROP TRIGGER IF EXISTS core_hotel_fts_sync ON core_hotel",
+    "DROP FUNCTION IF EXISTS core_hotel_fts_sync()",
+    "DROP TABLE IF EXISTS core_hotel_fts",
+]
+
+POSTGRES_BACKWARD = [
+    """
+    CREATE TABLE core_hotel_fts (
+        rowid bigint PRIMARY KEY REFERENCES core_hotel(id) ON DELETE CASCADE,
+        core_hotel_fts tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX core_hotel_fts_gin ON core_hotel_fts USING GIN (core_hotel_fts)",
+    f"""
+    CREATE FUNCTION core_hotel_fts_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO core_hotel_fts(rowid, core_hotel_fts)
+        VALUES (NEW.id, {HOTEL_TSVECTOR.format(row="NEW")})
+        ON CONFLICT (rowid) DO UPDATE SET core_hotel_fts = EXCLUDED.core_hotel_fts;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_hotel_fts_sync AFTER INSERT OR UPDATE OF hotel_name ON core_hotel
+    FOR EACH ROW EXECUTE FUNCTION core_hotel_fts_sync()
+    """,
+    f"INSERT INTO core_hotel_fts SELECT h.id, {HOTEL_TSVECTOR.format(row='h')} FROM core_hotel h",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_hotel_fulltext(apps, schema_editor):
+    run_statements(schema_editor, {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD})
+
+
+def restore_hotel_fulltext(apps, schema_editor):
+    run_statements(schema_editor, {"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_delivery_routes'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='HotelSearchEntry',
+        ),
+        migrations.RunPython(drop_hotel_fulltext, restore_hotel_fulltext),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 
+from .utils.fulltext import FullTextField
+from .utils.geo import encode_geohash
+
 # Create your models here.
 class User(models.Model):
     name=models.CharField(max_length=100)
@@ -51,6 +54,59 @@ class Hotel(models.Model):
     approved = models.BooleanField(default=False)
     rejected = models.BooleanField(default=False)
 
+    # Denormalized from approved / rejected (kept in sync by save()) so the
+    # approval state is one indexed column instead of a pair of flags.
+    STATUS_PENDING = "pending"
+    STATUS_APPROVED = "approved"
+    STATUS_REJECTED = "rejected"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_APPROVED, "Approved"),
+        (STATUS_REJECTED, "Rejected"),
+    ]
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    # Optional map position. geohash is derived from it by save(); nearby
+    # searches scan geohash ranges instead of matching location text.
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "location"], name="hotel_status_location_idx"),
+            models.Index(fields=["owner", "hotel_name"], name="hotel_owner_name_idx"),
+            models.Index(fields=["status", "geohash"], name="hotel_status_geohash_idx"),
+        ]
+
+    @classmethod
+    def status_for(cls, approved, rejected):
+        if rejected:
+            return cls.STATUS_REJECTED
+        if approved:
+            return cls.STATUS_APPROVED
+        return cls.STATUS_PENDING
+
+    @staticmethod
+    def geohash_for(latitude, longitude):
+        if latitude is None or longitude is None:
+            return None
+        return encode_geohash(latitude, longitude)
+
+    def save(self, *args, **kwargs):
+        self.status = self.status_for(self.approved, self.rejected)
+        self.geohash = self.geohash_for(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            derived = set()
+            if {"approved", "rejected"} & set(update_fields):
+                derived.add("status")
+            if {"latitude", "longitude"} & set(update_fields):
+                derived.add("geohash")
+            if derived:
+                kwargs["update_fields"] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.hotel_name
     
@@ -61,6 +117,12 @@ class Food(models.Model):
     food_name = models.CharField(max_length=200)
     price = models.IntegerField()
     description = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["hotel", "category"], name="food_hotel_category_idx"),
+        ]
 
     def __str__(self):
         return f"{self.food_name} ({self.hotel.hotel_name})"
@@ -89,6 +151,12 @@ class CartItem(models.Model):
     food = models.ForeignKey("Food", on_delete=models.CASCADE)
     quantity = models.IntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            # one row per food, so quantity changes are single-row F() updates
+            models.UniqueConstraint(fields=["cart", "food"], name="unique_cart_food"),
+        ]
+
     def __str__(self):
         return f"{self.food.food_name} ({self.quantity})"
 
@@ -101,6 +169,16 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=100)
     total_amount = models.FloatField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Pickup and drop-off for route planning: the hotel every item comes
+    # from (None when an order mixes hotels) and the delivery position.
+    hotel = models.ForeignKey(Hotel, on_delete=models.SET_NULL, null=True, blank=True, related_name="orders")
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["hotel", "created_at"], name="order_hotel_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order {self.id} - {self.name}"
@@ -114,3 +192,257 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.food.food_name} x {self.quantity}"
+
+
+# Full-text index table. It is created by migration 0004 (an FTS5 virtual
+# table on SQLite, a tsvector table on Postgres) and kept in sync by database
+# triggers, so Django never writes to it. On SQLite, a migration that
+# rebuilds core_food drops those triggers with the old table; re-create them
+# afterwards the way 0014 does. (Hotel names had one too until typeahead
+# moved to the in-process index; 0018 dropped it.)
+class FoodSearchEntry(models.Model):
+    food = models.OneToOneField(
+        Food,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry"
+    )
+    document = FullTextField(db_column="core_food_fts")
+
+    class Meta:
+        managed = False
+        db_table = "core_food_fts"
+
+
+# Vocabulary for typo-tolerant search: every word of every Food / Hotel name,
+# with its trigrams, maintained by the signals in core/signals.py.
+class SearchTerm(models.Model):
+    KIND_FOOD = "food"
+    KIND_HOTEL = "hotel"
+    KIND_CHOICES = [
+        (KIND_FOOD, "Food"),
+        (KIND_HOTEL, "Hotel"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    word = models.CharField(max_length=100)
+    occurrences = models.IntegerField(default=0)
+    trigram_count = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "word"], name="unique_search_term"),
+        ]
+
+    def __str__(self):
+        return f"{self.word} ({self.kind})"
+
+
+class SearchTermTrigram(models.Model):
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name="trigrams")
+    kind = models.CharField(max_length=10)
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "trigram"], name="search_trigram_idx"),
+        ]
+
+
+# One row per login-capable account (User or HotelOwner), keyed by the
+# lower-cased contact so common_login resolves the role with one indexed
+# lookup. Kept in sync by the signals in core/signals.py.
+class LoginIdentity(models.Model):
+    ROLE_USER = "user"
+    ROLE_OWNER = "owner"
+    ROLE_CHOICES = [
+        (ROLE_USER, "User"),
+        (ROLE_OWNER, "Hotel Owner"),
+    ]
+
+    contact = models.CharField(max_length=100)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    principal_id = models.BigIntegerField()
+    password = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["contact", "role"], name="unique_login_contact_role"),
+            models.UniqueConstraint(fields=["role", "principal_id"], name="unique_login_principal"),
+        ]
+
+    def __str__(self):
+        return f"{self.contact} ({self.role})"
+
+
+# Receipt emails waiting to be rendered and sent by the receipt workers
+# (core/utils/receipt_queue.py), so checkout never waits on SMTP.
+class ReceiptJob(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    email = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="receipt_job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"Receipt job {self.id} ({self.status})"
+
+
+# Responses of requests sent with an Idempotency-Key header, so a retried
+# order / payment request is answered without being executed again.
+class IdempotencyKey(models.Model):
+    STATUS_IN_FLIGHT = "in_flight"
+    STATUS_COMPLETED = "completed"
+    STATUS_CHOICES = [
+        (STATUS_IN_FLIGHT, "In flight"),
+        (STATUS_COMPLETED, "Completed"),
+    ]
+
+    scope = models.CharField(max_length=50)
+    principal = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_IN_FLIGHT)
+    response_status = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "principal", "key"], name="unique_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.status})"
+
+
+# Per-hotel sales rollups for the owner analytics dashboard. Updated in the
+# same transaction as place_order (core/utils/analytics.py) and rebuilt from
+# OrderItem by `python manage.py rebuild_hotel_analytics`.
+# revenue follows the dashboard's definition: the sum of price_at_time.
+class HotelDailySales(models.Model):
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField()
+    revenue = models.BigIntegerField(default=0)
+    orders = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["hotel", "day"], name="unique_hotel_daily_sales"),
+        ]
+
+
+class HotelMonthlySales(models.Model):
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name="monthly_sales")
+    month = models.DateField()  # first day of the month
+    revenue = models.BigIntegerField(default=0)
+    orders = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["hotel", "month"], name="unique_hotel_monthly_sales"),
+        ]
+
+
+class HotelFoodSales(models.Model):
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name="food_sales")
+    food = models.ForeignKey(Food, on_delete=models.CASCADE, related_name="sales")
+    sold = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["hotel", "food"], name="unique_hotel_food_sales"),
+        ]
+        indexes = [
+            models.Index(fields=["hotel", "-sold"], name="hotel_best_sellers_idx"),
+        ]
+
+
+# Hotel counts by status for the admin dashboard, kept in a single row
+# (id=1). Adjusted with F() by the views that create / approve / reject /
+# delete hotels and reconciled against Hotel by core/utils/hotel_counts.py.
+class HotelStatusCounts(models.Model):
+    approved = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"approved={self.approved} pending={self.pending} rejected={self.rejected}"
+
+
+# A hotel's weekly opening hours as [start_minute, end_minute) ranges of
+# minutes since Monday 00:00, rebuilt from open_time / close_time whenever
+# they change (core/utils/opening_hours.py). No range is longer than a day,
+# so "open at minute m" is an index range scan over the ranges starting in
+# the day before m.
+class HotelOpenInterval(models.Model):
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name="open_intervals")
+    start_minute = models.IntegerField()
+    end_minute = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["start_minute", "end_minute", "hotel"], name="open_interval_lookup_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel_id}: {self.start_minute}-{self.end_minute}"
+
+
+# A planned multi-stop delivery run out of one hotel, for the orders placed
+# in one dispatch time window (core/utils/dispatch.py).
+class DeliveryRoute(models.Model):
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name="delivery_routes")
+    window_start = models.DateTimeField()
+    distance_km = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["hotel", "-created_at"], name="route_hotel_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Route {self.id} - {self.hotel_id}"
+
+
+class DeliveryRouteStop(models.Model):
+    route = models.ForeignKey(DeliveryRoute, on_delete=models.CASCADE, related_name="stops")
+    # an order is routed at most once; unrouted orders are the pending ones
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name="route_stop")
+    sequence = models.IntegerField()
+    leg_km = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["route", "sequence"], name="unique_route_sequence"),
+        ]
+
+    def __str__(self):
+        return f"Route {self.route_id} stop {self.sequence}"
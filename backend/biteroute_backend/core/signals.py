@@ -0,0 +1,149 @@
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .auth_cache import principal_cache
+from .models import Food, Hotel, HotelOwner, LoginIdentity, Order, OrderItem, SearchTerm, User
+from .utils.analytics import forget_order_items, forget_orders
+from .utils.fuzzy import add_words, remove_words, vocabulary_words
+from .utils.hotel_index import hotel_name_index
+from .utils.opening_hours import sync_open_intervals
+
+
+# ================= FUZZY SEARCH VOCABULARY =================
+
+def remember_name(instance, field, update_fields):
+    """Keeps the stored name on the instance so post_save can diff a rename."""
+    if instance.pk is None or (update_fields is not None and field not in update_fields):
+        instance._stored_name = None
+        return
+    instance._stored_name = type(instance)._base_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def sync_words(kind, instance, field, created):
+    name = getattr(instance, field)
+    if created:
+        add_words(kind, name)
+        return
+
+    # renamed: the old words go, the new ones come in
+    stored = getattr(instance, "_stored_name", None)
+    if stored is not None and vocabulary_words(stored) != vocabulary_words(name):
+        remove_words(kind, stored)
+        add_words(kind, name)
+
+
+@receiver(pre_save, sender=Food)
+def food_saving(sender, instance, update_fields=None, **kwargs):
+    remember_name(instance, "food_name", update_fields)
+
+
+@receiver(post_save, sender=Food)
+def food_saved(sender, instance, created, **kwargs):
+    sync_words(SearchTerm.KIND_FOOD, instance, "food_name", created)
+
+
+@receiver(post_delete, sender=Food)
+def food_deleted(sender, instance, **kwargs):
+    remove_words(SearchTerm.KIND_FOOD, instance.food_name)
+
+
+@receiver(pre_save, sender=Hotel)
+def hotel_saving(sender, instance, update_fields=None, **kwargs):
+    remember_name(instance, "hotel_name", update_fields)
+
+
+@receiver(post_save, sender=Hotel)
+def hotel_saved(sender, instance, created, **kwargs):
+    sync_words(SearchTerm.KIND_HOTEL, instance, "hotel_name", created)
+
+
+@receiver(post_delete, sender=Hotel)
+def hotel_deleted(sender, instance, **kwargs):
+    remove_words(SearchTerm.KIND_HOTEL, instance.hotel_name)
+
+
+# ================= SALES ROLLUPS =================
+
+@receiver(pre_delete, sender=Food)
+def food_sales_deleted(sender, instance, **kwargs):
+    # the food's order lines cascade with it
+    forget_order_items(OrderItem.objects.filter(food=instance))
+
+
+@receiver(pre_delete, sender=Order)
+def order_sales_deleted(sender, instance, **kwargs):
+    # also sent for each order cascading from a deleted user
+    forget_orders([instance.pk])
+
+
+# ================= HOTEL TYPEAHEAD INDEX =================
+
+@receiver(post_save, sender=Hotel)
+def hotel_index_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: hotel_name_index.upsert(instance))
+
+
+@receiver(post_delete, sender=Hotel)
+def hotel_index_deleted(sender, instance, **kwargs):
+    hotel_id = instance.pk
+    transaction.on_commit(lambda: hotel_name_index.remove(hotel_id))
+
+
+# ================= OPENING HOURS =================
+
+@receiver(post_save, sender=Hotel)
+def hotel_hours_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {"open_time", "close_time"} & set(update_fields):
+        return
+    sync_open_intervals(instance)
+
+
+# ================= AUTH PRINCIPAL CACHE =================
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    principal_cache.invalidate("user", instance.pk)
+
+
+@receiver(post_save, sender=HotelOwner)
+@receiver(post_delete, sender=HotelOwner)
+def owner_changed(sender, instance, **kwargs):
+    principal_cache.invalidate("owner", instance.pk)
+
+
+# ================= LOGIN IDENTITIES =================
+
+def sync_identity(role, principal_id, contact, password):
+    try:
+        with transaction.atomic():
+            LoginIdentity.objects.update_or_create(
+                role=role,
+                principal_id=principal_id,
+                defaults={"contact": contact.strip().lower(), "password": password},
+            )
+    except IntegrityError:
+        # another account of this role already owns the contact (case-only
+        # difference); it stays the one common_login resolves to
+        pass
+
+
+@receiver(post_save, sender=User)
+def user_identity_saved(sender, instance, **kwargs):
+    sync_identity(LoginIdentity.ROLE_USER, instance.pk, instance.contact, instance.password)
+
+
+@receiver(post_delete, sender=User)
+def user_identity_deleted(sender, instance, **kwargs):
+    LoginIdentity.objects.filter(role=LoginIdentity.ROLE_USER, principal_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=HotelOwner)
+def owner_identity_saved(sender, instance, **kwargs):
+    sync_identity(LoginIdentity.ROLE_OWNER, instance.pk, instance.contact, instance.password)
+
+
+@receiver(post_delete, sender=HotelOwner)
+def owner_identity_deleted(sender, instance, **kwargs):
+    LoginIdentity.objects.filter(role=LoginIdentity.ROLE_OWNER, principal_id=instance.pk).delete()
@@ -1,3 +1,1304 @@
-from django.test import TestCase
+import base64
+import re
+import socket
+import unittest
+import zlib
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # test-only dependency
+    Controller = None
+
+from .auth_cache import principal_cache
+from .auth_utils import generate_token, hash_password
+from .models import (
+    Cart, CartItem, DeliveryRouteStop, Food, Hotel, HotelDailySales, HotelFoodSales, HotelMonthlySales, HotelOwner,
+    HotelStatusCounts, IdempotencyKey, Order, OrderItem, ReceiptJob, SearchTerm, User,
+)
+from .utils.analytics import hotel_analytics, rebuild_rollups
+from .utils.cart_store import DatabaseCartStore, cart_store
+from .utils.dispatch import dispatch
+from .utils.food_purge import purge_foods, purge_queryset
+from .utils.fuzzy import CORRECTED_QUERY_HEADER, correct_query, correct_word
+from .utils.hotel_counts import RECONCILE_INTERVAL, reconcile
+from .utils.hotel_index import HotelNameIndex, hotel_name_index
+from .utils.mail_outbox import Outbox, metrics as outbox_metrics
+from .utils import order_writer
+from .utils.order_writer import place_orders
+from .utils.pagination import CURSOR_HEADER
+from .utils.pdf_receipt import generate_receipt_pdf, generate_receipt_pdfs
+from .utils import receipt_queue
+from .utils.receipt_queue import claim_jobs, enqueue_receipt, retry_delay, run_pending
+
+
+def make_owner(**fields):
+    return HotelOwner.objects.create(**{
+        "username": "owner",
+        "contact": "owner@example.com",
+        "password": "x",
+        **fields,
+    })
+
+
+def make_hotel(owner, **fields):
+    """An approved hotel open 09:00-23:00 in Pune unless ``fields`` say otherwise."""
+    return Hotel.objects.create(owner=owner, **{
+        "hotel_name": "Hotel",
+        "location": "Pune",
+        "food_type": "veg",
+        "open_time": time(9),
+        "close_time": time(23),
+        "approved": True,
+        **fields,
+    })
+
+
+class FoodSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel(make_owner(), hotel_name="Spice Hub", location="Pune Camp")
+
+    def search(self, food):
+        return self.client.get("/api/user/search-food/", {"type": "Veg", "food": food, "location": "pune"})
+
+    def test_new_and_renamed_foods_are_searchable(self):
+        food = Food.objects.create(hotel=self.hotel, category="Veg", food_name="Paneer Tikka", price=180)
+        self.assertEqual([row["food_id"] for row in self.search("paneer").data], [food.id])
+
+        food.food_name = "Veg Biryani"
+        food.save()
+        self.assertEqual(self.search("paneer").data, [])
+        self.assertEqual([row["food_name"] for row in self.search("biryani").data], ["Veg Biryani"])
+
+    def test_default_page_size_without_limit(self):
+        Food.objects.bulk_create([
+            Food(hotel=self.hotel, category="Veg", food_name=f"Paneer {n}", price=100 + n) for n in range(4)
+        ])
+        with mock.patch("core.views.SEARCH_PAGE_SIZE", 2):
+            response = self.search("paneer")
+        self.assertEqual(len(response.data), 2)
+        self.assertIn(CURSOR_HEADER, response)
+
+        page = self.client.get(
+            "/api/user/search-food/",
+            {"type": "Veg", "food": "paneer", "location": "pune", "limit": 3, "cursor": response[CURSOR_HEADER]},
+        )
+        self.assertEqual(len(page.data), 2)
+        self.assertNotIn(CURSOR_HEADER, page)
+
+
+class FuzzySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel(make_owner(), hotel_name="Spice Hub")
+        for name in ("Paneer Tikka", "Paneer Butter Masala", "Veg Biryani"):
+            Food.objects.create(hotel=cls.hotel, category="Veg", food_name=name, price=150)
+
+    def occurrences(self, kind=SearchTerm.KIND_FOOD):
+        return dict(SearchTerm.objects.filter(kind=kind).values_list("word", "occurrences"))
+
+    def test_correct_word(self):
+        self.assertEqual(correct_word(SearchTerm.KIND_FOOD, "panner"), "paneer")
+        self.assertEqual(correct_word(SearchTerm.KIND_FOOD, "biryni"), "biryani")
+        self.assertEqual(correct_word(SearchTerm.KIND_FOOD, "tikka"), "tikka")
+        self.assertIsNone(correct_word(SearchTerm.KIND_FOOD, "sushi"))
+        self.assertEqual(correct_word(SearchTerm.KIND_HOTEL, "spise"), "spice")
+
+    def test_correct_query(self):
+        self.assertEqual(correct_query(SearchTerm.KIND_FOOD, "Panner tika"), "paneer tikka")
+        self.assertEqual(correct_query(SearchTerm.KIND_FOOD, "panner sushi"), "paneer sushi")
+
+        response = self.client.get(
+            "/api/user/search-food/", {"type": "Veg", "food": "panner tika", "location": "pune", "fuzzy": 1}
+        )
+        self.assertEqual(response[CORRECTED_QUERY_HEADER], "paneer tikka")
+        self.assertEqual([row["food_name"] for row in response.data], ["Paneer Tikka"])
+
+    def test_vocabulary_follows_the_catalog(self):
+        self.assertEqual(
+            self.occurrences(), {"paneer": 2, "tikka": 1, "butter": 1, "masala": 1, "veg": 1, "biryani": 1}
+        )
+
+        food = Food.objects.get(food_name="Paneer Tikka")
+        food.food_name = "Paneer Lababdar"
+        food.save()
+        self.assertEqual(self.occurrences()["paneer"], 2)
+        self.assertNotIn("tikka", self.occurrences())
+        self.assertEqual(self.occurrences()["lababdar"], 1)
+        self.assertEqual(correct_word(SearchTerm.KIND_FOOD, "lababdr"), "lababdar")
+
+        Food.objects.get(food_name="Veg Biryani").delete()
+        self.assertNotIn("biryani", self.occurrences())
+
+        self.hotel.hotel_name = "Curry House"
+        self.hotel.save()
+        self.assertEqual(self.occurrences(SearchTerm.KIND_HOTEL), {"curry": 1, "house": 1})
+
+        # saves that don't touch the name leave the vocabulary alone
+        self.hotel.description = "North Indian"
+        self.hotel.save(update_fields=["description"])
+        self.assertEqual(self.occurrences(SearchTerm.KIND_HOTEL), {"curry": 1, "house": 1})
+
+
+class CommonLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create(name="user", contact="x@e.com", password=hash_password("userpw"))
+        make_owner(contact="X@e.com", password=hash_password("ownerpw"))
+
+    def login(self, password, **extra):
+        return self.client.post("/api/common/login/", {"contact": "x@e.com", "password": password, **extra})
+
+    def test_contact_registered_as_user_and_owner(self):
+        self.assertEqual(self.login("userpw").data["role"], "user")
+        self.assertEqual(self.login("ownerpw").data["role"], "hotel")
+        self.assertEqual(self.login("ownerpw", role="hotel").data["role"], "hotel")
+
+        self.assertEqual(self.login("ownerpw", role="user").status_code, 401)
+        self.assertEqual(self.login("wrong").status_code, 401)
+
+    def test_every_attempt_hashes_once_per_possible_role(self):
+        # (request, password matches, hashes expected)
+        attempts = [
+            ({}, True, 2),
+            ({}, False, 2),
+            ({"contact": "nobody@e.com"}, False, 2),
+            ({"role": "hotel"}, False, 1),
+            ({"contact": "nobody@e.com", "role": "user"}, False, 1),
+        ]
+        for data, matches, hashes in attempts:
+            with self.subTest(**data, matches=matches), \
+                    mock.patch("core.views.check_password", return_value=matches) as checked, \
+                    mock.patch("core.views.dummy_password_check") as dummy:
+                self.login("pw", **data)
+                self.assertEqual(checked.call_count + dummy.call_count, hashes)
+
+
+class HotelListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_owner()
+        for n in range(5):
+            make_hotel(owner, hotel_name=f"Hotel {n}", approved=False)
+
+    def test_default_page_size_without_limit(self):
+        with mock.patch("core.utils.hotel_listing.HOTEL_PAGE_SIZE", 2):
+            first = self.client.get("/api/admin/all-hotels/")
+            rest = self.client.get("/api/admin/all-hotels/", {"cursor": first[CURSOR_HEADER], "limit": 10})
+
+        self.assertEqual(len(first.data), 2)
+        self.assertEqual(len(rest.data), 3)
+        self.assertNotIn(CURSOR_HEADER, rest)
+
+    def test_pages_follow_the_cursor(self):
+        first = self.client.get("/api/admin/all-hotels/", {"limit": 3, "fields": "hotel_name"})
+        second = self.client.get("/api/admin/all-hotels/", {"limit": 3, "cursor": first[CURSOR_HEADER]})
+
+        self.assertEqual([row["hotel_name"] for row in first.data], ["Hotel 0", "Hotel 1", "Hotel 2"])
+        self.assertEqual([row["hotel_name"] for row in second.data], ["Hotel 3", "Hotel 4"])
+        self.assertNotIn(CURSOR_HEADER, second)
+
+
+class HotelTypeaheadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_owner()
+        cls.spice = make_hotel(cls.owner, hotel_name="Spice Hub")
+        cls.garden = make_hotel(cls.owner, hotel_name="Green Spice Garden", approved=False)
+
+    def setUp(self):
+        hotel_name_index.rebuild()
+
+    def suggest(self, q):
+        return [(h["hotel_name"], h["status"]) for h in self.client.get("/api/hotels/search/", {"q": q}).json()]
+
+    def test_matches_word_prefixes_with_leading_names_first(self):
+        self.assertEqual(self.suggest("spi"), [("Spice Hub", "approved"), ("Green Spice Garden", "pending")])
+        self.assertEqual(self.suggest("gre spi"), [("Green Spice Garden", "pending")])
+        self.assertEqual(self.suggest("spice gar"), [("Green Spice Garden", "pending")])
+        # word prefixes only, not substrings
+        self.assertEqual(self.suggest("ice"), [])
+
+    def test_keeps_scanning_until_the_limit_is_filled(self):
+        Hotel.objects.bulk_create(
+            Hotel(owner=self.owner, hotel_name=f"Pal Dhaba {n}", location="Pune", food_type="veg",
+                  open_time=time(9), close_time=time(23))
+            for n in range(600)
+        )
+        palace = make_hotel(self.owner, hotel_name="Palace Inn")
+        hotel_name_index.rebuild()
+
+        self.assertEqual(hotel_name_index.search("inn pal"), [
+            {"id": palace.id, "hotel_name": "Palace Inn", "status": "approved"},
+        ])
+        self.assertEqual(len(hotel_name_index.search("pal")), 10)
+
+    def test_renames_and_deletes_reach_the_index_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spice.hotel_name = "Curry Corner"
+            self.spice.save()
+        self.assertEqual(self.suggest("cur"), [("Curry Corner", "approved")])
+        self.assertEqual(self.suggest("hub"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.garden.delete()
+        self.assertEqual(self.suggest("spi"), [])
+
+    def test_other_workers_rebuild_when_the_version_moves(self):
+        other_worker = HotelNameIndex()
+        self.assertEqual(len(other_worker.search("spi")), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_hotel(self.owner, hotel_name="Spicy Bowl")
+
+        self.assertEqual(len(other_worker.search("spi")), 3)
+
+
+class OpenAtSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_owner()
+        for name, opens, closes in (("Lunch", time(11), time(16)), ("Late Night", time(18), time(2))):
+            hotel = make_hotel(owner, hotel_name=name, open_time=opens, close_time=closes)
+            Food.objects.create(hotel=hotel, category="Veg", food_name="Veg Biryani", price=150)
+
+    def open_at(self, moment):
+        response = self.client.get(
+            "/api/user/search-food/", {"type": "Veg", "food": "biryani", "location": "pune", "open_at": moment}
+        )
+        return sorted(row["hotel_name"] for row in response.data)
+
+    def test_open_past_midnight(self):
+        # 2026-10-18 is a Sunday; times are read in HOTEL_TIME_ZONE
+        self.assertEqual(self.open_at("2026-10-18T12:00"), ["Lunch"])
+        self.assertEqual(self.open_at("2026-10-18T23:30"), ["Late Night"])
+        self.assertEqual(self.open_at("2026-10-19T01:59"), ["Late Night"])
+        self.assertEqual(self.open_at("2026-10-19T02:00"), [])
+
+    def test_hours_change_updates_the_filter(self):
+        hotel = Hotel.objects.get(hotel_name="Lunch")
+        hotel.close_time = time(23, 45)
+        hotel.save(update_fields=["close_time"])
+
+        self.assertEqual(self.open_at("2026-10-18T23:30"), ["Late Night", "Lunch"])
+
+
+class NearestHotelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_owner()
+        cls.hotels = {}
+        places = {
+            "Camp": (18.5167, 73.8785, True),
+            "Kothrud": (18.5074, 73.8077, True),
+            "Hinjewadi": (18.5913, 73.7389, True),
+            "Mumbai": (19.0760, 72.8777, True),
+            "Pending": (18.5204, 73.8567, False),
+        }
+        for name, (latitude, longitude, approved) in places.items():
+            hotel = make_hotel(
+                owner, hotel_name=name, location=name, approved=approved, latitude=latitude, longitude=longitude
+            )
+            Food.objects.create(hotel=hotel, category="Veg", food_name="Paneer Tikka", price=180)
+            cls.hotels[name] = hotel
+        Food.objects.create(hotel=cls.hotels["Camp"], category="Veg", food_name="Veg Biryani", price=150)
+
+    def nearest(self, **params):
+        return self.client.get("/api/user/nearest-hotels/", {"lat": 18.5204, "lng": 73.8567, **params})
+
+    def test_closest_approved_hotels_first(self):
+        data = self.nearest(food="paneer", k=2).data
+
+        self.assertEqual([row["hotel_name"] for row in data], ["Camp", "Kothrud"])
+        self.assertAlmostEqual(data[0]["distance_km"], 2.37, places=1)
+        self.assertEqual([food["food_name"] for food in data[0]["foods"]], ["Paneer Tikka"])
+
+    def test_radius_and_food_filter(self):
+        self.assertEqual([row["hotel_name"] for row in self.nearest(food="paneer", k=10).data],
+                         ["Camp", "Kothrud", "Hinjewadi"])
+        self.assertEqual([row["hotel_name"] for row in self.nearest(food="biryani").data], ["Camp"])
+        self.assertEqual(self.nearest(food="paneer", lat=95).status_code, 400)
+
+
+class SearchEtaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_owner()
+        user = User.objects.create(name="user", contact="user@example.com", password="x")
+        cls.hotels = []
+        for n, (name, latitude) in enumerate((("Busy Nearby", 18.52), ("Quiet", 18.54), ("Unmapped", None))):
+            hotel = make_hotel(
+                owner,
+                hotel_name=name,
+                open_time=time(0),
+                close_time=time(0),
+                latitude=latitude,
+                longitude=73.85 if latitude else None,
+            )
+            Food.objects.create(hotel=hotel, category="Veg", food_name="Veg Biryani", price=100 + n)
+            cls.hotels.append(hotel)
+        food = cls.hotels[0].foods.get()
+        for _ in range(6):
+            order = Order.objects.create(
+                user=user, name="user", mobile="1", address="a", payment_method="COD",
+                total_amount=100, hotel=cls.hotels[0],
+            )
+            order.items.create(food=food, quantity=2, price_at_time=100)
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, **params):
+        return self.client.get("/api/user/search-food/", {
+            "type": "Veg", "food": "biryani", "location": "pune", "lat": 18.52, "lng": 73.85, **params,
+        })
+
+    def test_sort_by_eta(self):
+        data = self.search(sort="eta").data
+
+        self.assertEqual([row["hotel_name"] for row in data], ["Quiet", "Busy Nearby", "Unmapped"])
+        # 12 prep (8 + 2 x 2 items), 24 queued (6 orders x 12 / 3 at a time), 4 handoff
+        self.assertEqual(data[1]["eta_minutes"], 40)
+        self.assertEqual(data[1]["distance_km"], 0.0)
+        self.assertIsNone(data[2]["eta_minutes"])
+
+    def test_hotel_stats_are_cached(self):
+        self.search()
+        with self.assertNumQueries(1):
+            data = self.search().data
+        self.assertEqual(len(data), 3)
+
+
+class DispatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(name="user", contact="user@example.com", password="x")
+        cls.hotel = make_hotel(make_owner(), latitude=18.52, longitude=73.85)
+        # drop-offs on a line north of the hotel, placed out of order
+        for step in (3, 1, 5, 2, 4):
+            Order.objects.create(
+                user=user,
+                name="user",
+                mobile="1",
+                address="a",
+                payment_method="COD",
+                total_amount=100,
+                hotel=cls.hotel,
+                latitude=18.52 + step * 0.01,
+                longitude=73.85,
+            )
+
+    def test_routes_cover_every_pending_order_once(self):
+        routes, stats = dispatch(max_stops=3, window_minutes=24 * 60)
+
+        self.assertEqual(stats["orders"], 5)
+        self.assertEqual([len(route["stops"]) for route in routes], [3, 2])
+        first_run = [round(latitude, 2) for order_id, latitude, longitude, leg in routes[0]["stops"]]
+        self.assertEqual(first_run, [18.53, 18.54, 18.55])
+        self.assertEqual(DeliveryRouteStop.objects.count(), 5)
+
+        routes, stats = dispatch(max_stops=3)
+        self.assertEqual(routes, [])
+
+
+class HotelFoodItemsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_owner()
+        cls.hotel = make_hotel(cls.owner)
+        Food.objects.create(hotel=cls.hotel, category="Veg", food_name="Veg Biryani", price=120)
+
+    def test_async_view_authenticates_like_drf(self):
+        url = f"/api/hotels/{self.hotel.id}/foods/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {"detail": "Authentication credentials were not provided."})
+
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer junk")
+        self.assertEqual(response.json(), {"detail": "Invalid or expired token"})
+
+        response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {generate_token(self.owner.id, 'owner')}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([food["food_name"] for food in response.json()["foods"]], ["Veg Biryani"])
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response["Allow"], "GET, OPTIONS")
+
+
+class CartReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_owner()
+        cls.user = User.objects.create(name="user", contact="user@example.com", password="x")
+        cls.hotels = [make_hotel(owner, hotel_name=f"Hotel {n}") for n in range(2)]
+        cls.foods = [
+            Food.objects.create(hotel=cls.hotels[n % 2], category="Veg", food_name=f"Dish {n}", price=100 + n)
+            for n in range(10)
+        ]
+        cls.cart = Cart.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_cart(self):
+        return self.client.get(f"/api/cart/{self.user.id}/")
+
+    def test_query_count_does_not_grow_with_items(self):
+        CartItem.objects.create(cart=self.cart, food=self.foods[0], quantity=1)
+        with self.assertNumQueries(2):
+            self.get_cart()
+
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, food=food, quantity=2) for food in self.foods[1:]
+        ])
+        with self.assertNumQueries(2):
+            response = self.get_cart()
+        self.assertEqual(len(response.data["items"]), 10)
+
+    def test_missing_cart_is_one_query(self):
+        other = User.objects.create(name="other", contact="other@example.com", password="x")
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/cart/{other.id}/")
+        self.assertEqual(response.data["items"], [])
+        self.assertEqual(response.data["total"], 0.0)
+
+    def test_totals(self):
+        CartItem.objects.create(cart=self.cart, food=self.foods[0], quantity=2)  # Hotel 0, 100
+        CartItem.objects.create(cart=self.cart, food=self.foods[1], quantity=1)  # Hotel 1, 101
+        CartItem.objects.create(cart=self.cart, food=self.foods[2], quantity=3)  # Hotel 0, 102
+
+        data = self.get_cart().data
+
+        self.assertEqual([line["subtotal"] for line in data["items"]], [200, 101, 306])
+        self.assertEqual(
+            [(group["hotel_name"], group["items"], group["subtotal"]) for group in data["hotels"]],
+            [("Hotel 0", 5, 506), ("Hotel 1", 1, 101)],
+        )
+        self.assertEqual(data["subtotal"], 607)
+        self.assertEqual(data["gst"], 30.35)
+        self.assertEqual(data["total"], 637.35)
+        self.assertEqual(
+            set(data["items"][0]),
+            {"id", "food", "food_name", "price", "hotel_name", "location", "quantity", "subtotal"},
+        )
+
+
+class CartWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="user", contact="user@example.com", password="x")
+        hotel = make_hotel(make_owner())
+        cls.foods = [
+            Food.objects.create(hotel=hotel, category="Veg", food_name=f"Dish {n}", price=100 + n)
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list("food_id", "quantity"))
+
+    def test_add_to_cart_increments_in_place(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user.id, 'user')}")
+        payload = {"user_id": self.user.id, "food_id": self.foods[0].id}
+        self.client.post("/api/cart/add/", payload, format="json")
+        # cart lookup, food check + one UPDATE (the principal is cached after the first call)
+        with self.assertNumQueries(3):
+            self.client.post("/api/cart/add/", payload, format="json")
+
+        self.assertEqual(self.quantities(), {self.foods[0].id: 2})
+
+    def test_add_unknown_food(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user.id, 'user')}")
+
+        response = self.client.post("/api/cart/add/", {"user_id": self.user.id, "food_id": 999999}, format="json")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.quantities(), {})
+        self.assertEqual(cart_store().flush_all(), 0)
+
+    def test_batch_applies_operations_in_order(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user.id, 'user')}")
+        Cart.objects.create(user=self.user).items.create(food=self.foods[2], quantity=4)
+        operations = [
+            {"op": "add", "food_id": self.foods[0].id},
+            {"op": "add", "food_id": self.foods[0].id, "quantity": 2},
+            {"op": "set", "food_id": self.foods[1].id, "quantity": 5},
+            {"op": "add", "food_id": self.foods[1].id},
+            {"op": "remove", "food_id": self.foods[2].id},
+        ]
+
+        response = self.client.post(
+            "/api/cart/batch/", {"user_id": self.user.id, "operations": operations}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {self.foods[0].id: 3, self.foods[1].id: 6})
+        self.assertEqual(response.data["subtotal"], 3 * 100 + 6 * 101)
+
+    def test_invalid_batch_changes_nothing(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user.id, 'user')}")
+        Cart.objects.create(user=self.user).items.create(food=self.foods[0], quantity=1)
+        operations = [
+            {"op": "add", "food_id": self.foods[0].id},
+            {"op": "add", "food_id": 999999},
+            {"op": "set", "food_id": self.foods[1].id, "quantity": -1},
+        ]
+
+        response = self.client.post(
+            "/api/cart/batch/", {"user_id": self.user.id, "operations": operations}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data["errors"]), 2)
+        self.assertEqual(self.quantities(), {self.foods[0].id: 1})
+
+    def test_batch_only_changes_your_own_cart(self):
+        payload = {"user_id": self.user.id, "operations": [{"op": "add", "food_id": self.foods[0].id}]}
+
+        self.client.credentials()
+        response = self.client.post("/api/cart/batch/", payload, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        other = User.objects.create(name="other", contact="other@example.com", password="x")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(other.id, 'user')}")
+        response = self.client.post("/api/cart/batch/", payload, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.assertEqual(self.quantities(), {})
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_updating_to_zero_removes_the_item(self):
+        item = Cart.objects.create(user=self.user).items.create(food=self.foods[0], quantity=2)
+
+        response = self.client.post("/api/cart/update/", {"item_id": item.id, "quantity": 0}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        cart_store().flush_all()
+        self.assertEqual(self.quantities(), {})
+
+    @override_settings(CART_STORE={"BACKEND": "cache"})
+    def test_write_behind_without_a_shared_alias_writes_through(self):
+        self.assertIsInstance(cart_store(), DatabaseCartStore)
+
+
+WRITE_BEHIND = {"BACKEND": "cache", "ALIAS": "default", "IN_PROCESS_FLUSHER": False}
+
+
+@override_settings(CART_STORE=WRITE_BEHIND)
+class WriteBehindCartTests(CartWriteTests):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user.id, 'user')}")
+
+    def add(self, food):
+        return self.client.post(
+            "/api/cart/add/", {"user_id": self.user.id, "food_id": food.id}, format="json"
+        )
+
+    def test_add_to_cart_increments_in_place(self):
+        self.add(self.foods[0])
+        # cart lookup and food check only; the change stays in the cache
+        with self.assertNumQueries(2):
+            self.add(self.foods[0])
+
+        self.assertEqual(self.quantities(), {})
+        self.assertEqual(cart_store().flush_all(), 1)
+        self.assertEqual(self.quantities(), {self.foods[0].id: 2})
+
+    def test_flush_is_idempotent(self):
+        for food in (self.foods[0], self.foods[0], self.foods[1]):
+            self.add(food)
+        store = cart_store()
+        cart_id = Cart.objects.get(user=self.user).id
+
+        self.assertTrue(store.flush(cart_id))
+        self.assertFalse(store.flush(cart_id))
+        self.assertEqual(store.dirty_carts(), set())
+        self.assertEqual(self.quantities(), {self.foods[0].id: 2, self.foods[1].id: 1})
+
+        # removing a flushed item deletes its row on the next flush
+        item = CartItem.objects.get(cart_id=cart_id, food=self.foods[1])
+        self.client.post("/api/cart/remove/", {"item_id": item.id}, format="json")
+        self.assertEqual(store.flush_all(), 1)
+        self.assertEqual(self.quantities(), {self.foods[0].id: 2})
+
+    def test_cart_read_sees_buffered_changes(self):
+        self.add(self.foods[2])
+        self.add(self.foods[2])
+
+        data = self.client.get(f"/api/cart/{self.user.id}/").data
+
+        self.assertEqual([(line["food"], line["quantity"]) for line in data["items"]], [(self.foods[2].id, 2)])
+        self.assertIsNotNone(data["items"][0]["id"])
+
+
+class MenuImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_owner()
+        cls.hotel = make_hotel(cls.owner)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.owner.id, 'owner')}")
+        Food.objects.create(hotel=self.hotel, category="Veg", food_name="Paneer Tikka", price=180)
+        Food.objects.create(hotel=self.hotel, category="Veg", food_name="Dal Fry", price=120)
+
+    def upload(self, body, content_type, query=""):
+        return self.client.post(
+            f"/api/hotels/{self.hotel.id}/foods/import/{query}", body, content_type=content_type
+        )
+
+    def menu(self):
+        return dict(Food.objects.filter(hotel=self.hotel).values_list("food_name", "price"))
+
+    def test_csv_body_merges_into_the_menu(self):
+        body = "category,food_name,price\nVeg,paneer tikka,200\nVeg,Dal Fry,120\nVeg,Veg Biryani,150\n"
+
+        response = self.upload(body, "text/csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ("created", "updated", "unchanged", "deleted")},
+            {"created": 1, "updated": 1, "unchanged": 1, "deleted": 0},
+        )
+        self.assertEqual(self.menu(), {"paneer tikka": 200, "Dal Fry": 120, "Veg Biryani": 150})
+
+    def test_jsonl_body_chosen_with_input(self):
+        body = '{"category": "Veg", "food_name": "Masala Dosa", "price": 90}\n'
+
+        response = self.upload(body, "text/plain", "?input=jsonl")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(self.menu()["Masala Dosa"], 90)
+
+    def test_multipart_upload_replaces_the_menu(self):
+        upload = SimpleUploadedFile("menu.csv", b"category,food_name,price\nVeg,Dal Fry,130\n")
+
+        response = self.client.post(
+            f"/api/hotels/{self.hotel.id}/foods/import/?mode=replace", {"file": upload}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["updated"], response.data["deleted"]), (1, 1))
+        self.assertEqual(self.menu(), {"Dal Fry": 130})
+
+    def test_row_errors_are_reported_and_block_replace(self):
+        body = (
+            '{"category": "Veg", "food_name": "Veg Biryani", "price": 150}\n'
+            '{"category": "Veg", "food_name": "Idli", "price": "cheap"}\n'
+            'not json\n'
+            '{"category": "Veg", "food_name": "veg biryani", "price": 160}\n'
+        )
+
+        response = self.upload(body, "application/x-ndjson", "?mode=replace")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["error_count"], 3)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3, 4])
+        self.assertEqual(response.data["deleted"], 0)
+        self.assertEqual(self.menu(), {"Paneer Tikka": 180, "Dal Fry": 120, "Veg Biryani": 150})
+
+    def test_unknown_format(self):
+        self.assertEqual(self.upload("x", "text/plain").status_code, 400)
+        self.assertEqual(self.upload("x", "text/plain", "?input=xml").status_code, 400)
+
+
+class FoodPurgeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(name="user", contact="user@example.com", password="x")
+        cls.hotel = make_hotel(make_owner(), food_type="both")
+        paneer, biryani, chicken = (
+            Food.objects.create(hotel=cls.hotel, category=category, food_name=name, price=price)
+            for category, name, price in (("Veg", "Paneer", 180), ("Veg", "Biryani", 150), ("Non-Veg", "Chicken", 250))
+        )
+        cls.foods = {"paneer": paneer, "biryani": biryani, "chicken": chicken}
+        order = {"name": "user", "mobile": "1", "address": "a", "payment_method": "cash"}
+        place_orders(user, [
+            {**order, "items": [{"food_id": paneer.id, "qty": 2}, {"food_id": biryani.id, "qty": 1}]},
+            {**order, "items": [{"food_id": chicken.id, "qty": 3}]},
+            {**order, "items": [{"food_id": paneer.id, "qty": 1}]},
+        ])
+
+    def rollups(self):
+        return (
+            list(HotelDailySales.objects.order_by("day").values("day", "revenue", "orders", "items_sold")),
+            list(HotelMonthlySales.objects.order_by("month").values("month", "revenue", "orders", "items_sold")),
+        )
+
+    def assert_rollups_rebuilt(self):
+        purged = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(purged, self.rollups())
+
+    def test_purge_takes_order_lines_out_of_the_rollups(self):
+        totals = purge_foods(purge_queryset(categories=["veg"]), chunk_size=1)
+
+        self.assertEqual((totals["core.Food"], totals["core.OrderItem"]), (2, 3))
+        self.assertEqual(Order.objects.count(), 3)
+        analytics = hotel_analytics(self.hotel)
+        self.assertEqual((analytics["total_revenue"], analytics["total_orders"]), (250, 1))
+        self.assertEqual(analytics["best_sellers"], [{"name": "Chicken", "sold": 3}])
+        self.assert_rollups_rebuilt()
+
+    def test_order_keeps_counting_while_a_line_is_left(self):
+        purge_foods(purge_queryset(hotel_ids=[self.hotel.id]).filter(food_name="Paneer"))
+
+        analytics = hotel_analytics(self.hotel)
+        self.assertEqual((analytics["total_revenue"], analytics["total_orders"]), (400, 2))
+        self.assert_rollups_rebuilt()
+
+    def test_purging_every_sale_drops_the_rollup_rows(self):
+        purge_foods(purge_queryset())
+
+        self.assertEqual(self.rollups(), ([], []))
+
+    def test_deleting_a_food_updates_the_rollups(self):
+        self.foods["chicken"].delete()
+
+        self.assertEqual(hotel_analytics(self.hotel)["total_orders"], 2)
+        self.assert_rollups_rebuilt()
+
+
+class OrderDeleteRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel(make_owner())
+        paneer, dosa = (
+            Food.objects.create(hotel=cls.hotel, category="Veg", food_name=name, price=price)
+            for name, price in (("Paneer", 180), ("Dosa", 90))
+        )
+        cls.user, cls.other = (
+            User.objects.create(name=name, contact=f"{name}@example.com", password="x") for name in ("user", "other")
+        )
+        order = {"name": "user", "mobile": "1", "address": "a", "payment_method": "cash"}
+        cls.orders = place_orders(cls.user, [
+            {**order, "items": [{"food_id": paneer.id, "qty": 2}, {"food_id": dosa.id, "qty": 1}]},
+            {**order, "items": [{"food_id": dosa.id, "qty": 3}]},
+        ])
+        place_orders(cls.other, [{**order, "items": [{"food_id": paneer.id, "qty": 1}]}])
+
+    def rollups(self):
+        return (
+            list(HotelDailySales.objects.order_by("day").values("day", "revenue", "orders", "items_sold")),
+            list(HotelMonthlySales.objects.order_by("month").values("month", "revenue", "orders", "items_sold")),
+            list(HotelFoodSales.objects.order_by("food_id").values("food_id", "sold")),
+        )
+
+    def assert_rollups_rebuilt(self):
+        after_delete = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(after_delete, self.rollups())
+
+    def test_deleting_an_order_updates_the_rollups(self):
+        self.orders[1].delete()
+
+        analytics = hotel_analytics(self.hotel)
+        self.assertEqual((analytics["total_orders"], analytics["total_items_sold"]), (2, 4))
+        self.assertEqual(analytics["best_sellers"], [{"name": "Paneer", "sold": 3}, {"name": "Dosa", "sold": 1}])
+        self.assert_rollups_rebuilt()
+
+    def test_deleting_a_user_takes_their_orders_out(self):
+        self.user.delete()
+
+        analytics = hotel_analytics(self.hotel)
+        self.assertEqual((analytics["total_orders"], analytics["total_items_sold"]), (1, 1))
+        self.assertEqual(analytics["best_sellers"], [{"name": "Paneer", "sold": 1}])
+        self.assert_rollups_rebuilt()
+
+    def test_deleting_every_order_drops_the_rollup_rows(self):
+        Order.objects.all().delete()
+
+        self.assertEqual(self.rollups(), ([], [], []))
+
+
+class PlaceOrderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="user", contact="user@example.com", password="x")
+        hotel = make_hotel(make_owner())
+        cls.paneer = Food.objects.create(hotel=hotel, category="Veg", food_name="Paneer", price=180)
+        cls.biryani = Food.objects.create(hotel=hotel, category="Veg", food_name="Biryani", price=150)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user.id, 'user')}")
+
+    def order(self, *items, **fields):
+        return {
+            "name": "user", "mobile": "1", "address": "a", "payment_method": "COD",
+            "items": [{"food_id": food.id, "qty": qty} for food, qty in items],
+            **fields,
+        }
+
+    def place(self, payload, **headers):
+        return self.client.post("/api/orders/place/", payload, format="json", headers=headers)
+
+    def test_prices_come_from_the_menu(self):
+        response = self.place(self.order((self.paneer, 2), (self.biryani, 1), total="535.50"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 535.5)  # (2 x 180 + 150) + 5% GST
+        order = Order.objects.get(id=response.data["order_id"])
+        self.assertEqual(
+            sorted(order.items.values_list("food__food_name", "quantity", "price_at_time")),
+            [("Biryani", 1, 150), ("Paneer", 2, 180)],
+        )
+
+    def test_stale_price_or_total_is_rejected(self):
+        stale = self.order((self.paneer, 1))
+        stale["items"][0]["price"] = 170
+
+        response = self.place(stale)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["price"], 180)
+
+        response = self.place(self.order((self.paneer, 1), total=180))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["total"], "189.00")
+        self.assertFalse(Order.objects.exists())
+
+    def test_batch_is_all_or_nothing(self):
+        unknown = self.order((self.biryani, 1))
+        unknown["items"][0]["food_id"] = 999999
+        orders = [self.order((self.paneer, 1)), unknown]
+
+        response = self.place({"orders": orders})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"], [{"order": 1, "food_id": 999999, "message": "Food not found"}])
+        self.assertFalse(Order.objects.exists())
+
+    def test_failed_write_rolls_back(self):
+        with mock.patch("core.utils.order_writer.record_orders", side_effect=RuntimeError("rollups down")):
+            with self.assertRaises(RuntimeError):
+                place_orders(self.user, [self.order((self.paneer, 1)), self.order((self.biryani, 2))])
+
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertFalse(HotelDailySales.objects.exists())
+
+    def test_retry_with_idempotency_key_is_replayed(self):
+        payload = self.order((self.paneer, 1))
+
+        first = self.place(payload, **{"Idempotency-Key": "order-1"})
+        second = self.place(payload, **{"Idempotency-Key": "order-1"})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_idempotency_key_conflicts(self):
+        self.place(self.order((self.paneer, 1)), **{"Idempotency-Key": "order-1"})
+
+        response = self.place(self.order((self.paneer, 2)), **{"Idempotency-Key": "order-1"})
+        self.assertEqual(response.status_code, 422)
+
+        # a retry arriving while the first request is still running
+        payload = self.order((self.biryani, 1))
+        retries = []
+
+        def place_during_retry(user, orders):
+            retries.append(self.place(payload, **{"Idempotency-Key": "order-2"}))
+            return place_orders(user, orders)
+
+        with mock.patch("core.views.place_orders", side_effect=place_during_retry):
+            response = self.place(payload, **{"Idempotency-Key": "order-2"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(retries[0].status_code, 409)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_keys_are_scoped_to_the_caller(self):
+        other = User.objects.create(name="other", contact="other@example.com", password="x")
+
+        def create_payment(user):
+            client = APIClient()
+            if user:
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(user.id, 'user')}")
+            return client.post(
+                "/api/cashfree/create-order/", {"amount": "189.00"}, format="json", headers={"Idempotency-Key": "1"}
+            )
+
+        mine = create_payment(self.user)
+        theirs = create_payment(other)
+
+        self.assertEqual(theirs.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", theirs)
+        self.assertNotEqual(theirs.data["order_id"], mine.data["order_id"])
+        self.assertEqual(create_payment(self.user).data["order_id"], mine.data["order_id"])
+        self.assertEqual(create_payment(None).status_code, 403)
+
+    def test_rejected_request_can_be_fixed_and_retried(self):
+        stale = self.order((self.paneer, 1), total=1)
+        self.assertEqual(self.place(stale, **{"Idempotency-Key": "order-1"}).status_code, 400)
+
+        response = self.place(self.order((self.paneer, 1)), **{"Idempotency-Key": "order-1"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertFalse(IdempotencyKey.objects.filter(status=IdempotencyKey.STATUS_IN_FLIGHT).exists())
+
+
+class PlaceOrderRaceTests(TransactionTestCase):
+    """Real commits, so the foreign keys are checked as in production."""
+
+    def setUp(self):
+        self.user = User.objects.create(name="user", contact="user@example.com", password="x")
+        self.food = Food.objects.create(hotel=make_hotel(make_owner()), category="Veg", food_name="Paneer", price=180)
+
+    def test_food_deleted_between_pricing_and_insert(self):
+        validate = order_writer._validate
+
+        def validate_then_delete(index, data, foods):
+            result = validate(index, data, foods)
+            # another request deleting the food once it has been priced
+            Food.objects.filter(id=self.food.id).delete()
+            return result
+
+        order = {"name": "user", "mobile": "1", "address": "a", "payment_method": "COD",
+                 "items": [{"food_id": self.food.id, "qty": 1}]}
+        with mock.patch("core.utils.order_writer._validate", side_effect=validate_then_delete):
+            with self.assertRaises(IntegrityError):
+                place_orders(self.user, [order])
+
+        # the delete ran inside the checkout transaction and went with it
+        self.assertTrue(Food.objects.filter(id=self.food.id).exists())
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertFalse(HotelDailySales.objects.exists())
+
+
+class HotelCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_owner()
+        cls.hotels = [make_hotel(owner, hotel_name=f"Hotel {n}", approved=n == 0) for n in range(3)]
+        # created outside the views, so the counters start from a count
+        reconcile()
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        return self.client.get("/api/admin/dashboard-counts/").data
+
+    def post(self, path, hotel):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(path, {"hotel_id": hotel.id}, format="json")
+
+    def test_views_adjust_the_counts(self):
+        self.assertEqual(self.counts(), {"total": 3, "approved": 1, "pending": 2, "rejected": 0})
+
+        self.post("/api/admin/approve-hotel/", self.hotels[1])
+        self.post("/api/admin/reject-hotel/", self.hotels[2])
+        self.assertEqual(self.counts(), {"total": 3, "approved": 2, "pending": 0, "rejected": 1})
+
+        self.post("/api/admin/delete-hotel/", self.hotels[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.counts(), {"total": 2, "approved": 1, "pending": 0, "rejected": 1})
+
+    def test_status_follows_the_flags(self):
+        self.post("/api/admin/approve-hotel/", self.hotels[1])
+        self.post("/api/admin/reject-hotel/", self.hotels[2])
+        statuses = dict(Hotel.objects.values_list("id", "status"))
+        self.assertEqual([statuses[hotel.id] for hotel in self.hotels], ["approved", "approved", "rejected"])
+
+        hotel = Hotel.objects.get(id=self.hotels[2].id)
+        hotel.rejected = False
+        hotel.save(update_fields=["rejected"])
+        self.assertEqual(Hotel.objects.get(id=hotel.id).status, Hotel.STATUS_PENDING)
+
+        rejected = self.client.get("/api/admin/rejected-hotels/").data
+        self.assertEqual(rejected, [])
+
+    def test_stale_counts_are_reconciled(self):
+        self.counts()
+        # bypasses the views, so the counters don't see it
+        Hotel.objects.filter(id=self.hotels[1].id).update(status=Hotel.STATUS_REJECTED)
+        cache.clear()
+        self.assertEqual(self.counts()["rejected"], 0)
+
+        HotelStatusCounts.objects.update(reconciled_at=timezone.now() - RECONCILE_INTERVAL - timedelta(seconds=1))
+        cache.clear()
+        self.assertEqual(self.counts(), {"total": 3, "approved": 1, "pending": 1, "rejected": 1})
+
+
+class PrincipalCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_owner()
+        cls.hotel = make_hotel(cls.owner)
+
+    def setUp(self):
+        principal_cache.clear()
+        self.token = generate_token(self.owner.id, "owner")
+
+    def get_foods(self):
+        return self.client.get(f"/api/hotels/{self.hotel.id}/foods/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_owner_change_drops_the_cached_principal(self):
+        self.get_foods()
+        self.assertEqual(principal_cache.get(self.token)[0].username, "owner")
+
+        self.owner.username = "renamed"
+        self.owner.save()
+        self.assertIsNone(principal_cache.get(self.token))
+
+        self.get_foods()
+        self.assertEqual(principal_cache.get(self.token)[0].username, "renamed")
+
+    def test_deleted_owner_is_not_served_from_the_cache(self):
+        self.assertEqual(self.get_foods().status_code, 200)
+
+        self.owner.delete()
+
+        response = self.get_foods()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {"detail": "Owner not found"})
+
+    def test_per_process_entries_expire_after_the_local_ttl(self):
+        # Another worker's invalidation never reaches this process's LRU.
+        with mock.patch("core.auth_cache.time.time", return_value=1_000_000):
+            self.get_foods()
+        with mock.patch("core.auth_cache.time.time", return_value=1_000_004):
+            self.assertIsNotNone(principal_cache.get(self.token))
+        with mock.patch("core.auth_cache.time.time", return_value=1_000_006):
+            self.assertIsNone(principal_cache.get(self.token))
+
+    @override_settings(AUTH_PRINCIPAL_CACHE={"ALIAS": "default"})
+    def test_shared_cache_invalidates_by_generation(self):
+        cache.clear()
+        self.get_foods()
+        self.assertIsNotNone(principal_cache.get(self.token))
+
+        principal_cache.invalidate("owner", self.owner.id)
+
+        self.assertIsNone(principal_cache.get(self.token))
+
+
+def pdf_streams(pdf):
+    """The decoded content of every stream in a reportlab PDF, as one string."""
+    streams = re.findall(rb"stream\r?\n(.*?)~>\r?\n?endstream", pdf, re.S)
+    return "".join(zlib.decompress(base64.a85decode(stream)).decode("latin-1") for stream in streams)
+
+
+class ReceiptPdfTests(TestCase):
+    def receipt(self, order_id, *items):
+        return {
+            "order_id": order_id,
+            "name": "Customer",
+            "email": "customer@example.com",
+            "mobile": "9999999999",
+            "address": "12 FC Road, Pune",
+            "payment_method": "Online Payment",
+            "total": "525.00",
+            "items": [
+                {"name": name, "qty": qty, "price": price, "hotel_name": "Spice Hub"} for name, qty, price in items
+            ],
+        }
+
+    def test_receipt_is_a_pdf_with_the_order_lines(self):
+        pdf = generate_receipt_pdf(self.receipt("BR-7", ("Paneer Tikka", 2, 180), ("Veg Biryani", 1, 150)))
+
+        self.assertTrue(pdf.startswith(b"%PDF-"))
+        self.assertTrue(pdf.rstrip().endswith(b"%%EOF"))
+        content = pdf_streams(pdf)
+        for text in ("Order ID: BR-7", "(Paneer Tikka)", "(Veg Biryani)", "360", "Order Receipt"):
+            self.assertIn(text, content)
+
+    def test_batch_defines_the_static_forms_once(self):
+        orders = [self.receipt(f"BR-{n}", ("Dosa", 1, 90)) for n in range(3)]
+
+        pdf = generate_receipt_pdfs(orders)
+
+        self.assertEqual(pdf.count(b"/Type /Page\n"), 3)
+        self.assertEqual(pdf.count(b"/Subtype /Form"), 2)
+        content = pdf_streams(pdf)
+        self.assertEqual([content.count(f"Order ID: BR-{n}") for n in range(3)], [1, 1, 1])
+
+
+@override_settings(RECEIPT_QUEUE={"IN_PROCESS_WORKERS": 0, "MAX_ATTEMPTS": 3})
+class ReceiptQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(name="Asha", contact="asha@example.com", password="x")
+
+    def order(self):
+        return {
+            "name": "Asha",
+            "mobile": "9999999999",
+            "address": "12 FC Road, Pune",
+            "payment_method": "Cash on Delivery",
+            "total": 360,
+            "items": [{"name": "Paneer Tikka", "qty": 2, "price": 180, "hotel_name": "Spice Hub"}],
+        }
+
+    def test_placed_order_is_queued_then_mailed_by_a_worker(self):
+        response = self.client.post("/api/send-receipt/", {"user_id": self.user.id, **self.order()},
+                                    content_type="application/json")
+
+        self.assertEqual(response.status_code, 202)
+        job = ReceiptJob.objects.get(id=response.json()["job_id"])
+        self.assertEqual((job.status, job.email), (ReceiptJob.STATUS_PENDING, "asha@example.com"))
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(run_pending(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ReceiptJob.STATUS_SENT, 1))
+        self.assertEqual(mail.outbox[0].to, ["asha@example.com"])
+        filename, pdf, mimetype = mail.outbox[0].attachments[0]
+        self.assertEqual(mimetype, "application/pdf")
+        self.assertTrue(pdf.startswith(b"%PDF-"))
+
+    def test_only_one_of_two_workers_claims_a_job(self):
+        jobs = [enqueue_receipt(self.user, self.order()) for _ in range(3)]
+        # both workers read the same due rows before either claims them
+        snapshot = receipt_queue._due_jobs(timezone.now(), 10)
+
+        with mock.patch("core.utils.receipt_queue._due_jobs", return_value=snapshot):
+            first = claim_jobs(10)
+            second = claim_jobs(10)
+
+        self.assertEqual([job.id for job in first], [job.id for job in jobs])
+        self.assertEqual(second, [])
+        self.assertEqual(ReceiptJob.objects.filter(status=ReceiptJob.STATUS_RUNNING).count(), 3)
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual([retry_delay(n) for n in (1, 2, 3, 4)], [30, 60, 120, 240])
+        self.assertEqual(retry_delay(8), 3600)
+        self.assertEqual(retry_delay(20), 3600)
+
+    def test_failed_sends_back_off_then_give_up(self):
+        job = enqueue_receipt(self.user, self.order())
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages",
+                        side_effect=ConnectionError("smtp down")):
+            for attempt in (1, 2):
+                before = timezone.now()
+                self.assertEqual(run_pending(), 0)
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.attempts), (ReceiptJob.STATUS_PENDING, attempt))
+                self.assertGreaterEqual(job.next_attempt_at, before + timedelta(seconds=retry_delay(attempt)))
+                self.assertEqual(claim_jobs(10), [])
+
+                ReceiptJob.objects.filter(id=job.id).update(next_attempt_at=timezone.now())
+
+            run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (ReceiptJob.STATUS_FAILED, 3, "smtp down"))
+        self.assertEqual(claim_jobs(10), [])
+        self.assertEqual(mail.outbox, [])
+
+
+class RecordingSmtpHandler:
+    """aiosmtpd handler that keeps each message with the session it came in on."""
+
+    def __init__(self):
+        self.messages = []
+        self.drops = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.drops:
+            self.drops -= 1
+            return "421 Service closing transmission channel"
+        self.messages.append((id(session), envelope.rcpt_tos))
+        return "250 OK"
+
+    def sessions(self):
+        return len({session for session, _ in self.messages})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@unittest.skipIf(Controller is None, "aiosmtpd is not installed")
+class MailOutboxTests(TestCase):
+    def setUp(self):
+        self.handler = RecordingSmtpHandler()
+        self.smtp = Controller(self.handler, hostname="127.0.0.1", port=free_port())
+        self.smtp.start()
+        self.addCleanup(self.smtp.stop)
+
+        settings = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.smtp.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_TIMEOUT=5,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.outbox = Outbox()
+        self.addCleanup(self.outbox.close)
+        self.before = outbox_metrics.snapshot()
+
+    def send(self, *recipients):
+        for to in recipients:
+            self.outbox.enqueue(EmailMessage("Receipt", "Thanks!", "orders@biteroute.in", [to]))
+        return [error for _, error in self.outbox.flush()]
+
+    def counters(self):
+        after = outbox_metrics.snapshot()
+        fields = ("queue_depth", "sent", "failed", "connections_opened", "reconnects")
+        return {field: after[field] - self.before[field] for field in fields}
+
+    def test_sends_reuse_one_connection(self):
+        self.assertEqual(self.send("a@example.com", "b@example.com"), [None, None])
+        self.assertEqual(self.send("c@example.com"), [None])
+
+        self.assertEqual([rcpt for _, rcpt in self.handler.messages],
+                         [["a@example.com"], ["b@example.com"], ["c@example.com"]])
+        self.assertEqual(self.handler.sessions(), 1)
+        self.assertEqual(self.counters(),
+                         {"queue_depth": 0, "sent": 3, "failed": 0, "connections_opened": 1, "reconnects": 0})
+
+    def test_dropped_connection_is_reopened_once(self):
+        self.send("a@example.com")
+        self.handler.drops = 1
+
+        self.assertEqual(self.send("b@example.com"), [None])
+
+        self.assertEqual([rcpt for _, rcpt in self.handler.messages], [["a@example.com"], ["b@example.com"]])
+        self.assertEqual(self.handler.sessions(), 2)
+        self.assertEqual(self.counters(),
+                         {"queue_depth": 0, "sent": 2, "failed": 0, "connections_opened": 2, "reconnects": 1})
+
+    def test_message_fails_when_the_retry_fails_too(self):
+        self.send("a@example.com")
+        self.handler.drops = 2
+
+        errors = self.send("b@example.com")
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsNotNone(errors[0])
+        self.assertEqual(self.counters(),
+                         {"queue_depth": 0, "sent": 1, "failed": 1, "connections_opened": 2, "reconnects": 1})
+        self.assertIsNotNone(outbox_metrics.snapshot()["send_latency_ms"]["max"])
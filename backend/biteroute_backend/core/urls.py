@@ -8,6 +8,7 @@ urlpatterns = [
     path("users/register/", views.register),
     path("users/login/", views.login),
     path("user/search-food/", views.user_search_food),
+    path("user/nearest-hotels/", views.user_nearest_hotels),
     path("common/login/", views.common_login),
 
 
@@ -23,12 +24,15 @@ urlpatterns = [
     path("hotels/check-status/", views.check_hotel_status),
     path("hotel/my-hotels/", views.my_hotels),
     path("hotels/<int:hotel_id>/foods/", views.get_hotel_food_items),
+    path("hotels/<int:hotel_id>/location/", views.set_hotel_location),
     path("orders/place/", views.place_order),
     path("hotels/<int:hotel_id>/analytics/", views.get_hotel_analytics),
+    path("hotels/<int:hotel_id>/routes/", views.hotel_routes),
 
     # FOOD
     path("foods/add/", views.add_food),
     path("foods/<int:food_id>/delete/", views.delete_food),
+    path("hotels/<int:hotel_id>/foods/import/", views.import_menu),
 
     # ADMIN
     path("admin/login/", views.admin_login),
@@ -40,14 +44,17 @@ urlpatterns = [
     path("admin/approve-hotel/", views.approve_hotel),
     path("admin/reject-hotel/", views.reject_hotel),
     path("admin/delete-hotel/", views.delete_hotel),
+    path("admin/email-outbox/", views.email_outbox_metrics),
 
     # CART
     path("cart/add/", views.add_to_cart),
     path("cart/<int:user_id>/", views.get_cart),
     path("cart/update/", views.update_cart_item),
     path("cart/remove/", views.remove_cart_item),
+    path("cart/batch/", views.batch_update_cart),
 
     path("send-receipt/", send_receipt_to_email),
+    path("send-receipt/<int:job_id>/", views.receipt_status),
     path(
     "cashfree/create-order/",
     cashfree_create_order,
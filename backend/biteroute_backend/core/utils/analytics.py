@@ -0,0 +1,227 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from ..models import HotelDailySales, HotelFoodSales, HotelMonthlySales, OrderItem
+
+BEST_SELLERS = 5
+
+
+def _upsert(model, lookup, **increments):
+    """Adds ``increments`` to the row matching ``lookup``, creating it first if needed."""
+    updates = {field: F(field) + value for field, value in increments.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **increments)
+    except IntegrityError:
+        # created concurrently by another order
+        model.objects.filter(**lookup).update(**updates)
+
+
+def record_orders(orders, lines_by_order):
+    """
+    Folds newly placed orders into the rollups. Must run inside the
+    transaction that wrote them, so the rollups never count an order that
+    was rolled back.
+
+    ``lines_by_order`` holds, per order, the (food, qty) pairs written as
+    OrderItems with price_at_time=food.price.
+    """
+    daily = {}
+    food_sold = {}
+    for order, lines in zip(orders, lines_by_order):
+        day = timezone.localtime(order.created_at).date()
+        hotels_in_order = set()
+        for food, qty in lines:
+            totals = daily.setdefault((food.hotel_id, day), {"revenue": 0, "orders": 0, "items_sold": 0})
+            totals["revenue"] += food.price
+            totals["items_sold"] += qty
+            if food.hotel_id not in hotels_in_order:
+                hotels_in_order.add(food.hotel_id)
+                totals["orders"] += 1
+            food_sold[(food.hotel_id, food.id)] = food_sold.get((food.hotel_id, food.id), 0) + qty
+
+    monthly = {}
+    for (hotel_id, day), totals in daily.items():
+        _upsert(HotelDailySales, {"hotel_id": hotel_id, "day": day}, **totals)
+        month_totals = monthly.setdefault((hotel_id, day.replace(day=1)), {"revenue": 0, "orders": 0, "items_sold": 0})
+        for field, value in totals.items():
+            month_totals[field] += value
+
+    for (hotel_id, month), totals in monthly.items():
+        _upsert(HotelMonthlySales, {"hotel_id": hotel_id, "month": month}, **totals)
+
+    for (hotel_id, food_id), sold in food_sold.items():
+        _upsert(HotelFoodSales, {"hotel_id": hotel_id, "food_id": food_id}, sold=sold)
+
+
+def forget_order_items(items):
+    """
+    Takes the OrderItems in ``items`` out of the daily and monthly rollups
+    before they are deleted, so the rollups keep matching rebuild_rollups().
+    An order stops counting for a hotel once none of its lines from that
+    hotel are left. Must run inside the transaction that deletes them.
+    """
+    remaining = OrderItem.objects.filter(
+        order_id=OuterRef("order_id"), food__hotel_id=OuterRef("food__hotel_id")
+    ).exclude(pk__in=items.values("pk"))
+    rows = (
+        items
+        .annotate(day=TruncDate("order__created_at"))
+        .values("food__hotel_id", "day")
+        .annotate(
+            revenue=Sum("price_at_time"),
+            orders=Count("order", distinct=True, filter=~Exists(remaining)),
+            items_sold=Sum("quantity"),
+        )
+        .order_by()
+    )
+
+    monthly = {}
+    for row in rows:
+        totals = {field: row[field] for field in ("revenue", "orders", "items_sold")}
+        HotelDailySales.objects.filter(hotel_id=row["food__hotel_id"], day=row["day"]).update(
+            **{field: F(field) - value for field, value in totals.items()}
+        )
+        month_totals = monthly.setdefault(
+            (row["food__hotel_id"], row["day"].replace(day=1)), {"revenue": 0, "orders": 0, "items_sold": 0}
+        )
+        for field, value in totals.items():
+            month_totals[field] += value
+
+    for (hotel_id, month), totals in monthly.items():
+        HotelMonthlySales.objects.filter(hotel_id=hotel_id, month=month).update(
+            **{field: F(field) - value for field, value in totals.items()}
+        )
+
+    # periods left without orders have no rows in a rebuild either
+    hotel_ids = {hotel_id for hotel_id, _ in monthly}
+    if hotel_ids:
+        HotelDailySales.objects.filter(hotel_id__in=hotel_ids, orders__lte=0).delete()
+        HotelMonthlySales.objects.filter(hotel_id__in=hotel_ids, orders__lte=0).delete()
+
+
+def forget_orders(order_ids):
+    """
+    Takes the orders in ``order_ids`` out of every rollup before they (and
+    their OrderItems, which cascade) are deleted. Must run inside the
+    transaction that deletes them.
+    """
+    items = OrderItem.objects.filter(order_id__in=order_ids)
+    sold = items.values("food__hotel_id", "food_id").annotate(sold=Sum("quantity")).order_by()
+
+    hotel_ids = set()
+    for row in sold:
+        hotel_ids.add(row["food__hotel_id"])
+        HotelFoodSales.objects.filter(hotel_id=row["food__hotel_id"], food_id=row["food_id"]).update(
+            sold=F("sold") - row["sold"]
+        )
+    if hotel_ids:
+        HotelFoodSales.objects.filter(hotel_id__in=hotel_ids, sold__lte=0).delete()
+
+    forget_order_items(items)
+
+
+def rebuild_rollups(hotel_ids=None):
+    """Recomputes the rollups from OrderItem (all hotels, or ``hotel_ids``)."""
+    items = OrderItem.objects.all()
+    if hotel_ids is not None:
+        items = items.filter(food__hotel_id__in=hotel_ids)
+
+    def grouped(period, trunc):
+        return (
+            items
+            .annotate(**{period: trunc("order__created_at")})
+            .values("food__hotel_id", period)
+            .annotate(
+                revenue=Sum("price_at_time"),
+                orders=Count("order", distinct=True),
+                items_sold=Sum("quantity"),
+            )
+            .order_by()
+        )
+
+    with transaction.atomic():
+        for model in (HotelDailySales, HotelMonthlySales, HotelFoodSales):
+            existing = model.objects.all()
+            if hotel_ids is not None:
+                existing = existing.filter(hotel_id__in=hotel_ids)
+            existing.delete()
+
+        HotelDailySales.objects.bulk_create(
+            (
+                HotelDailySales(
+                    hotel_id=row["food__hotel_id"], day=row["day"],
+                    revenue=row["revenue"], orders=row["orders"], items_sold=row["items_sold"],
+                )
+                for row in grouped("day", TruncDate).iterator()
+            ),
+            batch_size=1000,
+        )
+        HotelMonthlySales.objects.bulk_create(
+            (
+                HotelMonthlySales(
+                    hotel_id=row["food__hotel_id"], month=_as_date(row["month"]),
+                    revenue=row["revenue"], orders=row["orders"], items_sold=row["items_sold"],
+                )
+                for row in grouped("month", TruncMonth).iterator()
+            ),
+            batch_size=1000,
+        )
+        HotelFoodSales.objects.bulk_create(
+            (
+                HotelFoodSales(hotel_id=row["food__hotel_id"], food_id=row["food_id"], sold=row["sold"])
+                for row in (
+                    items.values("food__hotel_id", "food_id")
+                    .annotate(sold=Sum("quantity"))
+                    .order_by()
+                    .iterator()
+                )
+            ),
+            batch_size=1000,
+        )
+
+
+def _as_date(value):
+    # TruncMonth over a DateTimeField gives an aware datetime
+    return timezone.localtime(value).date() if hasattr(value, "hour") else value
+
+
+def hotel_analytics(hotel):
+    """Dashboard figures for one hotel, read from the rollups: O(months)."""
+    months = list(
+        HotelMonthlySales.objects
+        .filter(hotel=hotel)
+        .order_by("month")
+        .values("month", "revenue", "orders", "items_sold")
+    )
+
+    best_sellers = (
+        HotelFoodSales.objects
+        .filter(hotel=hotel)
+        .values("food__food_name")
+        .annotate(sold_count=Sum("sold"))
+        .order_by("-sold_count")[:BEST_SELLERS]
+    )
+
+    return {
+        "hotel_name": hotel.hotel_name,
+        "total_revenue": sum(m["revenue"] for m in months),
+        "total_orders": sum(m["orders"] for m in months),
+        "total_items_sold": sum(m["items_sold"] for m in months),
+        "chart_data": [
+            {
+                "month": m["month"].strftime("%b %Y"),
+                "revenue": m["revenue"],
+                "orders": m["orders"],
+            }
+            for m in months
+        ],
+        "best_sellers": [
+            {"name": item["food__food_name"], "sold": item["sold_count"]}
+            for item in best_sellers
+        ],
+    }
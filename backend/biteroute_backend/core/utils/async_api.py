@@ -0,0 +1,78 @@
+import functools
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+
+from ..authentication import JWTAuthentication
+
+# DRF 3.16 can't run ``async def`` views, so the hot read endpoints are plain
+# Django async views. The helpers below keep their requests and responses
+# the same as under @api_view.
+
+
+class JSONResponse(JsonResponse):
+    """Renders ``data`` like DRF's Response: same encoder, compact, non-ASCII kept."""
+
+    def __init__(self, data, status=200, **kwargs):
+        super().__init__(
+            data,
+            status=status,
+            encoder=JSONEncoder,
+            safe=False,
+            json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+            **kwargs,
+        )
+        # like Response.data
+        self.data = data
+
+
+def async_api_view(methods):
+    """
+    @api_view for async views: other methods get DRF's 405 body, and the
+    view is CSRF exempt like every @api_view.
+    """
+    allowed = [*methods, "OPTIONS"]
+    allow_header = ", ".join(allowed)
+
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in allowed:
+                response = JSONResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+            elif request.method == "OPTIONS":
+                response = JSONResponse({})
+            else:
+                response = await view(request, *args, **kwargs)
+            response["Allow"] = allow_header
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def jwt_required(view):
+    """
+    @authentication_classes([JWTAuthentication]) with
+    @permission_classes([IsAuthenticated]) for async views: sets
+    request.user and request.auth, or answers 403 as DRF does.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            resolved = await JWTAuthentication().aauthenticate(request)
+        except AuthenticationFailed as e:
+            return JSONResponse({"detail": str(e.detail)}, status=403)
+
+        if resolved is None:
+            return JSONResponse({"detail": "Authentication credentials were not provided."}, status=403)
+        if not getattr(resolved[0], "is_authenticated", False):
+            return JSONResponse({"detail": "You do not have permission to perform this action."}, status=403)
+
+        request.user, request.auth = resolved
+        return await view(request, *args, **kwargs)
+
+    return wrapper
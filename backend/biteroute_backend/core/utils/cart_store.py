@@ -0,0 +1,279 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+
+from ..models import Cart, CartItem, Food
+from .cart_writer import add_item, remove_item, set_item, write_changes
+
+DEFAULTS = {
+    # "db" writes every change straight to CartItem; "cache" buffers carts in
+    # the Django cache ALIAS and writes them back every FLUSH_INTERVAL.
+    "BACKEND": "db",
+    # Must name a cache every worker shares. The default locmem cache is
+    # per process, so each worker would buffer (and flush) its own copy of
+    # a cart; with no ALIAS, "cache" falls back to "db".
+    "ALIAS": None,
+    "FLUSH_INTERVAL": 30,  # seconds
+    # Flush from a thread inside the web process. Turn off when
+    # `python manage.py flush_carts` runs on a timer instead.
+    "IN_PROCESS_FLUSHER": True,
+    "LOCK_TIMEOUT": 5,
+}
+
+# Flushed carts stay cached this long so the next change skips the reload.
+CLEAN_STATE_TTL = 3600
+
+
+def store_config():
+    return {**DEFAULTS, **getattr(settings, "CART_STORE", {})}
+
+
+class DatabaseCartStore:
+    """Write-through: every change is a CartItem UPDATE / INSERT / DELETE."""
+
+    def add(self, cart_id, food_id, quantity=1):
+        add_item(cart_id, food_id, quantity)
+
+    def set(self, cart_id, food_id, quantity):
+        set_item(cart_id, food_id, quantity)
+
+    def remove(self, cart_id, food_id):
+        remove_item(cart_id, food_id)
+
+    def apply(self, cart_id, changes):
+        write_changes(cart_id, changes)
+
+    def update_item(self, item_id, quantity):
+        if quantity < 1:
+            return self.remove_item(item_id)
+        return bool(CartItem.objects.filter(id=item_id).update(quantity=quantity))
+
+    def remove_item(self, item_id):
+        return bool(CartItem.objects.filter(id=item_id).delete()[0])
+
+    def flush(self, cart_id):
+        return False
+
+    def flush_user(self, user_id):
+        return 0
+
+    def flush_all(self):
+        return 0
+
+    def dirty_carts(self):
+        return set()
+
+
+class CacheCartStore:
+    """
+    Write-behind: a cart's contents ({food_id: quantity}) live in the cache
+    and changes only touch the cache. Dirty carts are written back by the
+    flusher, on checkout and before a cart is read.
+
+    The cached state holds absolute quantities, not deltas, and is marked
+    clean only after the write-back commits. A flush that dies halfway is
+    retried and writes the same rows again. Changes that were not flushed
+    are lost if the cache itself is lost, so point ALIAS at a shared,
+    persistent cache (e.g. Redis) with room for every active cart.
+    """
+
+    DIRTY_KEY = "cart_store:dirty"
+
+    def __init__(self, config):
+        self.config = config
+        self.cache = caches[config["ALIAS"]]
+
+    @staticmethod
+    def _state_key(cart_id):
+        return f"cart_store:cart:{cart_id}"
+
+    @contextmanager
+    def _lock(self, key):
+        """Cross-process mutex from cache.add(); expires if its holder dies."""
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        timeout = self.config["LOCK_TIMEOUT"]
+        while not self.cache.add(lock_key, token, timeout):
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def _load(self, cart_id):
+        state = self.cache.get(self._state_key(cart_id))
+        if state is None:
+            items = CartItem.objects.filter(cart_id=cart_id).values_list("food_id", "quantity")
+            state = {"items": dict(items), "version": 0, "flushed": 0}
+        return state
+
+    def _set_dirty(self, cart_id, dirty):
+        with self._lock(self.DIRTY_KEY):
+            carts = self.cache.get(self.DIRTY_KEY) or set()
+            if dirty:
+                carts.add(cart_id)
+            else:
+                carts.discard(cart_id)
+            self.cache.set(self.DIRTY_KEY, carts, None)
+
+    def _mutate(self, cart_id, change):
+        with self._lock(self._state_key(cart_id)):
+            state = self._load(cart_id)
+            change(state["items"])
+            state["version"] += 1
+            # no expiry while dirty: dropping it would lose the changes
+            self.cache.set(self._state_key(cart_id), state, None)
+            if state["version"] == state["flushed"] + 1:
+                self._set_dirty(cart_id, True)
+
+        if self.config["IN_PROCESS_FLUSHER"]:
+            flusher.start()
+
+    # ---------- changes ----------
+
+    def add(self, cart_id, food_id, quantity=1):
+        food_id = int(food_id)
+
+        def change(items):
+            items[food_id] = items.get(food_id, 0) + quantity
+        self._mutate(cart_id, change)
+
+    def set(self, cart_id, food_id, quantity):
+        food_id = int(food_id)
+
+        def change(items):
+            if quantity < 1:
+                items.pop(food_id, None)
+            else:
+                items[food_id] = quantity
+        self._mutate(cart_id, change)
+
+    def remove(self, cart_id, food_id):
+        self._mutate(cart_id, lambda items: items.pop(int(food_id), None))
+
+    def apply(self, cart_id, changes):
+        def change(items):
+            for food_id, (kind, quantity) in changes.items():
+                if kind == "add":
+                    items[food_id] = items.get(food_id, 0) + quantity
+                elif kind == "set":
+                    items[food_id] = quantity
+                else:
+                    items.pop(food_id, None)
+        self._mutate(cart_id, change)
+
+    def _item(self, item_id):
+        return CartItem.objects.filter(id=item_id).values("cart_id", "food_id").first()
+
+    def update_item(self, item_id, quantity):
+        item = self._item(item_id)
+        if item is None:
+            return False
+        self.set(item["cart_id"], item["food_id"], quantity)
+        return True
+
+    def remove_item(self, item_id):
+        item = self._item(item_id)
+        if item is None:
+            return False
+        self.remove(item["cart_id"], item["food_id"])
+        return True
+
+    # ---------- write-back ----------
+
+    def flush(self, cart_id):
+        """Writes one cart back to CartItem if it has unflushed changes."""
+        key = self._state_key(cart_id)
+        with self._lock(key):
+            state = self.cache.get(key)
+            if state is None or state["version"] == state["flushed"]:
+                if cart_id in self.dirty_carts():
+                    self._set_dirty(cart_id, False)
+                return False
+
+            with transaction.atomic():
+                if not Cart.objects.filter(id=cart_id).exists():
+                    self.cache.delete(key)
+                    self._set_dirty(cart_id, False)
+                    return False
+
+                # foods deleted since they were added just drop out
+                items = state["items"]
+                live = set(Food.objects.filter(id__in=list(items)).values_list("id", flat=True))
+                items = {food_id: qty for food_id, qty in items.items() if food_id in live}
+
+                CartItem.objects.filter(cart_id=cart_id).exclude(food_id__in=list(items)).delete()
+                CartItem.objects.bulk_create(
+                    [CartItem(cart_id=cart_id, food_id=food_id, quantity=qty) for food_id, qty in items.items()],
+                    update_conflicts=True,
+                    unique_fields=["cart", "food"],
+                    update_fields=["quantity"],
+                )
+
+            state["items"] = items
+            state["flushed"] = state["version"]
+            self.cache.set(key, state, CLEAN_STATE_TTL)
+            self._set_dirty(cart_id, False)
+        return True
+
+    def flush_user(self, user_id):
+        dirty = self.dirty_carts()
+        if not dirty:
+            return 0
+        cart_ids = Cart.objects.filter(user_id=user_id, id__in=dirty).values_list("id", flat=True)
+        return sum(self.flush(cart_id) for cart_id in cart_ids)
+
+    def flush_all(self):
+        flushed = 0
+        for cart_id in self.dirty_carts():
+            try:
+                flushed += self.flush(cart_id)
+            except Exception as e:
+                print("❌ CART FLUSH FAILED:", cart_id, str(e))
+        return flushed
+
+    def dirty_carts(self):
+        return set(self.cache.get(self.DIRTY_KEY) or ())
+
+
+def cart_store():
+    config = store_config()
+    if config["BACKEND"] == "cache" and config["ALIAS"]:
+        return CacheCartStore(config)
+    return DatabaseCartStore()
+
+
+# ================= FLUSHER =================
+
+class CartFlusher:
+    """Daemon thread that writes dirty carts back every FLUSH_INTERVAL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="cart-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(store_config()["FLUSH_INTERVAL"])
+            close_old_connections()
+            try:
+                cart_store().flush_all()
+            except Exception as e:
+                print("❌ CART FLUSHER ERROR:", str(e))
+            finally:
+                close_old_connections()
+
+
+flusher = CartFlusher()
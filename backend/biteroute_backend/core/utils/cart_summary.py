@@ -0,0 +1,66 @@
+from ..models import CartItem
+from .order_writer import order_total
+
+
+def cart_items(cart):
+    """The cart's items with their food and hotel joined in: one query."""
+    return CartItem.objects.filter(cart=cart).select_related("food__hotel").order_by("id")
+
+
+def cart_summary(cart, items=None):
+    """
+    Serializes a cart in a single pass over its items. Besides the fields
+    CartItemSerializer returns, every line carries its subtotal, the cart is
+    grouped per hotel with a subtotal each, and the grand total includes GST
+    the same way place_order prices it. Async views pass the ``items`` they
+    fetched from cart_items() themselves.
+    """
+    if items is None:
+        items = cart_items(cart)
+    lines = []
+    hotels = {}
+    subtotal = 0
+
+    for item in items:
+        food = item.food
+        hotel = food.hotel
+        line_total = food.price * item.quantity
+
+        lines.append({
+            "id": item.id,
+            "food": food.id,
+            "food_name": food.food_name,
+            "price": food.price,
+            "hotel_name": hotel.hotel_name,
+            "location": hotel.location,
+            "quantity": item.quantity,
+            "subtotal": line_total,
+        })
+
+        group = hotels.get(hotel.id)
+        if group is None:
+            group = hotels[hotel.id] = {
+                "hotel_id": hotel.id,
+                "hotel_name": hotel.hotel_name,
+                "location": hotel.location,
+                "items": 0,
+                "subtotal": 0,
+            }
+        group["items"] += item.quantity
+        group["subtotal"] += line_total
+        subtotal += line_total
+
+    total = order_total(subtotal)
+    return {
+        "id": cart.id,
+        "user": cart.user_id,
+        "items": lines,
+        "hotels": list(hotels.values()),
+        "subtotal": subtotal,
+        "gst": float(total - subtotal),
+        "total": float(total),
+    }
+
+
+def empty_cart_summary():
+    return {"items": [], "hotels": [], "subtotal": 0, "gst": 0.0, "total": 0.0}
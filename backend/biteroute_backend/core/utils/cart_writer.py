@@ -0,0 +1,144 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from ..models import CartItem, Food
+
+CART_OPS = ("add", "set", "remove")
+MAX_CART_OPS = 100
+
+
+class CartOperationError(Exception):
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.errors = errors or []
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _upsert(cart_id, food_id, quantity, increment):
+    """
+    One UPDATE on the (cart, food) row (increment with F(), or overwrite);
+    the row is only created when the update found nothing. The unique
+    constraint turns a concurrent create into an IntegrityError, after which
+    the update is applied to the row the other request made. Any other
+    IntegrityError (e.g. a food that doesn't exist) is raised.
+    """
+    value = F("quantity") + quantity if increment else quantity
+    if CartItem.objects.filter(cart_id=cart_id, food_id=food_id).update(quantity=value):
+        return
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(cart_id=cart_id, food_id=food_id, quantity=quantity)
+    except IntegrityError:
+        if not CartItem.objects.filter(cart_id=cart_id, food_id=food_id).update(quantity=value):
+            raise
+
+
+def add_item(cart_id, food_id, quantity=1):
+    _upsert(cart_id, food_id, quantity, increment=True)
+
+
+def set_item(cart_id, food_id, quantity):
+    if quantity < 1:
+        remove_item(cart_id, food_id)
+    else:
+        _upsert(cart_id, food_id, quantity, increment=False)
+
+
+def remove_item(cart_id, food_id):
+    return CartItem.objects.filter(cart_id=cart_id, food_id=food_id).delete()[0]
+
+
+def _validate(index, op):
+    if not isinstance(op, dict):
+        return {"operation": index, "message": "Operation must be an object"}, None
+
+    kind = op.get("op")
+    food_id = _as_int(op.get("food_id"))
+    if kind not in CART_OPS:
+        return {"operation": index, "message": f"op must be one of: {', '.join(CART_OPS)}"}, None
+    if food_id is None:
+        return {"operation": index, "message": "food_id is required"}, None
+    if kind == "remove":
+        return None, (kind, food_id, None)
+
+    quantity = _as_int(op.get("quantity", 1 if kind == "add" else None))
+    if quantity is None or (kind == "add" and quantity < 1) or quantity < 0:
+        return {"operation": index, "food_id": food_id, "message": "Quantity must be a positive number"}, None
+    return None, (kind, food_id, quantity)
+
+
+def _collapse(ops):
+    """
+    Folds the operations into one final change per food, in order: five
+    "add" taps on a dish become a single +5, and "add" after "set" or
+    "remove" becomes a "set".
+    """
+    changes = {}
+    for kind, food_id, quantity in ops:
+        current = changes.get(food_id)
+        if kind == "add" and current is not None:
+            current_kind, current_quantity = current
+            if current_kind == "add":
+                changes[food_id] = ("add", current_quantity + quantity)
+            elif current_kind == "set":
+                changes[food_id] = ("set", current_quantity + quantity)
+            else:
+                changes[food_id] = ("set", quantity)
+        elif kind == "set" and quantity == 0:
+            changes[food_id] = ("remove", None)
+        else:
+            changes[food_id] = (kind, quantity)
+    return changes
+
+
+def parse_cart_ops(ops):
+    """
+    Validates a list of {"op": "add" | "set" | "remove", "food_id",
+    "quantity"} and folds it into {food_id: (op, quantity)}. Raises
+    CartOperationError listing every invalid operation.
+    """
+    if not isinstance(ops, list) or not ops:
+        raise CartOperationError("No cart operations")
+    if len(ops) > MAX_CART_OPS:
+        raise CartOperationError(f"At most {MAX_CART_OPS} operations per request")
+
+    errors = []
+    parsed = []
+    for index, op in enumerate(ops):
+        error, result = _validate(index, op)
+        if error:
+            errors.append(error)
+        else:
+            parsed.append(result)
+
+    changes = _collapse(parsed)
+    needed = {food_id for food_id, (kind, _) in changes.items() if kind != "remove"}
+    known = set(Food.objects.filter(id__in=needed).values_list("id", flat=True))
+    errors.extend(
+        {"food_id": food_id, "message": "Food not found"}
+        for food_id in sorted(needed - known)
+    )
+    if errors:
+        raise CartOperationError("Cart update failed", errors)
+
+    return changes
+
+
+def write_changes(cart_id, changes):
+    """Applies parse_cart_ops() output to the CartItem table in one transaction."""
+    removed = [food_id for food_id, (kind, _) in changes.items() if kind == "remove"]
+    with transaction.atomic():
+        if removed:
+            CartItem.objects.filter(cart_id=cart_id, food_id__in=removed).delete()
+        for food_id, (kind, quantity) in changes.items():
+            if kind == "add":
+                add_item(cart_id, food_id, quantity)
+            elif kind == "set":
+                set_item(cart_id, food_id, quantity)
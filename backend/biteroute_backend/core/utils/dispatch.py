@@ -0,0 +1,292 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import DeliveryRoute, DeliveryRouteStop, Hotel, Order
+from .geo import distance_matrix
+
+DEFAULTS = {
+    # Orders from one hotel placed in the same WINDOW_MINUTES are batched.
+    "WINDOW_MINUTES": 15,
+    # Drop-offs per rider run.
+    "MAX_STOPS": 8,
+    # Seconds a planning run may spend improving routes with 2-opt; the
+    # nearest-neighbour routes are always completed first.
+    "TIME_BUDGET": 2.0,
+    # Orders older than this are left for manual dispatch.
+    "LOOKBACK_HOURS": 6,
+}
+
+# Budget ceiling for plans requested over the API, which hold a worker.
+MAX_API_TIME_BUDGET = 5.0
+ROUTE_LIST_LIMIT = 50
+
+
+class DispatchError(Exception):
+    pass
+
+
+def dispatch_config(**overrides):
+    config = {**DEFAULTS, **getattr(settings, "DISPATCH", {})}
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    return config
+
+
+# ================= LOADING =================
+
+def window_start(created_at, minutes):
+    step = minutes * 60
+    return created_at - timedelta(seconds=created_at.timestamp() % step)
+
+
+def pending_orders(hotel_ids=None, lookback_hours=DEFAULTS["LOOKBACK_HOURS"]):
+    """Recent orders with a pickup hotel and a drop-off that no route has yet."""
+    orders = Order.objects.filter(
+        created_at__gte=timezone.now() - timedelta(hours=lookback_hours),
+        hotel__isnull=False,
+        latitude__isnull=False,
+        longitude__isnull=False,
+        route_stop__isnull=True,
+    )
+    if hotel_ids is not None:
+        orders = orders.filter(hotel_id__in=hotel_ids)
+    return orders
+
+
+def group_orders(rows, window_minutes):
+    """
+    {(hotel_id, window_start): (order_ids, latitudes, longitudes)} from
+    (id, hotel_id, created_at, latitude, longitude) rows.
+    """
+    groups = {}
+    for order_id, hotel_id, created_at, latitude, longitude in rows:
+        ids, latitudes, longitudes = groups.setdefault(
+            (hotel_id, window_start(created_at, window_minutes)), ([], [], [])
+        )
+        ids.append(order_id)
+        latitudes.append(latitude)
+        longitudes.append(longitude)
+    return groups
+
+
+# ================= ROUTING =================
+
+def nearest_neighbour_routes(distances, max_stops):
+    """
+    Splits the drop-offs (indexes 1..n of ``distances``, 0 is the hotel)
+    into runs of at most max_stops, each built by always driving to the
+    closest drop-off not served yet.
+    """
+    remaining = np.ones(len(distances), dtype=bool)
+    remaining[0] = False
+    routes = []
+    while remaining.any():
+        path = [0]
+        while remaining.any() and len(path) <= max_stops:
+            candidates = np.where(remaining, distances[path[-1]], np.inf)
+            stop = int(np.argmin(candidates))
+            path.append(stop)
+            remaining[stop] = False
+        routes.append(path)
+    return routes
+
+
+def two_opt(path, distances, deadline):
+    """
+    Improves an open path (starting at the hotel, ending at the last drop-off)
+    by reversing segments while that shortens it, until no reversal helps or
+    the deadline passes. All reversals starting at one position are scored
+    at once. Returns (path, finished).
+    """
+    if len(path) < 3:
+        return path, True
+
+    # An extra point at distance 0 from everything closes the path, so the
+    # last drop-off can take part in a reversal like any other.
+    size = len(distances)
+    padded = np.zeros((size + 1, size + 1))
+    padded[:size, :size] = distances
+    route = np.array(path + [size])
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(route) - 2):
+            if time.monotonic() > deadline:
+                return route[:-1].tolist(), False
+            before, first = route[i - 1], route[i]
+            last, after = route[i + 1:-1], route[i + 2:]
+            gain = (
+                padded[before, last] + padded[first, after]
+                - padded[before, first] - padded[last, after]
+            )
+            best = int(np.argmin(gain))
+            if gain[best] < -1e-9:
+                j = i + 1 + best
+                route[i:j + 1] = route[i:j + 1][::-1].copy()
+                improved = True
+    return route[:-1].tolist(), True
+
+
+def path_length(path, distances):
+    return float(distances[path[:-1], path[1:]].sum()) if len(path) > 1 else 0.0
+
+
+def plan_routes(groups, hotel_positions, max_stops, time_budget):
+    """
+    Plans every group. Nearest-neighbour routes are built for all groups
+    first, then 2-opt polishes them in turn for as long as the budget lasts,
+    so a tight budget still returns a full plan.
+
+    Returns (routes, stats); each route is a dict of hotel_id, window_start,
+    stops [(order_id, latitude, longitude, leg_km)] and distance_km.
+    """
+    started = time.monotonic()
+    deadline = started + time_budget
+    stats = {"groups": len(groups), "orders": 0, "nearest_neighbour_km": 0.0, "optimized": True}
+
+    drafts = []
+    for (hotel_id, window), (order_ids, latitudes, longitudes) in groups.items():
+        hotel_latitude, hotel_longitude = hotel_positions[hotel_id]
+        distances = distance_matrix([hotel_latitude, *latitudes], [hotel_longitude, *longitudes])
+        for path in nearest_neighbour_routes(distances, max_stops):
+            stats["nearest_neighbour_km"] += path_length(path, distances)
+            drafts.append((hotel_id, window, order_ids, latitudes, longitudes, distances, path))
+        stats["orders"] += len(order_ids)
+    stats["matrix_and_nn_ms"] = (time.monotonic() - started) * 1000
+
+    routes = []
+    for hotel_id, window, order_ids, latitudes, longitudes, distances, path in drafts:
+        if stats["optimized"]:
+            path, finished = two_opt(path, distances, deadline)
+            stats["optimized"] = finished
+        legs = distances[path[:-1], path[1:]]
+        routes.append({
+            "hotel_id": hotel_id,
+            "window_start": window,
+            "distance_km": float(legs.sum()),
+            "stops": [
+                (order_ids[point - 1], latitudes[point - 1], longitudes[point - 1], float(leg))
+                for point, leg in zip(path[1:], legs)
+            ],
+        })
+
+    stats["routes"] = len(routes)
+    stats["distance_km"] = sum(route["distance_km"] for route in routes)
+    stats["elapsed_ms"] = (time.monotonic() - started) * 1000
+    return routes, stats
+
+
+# ================= SAVING =================
+
+def save_routes(routes):
+    """
+    Writes the routes and their stops with two bulk inserts. Raises
+    DispatchError if another run routed one of the orders meanwhile (an
+    order has at most one stop); nothing is written then.
+    """
+    try:
+        with transaction.atomic():
+            saved = DeliveryRoute.objects.bulk_create([
+                DeliveryRoute(
+                    hotel_id=route["hotel_id"],
+                    window_start=route["window_start"],
+                    distance_km=round(route["distance_km"], 3),
+                )
+                for route in routes
+            ])
+            DeliveryRouteStop.objects.bulk_create([
+                DeliveryRouteStop(route=row, order_id=order_id, sequence=sequence, leg_km=round(leg_km, 3))
+                for row, route in zip(saved, routes)
+                for sequence, (order_id, latitude, longitude, leg_km) in enumerate(route["stops"], start=1)
+            ])
+    except IntegrityError:
+        raise DispatchError("Some orders were routed by another dispatch run, plan again")
+
+    for row, route in zip(saved, routes):
+        route["route_id"] = row.id
+    return routes
+
+
+def dispatch(hotel_ids=None, save=True, **overrides):
+    """
+    Plans (and by default saves) routes for the pending orders of all
+    hotels or ``hotel_ids``. Returns (routes, stats). ``overrides`` replace
+    DISPATCH settings for this run (window_minutes, max_stops, ...).
+    """
+    config = dispatch_config(**{key.upper(): value for key, value in overrides.items()})
+    if config["MAX_STOPS"] < 1 or config["WINDOW_MINUTES"] < 1:
+        raise DispatchError("max_stops and window_minutes must be at least 1")
+
+    rows = (
+        pending_orders(hotel_ids, config["LOOKBACK_HOURS"])
+        .order_by("hotel_id", "created_at", "id")
+        .values_list("id", "hotel_id", "created_at", "latitude", "longitude")
+    )
+    groups = group_orders(rows.iterator(chunk_size=2000), config["WINDOW_MINUTES"])
+    hotel_positions = {
+        hotel_id: (latitude, longitude)
+        for hotel_id, latitude, longitude in Hotel.objects.filter(
+            id__in={hotel_id for hotel_id, window in groups}, latitude__isnull=False, longitude__isnull=False
+        ).values_list("id", "latitude", "longitude")
+    }
+    # hotels without a map position can't be routed from
+    skipped = [key for key in groups if key[0] not in hotel_positions]
+    for key in skipped:
+        del groups[key]
+
+    routes, stats = plan_routes(groups, hotel_positions, config["MAX_STOPS"], config["TIME_BUDGET"])
+    stats["skipped_groups"] = len(skipped)
+    if save and routes:
+        save_routes(routes)
+    return routes, stats
+
+
+def route_response(route):
+    return {
+        "route_id": route.get("route_id"),
+        "hotel_id": route["hotel_id"],
+        "window_start": route["window_start"],
+        "distance_km": round(route["distance_km"], 3),
+        "stops": [
+            {
+                "sequence": sequence,
+                "order_id": order_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "leg_km": round(leg_km, 3),
+            }
+            for sequence, (order_id, latitude, longitude, leg_km) in enumerate(route["stops"], start=1)
+        ],
+    }
+
+
+def recent_routes(hotel_id, limit=ROUTE_LIST_LIMIT):
+    """A hotel's latest saved routes with their stops, in two queries."""
+    routes = list(
+        DeliveryRoute.objects.filter(hotel_id=hotel_id)
+        .order_by("-created_at", "-id")
+        .values("id", "hotel_id", "window_start", "distance_km")[:limit]
+    )
+    stops = {}
+    for stop in (
+        DeliveryRouteStop.objects.filter(route_id__in=[route["id"] for route in routes])
+        .order_by("route_id", "sequence")
+        .values_list("route_id", "order_id", "order__latitude", "order__longitude", "leg_km")
+    ):
+        stops.setdefault(stop[0], []).append(stop[1:])
+
+    return [
+        route_response({
+            "route_id": route["id"],
+            "hotel_id": route["hotel_id"],
+            "window_start": route["window_start"],
+            "distance_km": route["distance_km"],
+            "stops": stops.get(route["id"], []),
+        })
+        for route in routes
+    ]
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from ..models import Order, OrderItem
+from .geo import haversine_km
+
+DEFAULTS = {
+    # Prep time of an order: BASE_PREP_MINUTES + PREP_MINUTES_PER_ITEM for
+    # each item in the hotel's average order.
+    "BASE_PREP_MINUTES": 8.0,
+    "PREP_MINUTES_PER_ITEM": 2.0,
+    # Used for hotels without orders in the last STATS_DAYS.
+    "DEFAULT_ITEMS_PER_ORDER": 2.0,
+    "STATS_DAYS": 14,
+    "STATS_TTL": 600,  # seconds per-hotel prep stats stay cached
+    # Orders placed in the last BACKLOG_MINUTES are assumed to still be in
+    # the kitchen, which works on KITCHEN_PARALLELISM of them at a time.
+    "BACKLOG_MINUTES": 20,
+    "BACKLOG_TTL": 30,
+    "KITCHEN_PARALLELISM": 3,
+    # Rider speed, and how much longer roads are than the straight line.
+    "SPEED_KMH": 20.0,
+    "ROAD_FACTOR": 1.3,
+    "HANDOFF_MINUTES": 4.0,
+}
+
+
+def eta_config():
+    return {**DEFAULTS, **getattr(settings, "ETA", {})}
+
+
+def _cached_per_hotel(prefix, hotel_ids, ttl, load):
+    """
+    {hotel_id: value} from the cache, with every miss loaded by one call to
+    ``load(missing_ids)`` and cached for ``ttl`` seconds.
+    """
+    keys = {hotel_id: f"eta:{prefix}:{hotel_id}" for hotel_id in hotel_ids}
+    found = cache.get_many(keys.values())
+    values = {hotel_id: found[key] for hotel_id, key in keys.items() if key in found}
+
+    missing = [hotel_id for hotel_id in hotel_ids if hotel_id not in values]
+    if missing:
+        loaded = load(missing)
+        cache.set_many({keys[hotel_id]: loaded[hotel_id] for hotel_id in missing}, ttl)
+        values.update(loaded)
+    return values
+
+
+def items_per_order(hotel_ids, config):
+    """Average items per order of each hotel over STATS_DAYS (0 = no orders)."""
+    def load(missing):
+        since = timezone.now() - timedelta(days=config["STATS_DAYS"])
+        rows = (
+            OrderItem.objects.filter(order__hotel_id__in=missing, order__created_at__gte=since)
+            .values("order__hotel_id")
+            .annotate(items=Sum("quantity"), orders=Count("order_id", distinct=True))
+            .order_by()
+        )
+        averages = {row["order__hotel_id"]: row["items"] / row["orders"] for row in rows}
+        return {hotel_id: averages.get(hotel_id, 0) for hotel_id in missing}
+
+    return _cached_per_hotel("items", hotel_ids, config["STATS_TTL"], load)
+
+
+def backlog(hotel_ids, config):
+    """Orders each hotel received in the last BACKLOG_MINUTES."""
+    def load(missing):
+        since = timezone.now() - timedelta(minutes=config["BACKLOG_MINUTES"])
+        counts = dict(
+            Order.objects.filter(hotel_id__in=missing, created_at__gte=since)
+            .values("hotel_id")
+            .annotate(n=Count("id"))
+            .values_list("hotel_id", "n")
+            .order_by()
+        )
+        return {hotel_id: counts.get(hotel_id, 0) for hotel_id in missing}
+
+    return _cached_per_hotel("backlog", hotel_ids, config["BACKLOG_TTL"], load)
+
+
+def estimate_etas(latitude, longitude, hotel_ids, hotel_latitudes, hotel_longitudes):
+    """
+    Minutes to the door and distance (km) for every row of a result set,
+    one row per (hotel, customer) pair, computed as a single numpy batch.
+    Rows whose hotel has no map position get NaN. Per-hotel statistics are
+    fetched once per distinct hotel, mostly from the cache.
+    """
+    config = eta_config()
+    distinct = sorted(set(hotel_ids))
+    averages = items_per_order(distinct, config)
+    queued = backlog(distinct, config)
+
+    items = np.array([averages[hotel_id] or config["DEFAULT_ITEMS_PER_ORDER"] for hotel_id in hotel_ids],
+                     dtype=np.float64)
+    waiting = np.array([queued[hotel_id] for hotel_id in hotel_ids], dtype=np.float64)
+    latitudes = np.array([np.nan if value is None else value for value in hotel_latitudes], dtype=np.float64)
+    longitudes = np.array([np.nan if value is None else value for value in hotel_longitudes], dtype=np.float64)
+
+    prep = config["BASE_PREP_MINUTES"] + config["PREP_MINUTES_PER_ITEM"] * items
+    queue = waiting * prep / config["KITCHEN_PARALLELISM"]
+    distance = haversine_km(latitude, longitude, latitudes, longitudes)
+    travel = distance * config["ROAD_FACTOR"] / config["SPEED_KMH"] * 60
+    return prep + queue + travel + config["HANDOFF_MINUTES"], distance
@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.db import models, router, transaction
+from django.utils import timezone
+
+from ..models import Food, OrderItem, SearchTerm
+from .analytics import forget_order_items
+from .fuzzy import remove_words_bulk
+
+PURGE_CHUNK_SIZE = 1000
+MAX_PURGE_CHUNK_SIZE = 10000
+
+
+class PurgeError(Exception):
+    pass
+
+
+def purge_queryset(hotel_ids=None, categories=None, older_than_days=None):
+    """The foods matching every given scope; all foods when none is given."""
+    foods = Food.objects.all()
+    if hotel_ids:
+        foods = foods.filter(hotel_id__in=hotel_ids)
+    if categories:
+        category_filter = models.Q()
+        for category in categories:
+            category_filter |= models.Q(category__iexact=category)
+        foods = foods.filter(category_filter)
+    if older_than_days is not None:
+        foods = foods.filter(created_at__lt=timezone.now() - timedelta(days=older_than_days))
+    return foods
+
+
+def _raw_delete(queryset):
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def _delete_dependents(model, queryset, deleted):
+    """
+    Deletes (or nulls) every row pointing at ``queryset`` with one statement
+    per relation, deepest first, the way the on_delete rules would, but
+    without the collector loading the rows or sending signals. Child rows are
+    matched with a subquery, so nothing is read into Python.
+    """
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        on_delete = relation.on_delete
+        if on_delete is models.DO_NOTHING:
+            # database-managed (e.g. the full-text tables, cleaned by triggers)
+            continue
+
+        related = relation.related_model
+        children = related._base_manager.filter(**{f"{relation.field.name}__in": queryset.values("pk")})
+        if on_delete is models.CASCADE:
+            _delete_dependents(related, children, deleted)
+            count = _raw_delete(children)
+        elif on_delete is models.SET_NULL:
+            count = children.update(**{relation.field.name: None})
+        else:
+            raise PurgeError(f"{related._meta.label}.{relation.field.name} blocks a raw delete")
+        if count:
+            deleted[related._meta.label] = deleted.get(related._meta.label, 0) + count
+
+
+def delete_foods(food_ids, food_names):
+    """
+    Deletes one chunk of foods and everything cascading from them in one
+    transaction and returns {model label: rows deleted}. Raw deletes skip
+    the delete signals, so the chunk's order lines are taken out of the
+    sales rollups and its words out of the fuzzy vocabulary here instead.
+    """
+    deleted = {}
+    with transaction.atomic():
+        foods = Food.objects.filter(id__in=food_ids)
+        forget_order_items(OrderItem.objects.filter(food_id__in=food_ids))
+        _delete_dependents(Food, foods, deleted)
+        deleted[Food._meta.label] = _raw_delete(foods)
+        remove_words_bulk(SearchTerm.KIND_FOOD, food_names)
+    return deleted
+
+
+def purge_foods(queryset, chunk_size=PURGE_CHUNK_SIZE, pause=0, progress=None):
+    """
+    Deletes the foods in ``queryset`` chunk_size at a time, walking the id
+    index upward so every chunk is a bounded keyset read, a short
+    transaction and constant memory, whatever the size of the catalog.
+    Sleeps ``pause`` seconds between chunks to leave room for live traffic
+    and calls ``progress(totals)`` after each one. Chunks already deleted
+    stay deleted if a later one fails; running again picks up the rest.
+    """
+    if not 0 < chunk_size <= MAX_PURGE_CHUNK_SIZE:
+        raise PurgeError(f"Chunk size must be between 1 and {MAX_PURGE_CHUNK_SIZE}")
+
+    totals = {}
+    last_id = 0
+    while True:
+        chunk = list(
+            queryset.filter(id__gt=last_id).order_by("id").values_list("id", "food_name")[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+
+        food_ids, food_names = zip(*chunk)
+        for label, count in delete_foods(food_ids, food_names).items():
+            totals[label] = totals.get(label, 0) + count
+        if progress:
+            progress(totals)
+
+        if len(chunk) < chunk_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return totals
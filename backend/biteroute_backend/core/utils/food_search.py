@@ -0,0 +1,267 @@
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db.models import Case, F, IntegerField, Value, When
+
+from ..models import Food, Hotel
+from .fulltext import FullTextRank, fulltext_available
+from .eta import estimate_etas
+from .geo import bounding_box, covering_cells, geohash_filter, haversine_km
+from .opening_hours import open_hotel_ids
+from .pagination import apaginate, paginate, paginate_sorted
+
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 200
+
+# Exact name first, then names starting with the query, then the rest.
+SEARCH_ORDERING = ("match_rank", "price", "id")
+# With the full-text index, ties inside a match rank go to bm25 / ts_rank.
+FULLTEXT_SEARCH_ORDERING = ("match_rank", "relevance", "id")
+
+SEARCH_SORTS = ("relevance", "eta")
+# sort=eta orders the best matches by ETA in memory; this many are ranked.
+ETA_SORT_CANDIDATES = 1000
+ETA_SORT_ORDERING = ("eta_sort", "price", "id")
+# Sort position of results whose hotel has no map position (no ETA).
+ETA_UNKNOWN = 10 ** 6
+
+NEAREST_DEFAULT_K = 10
+NEAREST_MAX_K = 50
+# The search radius starts here and doubles until K hotels are found or it
+# reaches the maximum.
+NEAREST_START_RADIUS_KM = 5
+NEAREST_MAX_RADIUS_KM = 50
+
+
+def _attach_etas(rows, near):
+    latitude, longitude = near
+    etas, distances = estimate_etas(
+        latitude,
+        longitude,
+        [row["hotel_id"] for row in rows],
+        [row["hotel_latitude"] for row in rows],
+        [row["hotel_longitude"] for row in rows],
+    )
+    for row, eta, distance in zip(rows, etas.tolist(), distances.tolist()):
+        known = eta == eta  # NaN when the hotel has no map position
+        row["eta_minutes"] = round(eta) if known else None
+        row["distance_km"] = round(distance, 2) if known else None
+        row["eta_sort"] = row["eta_minutes"] if known else ETA_UNKNOWN
+
+
+def _search_queryset(food_type, food_name, location, open_minute):
+    """The matching foods as values() rows, and the ordering to page them by."""
+    queryset = Food.objects.filter(
+        hotel__status=Hotel.STATUS_APPROVED,
+        hotel__location__icontains=location,
+        category__iexact=food_type,
+    )
+    if open_minute is not None:
+        queryset = queryset.filter(hotel_id__in=open_hotel_ids(open_minute))
+
+    if fulltext_available(food_name):
+        # name, description and category through the full-text index
+        queryset = queryset.filter(search_entry__document__match=food_name).annotate(
+            relevance=FullTextRank("search_entry__document", food_name)
+        )
+        ordering = FULLTEXT_SEARCH_ORDERING
+        extra_fields = ("relevance",)
+    else:
+        queryset = queryset.filter(food_name__icontains=food_name)
+        ordering = SEARCH_ORDERING
+        extra_fields = ()
+
+    queryset = (
+        queryset
+        .annotate(
+            match_rank=Case(
+                When(food_name__iexact=food_name, then=Value(0)),
+                When(food_name__istartswith=food_name, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            )
+        )
+        .values(
+            "id",
+            "hotel_id",
+            "match_rank",
+            "price",
+            "description",
+            "food_name",
+            *extra_fields,
+            food_type=F("category"),
+            hotel_name=F("hotel__hotel_name"),
+            location=F("hotel__location"),
+            hotel_latitude=F("hotel__latitude"),
+            hotel_longitude=F("hotel__longitude"),
+        )
+    )
+    return queryset, ordering
+
+
+def _sort_by_eta(rows, near, cursor, limit):
+    _attach_etas(rows, near)
+    rows.sort(key=lambda row: tuple(row[f] for f in ETA_SORT_ORDERING))
+    return paginate_sorted(rows, ETA_SORT_ORDERING, cursor, limit)
+
+
+def _search_results(rows, near):
+    results = []
+    for row in rows:
+        results.append({
+            "food_id": row["id"],
+            "hotel_id": row["hotel_id"],
+            "hotel_name": row["hotel_name"],
+            "location": row["location"],
+            "food_name": row["food_name"],
+            "food_type": row["food_type"],
+            "price": row["price"],
+            "description": row["description"],
+        })
+        if near is not None:
+            results[-1]["distance_km"] = row["distance_km"]
+            results[-1]["eta_minutes"] = row["eta_minutes"]
+    return results
+
+
+def search_foods(food_type, food_name, location, cursor=None, limit=SEARCH_PAGE_SIZE, open_minute=None,
+                 near=None, sort="relevance"):
+    """
+    Answers type + food + location with one joined query over Food and Hotel
+    instead of one Food query per hotel in the city. The food text is matched
+    through the full-text index when the database has one. With
+    ``open_minute`` (minute of the week) only hotels open then are searched.
+
+    With ``near`` (the customer's latitude, longitude) every result gets an
+    ETA, computed for the whole page at once; sort="eta" ranks the best
+    ETA_SORT_CANDIDATES matches by it.
+
+    Returns (results, next_cursor). Raises ValueError for a bad cursor.
+    """
+    if sort == "eta" and near is None:
+        raise ValueError("sort=eta needs the customer's position")
+
+    queryset, ordering = _search_queryset(food_type, food_name, location, open_minute)
+    if sort == "eta":
+        rows = list(queryset.order_by(*ordering)[:ETA_SORT_CANDIDATES])
+        rows, next_cursor = _sort_by_eta(rows, near, cursor, limit)
+    else:
+        rows, next_cursor = paginate(queryset, ordering, cursor, limit)
+        if near is not None and rows:
+            _attach_etas(rows, near)
+
+    return _search_results(rows, near), next_cursor
+
+
+async def asearch_foods(food_type, food_name, location, cursor=None, limit=SEARCH_PAGE_SIZE, open_minute=None,
+                        near=None, sort="relevance"):
+    """
+    search_foods() for async views: the matching rows come through the
+    async ORM, the ETA statistics (cache and grouped queries) in one
+    thread hop.
+    """
+    if sort == "eta" and near is None:
+        raise ValueError("sort=eta needs the customer's position")
+
+    queryset, ordering = _search_queryset(food_type, food_name, location, open_minute)
+    if sort == "eta":
+        rows = [row async for row in queryset.order_by(*ordering)[:ETA_SORT_CANDIDATES]]
+        rows, next_cursor = await sync_to_async(_sort_by_eta)(rows, near, cursor, limit)
+    else:
+        rows, next_cursor = await apaginate(queryset, ordering, cursor, limit)
+        if near is not None and rows:
+            await sync_to_async(_attach_etas)(rows, near)
+
+    return _search_results(rows, near), next_cursor
+
+
+def _matching_foods(food_name, food_type=None):
+    foods = Food.objects.all()
+    if food_type:
+        foods = foods.filter(category__iexact=food_type)
+    if fulltext_available(food_name):
+        return foods.filter(search_entry__document__match=food_name)
+    return foods.filter(food_name__icontains=food_name)
+
+
+def _hotels_within(latitude, longitude, radius_km, foods, open_minute=None):
+    """
+    Approved hotels serving one of ``foods`` within radius_km, as
+    (ids, distances) arrays. The database only scans the geohash cells and
+    the bounding box around the point; the exact distances are computed here
+    in one vectorized pass.
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    south, west, north, east = box
+    hotels = Hotel.objects.filter(
+        geohash_filter(covering_cells(box), status=Hotel.STATUS_APPROVED),
+        latitude__range=(south, north),
+        longitude__range=(west, east),
+        id__in=foods.values("hotel_id"),
+    )
+    if open_minute is not None:
+        hotels = hotels.filter(id__in=open_hotel_ids(open_minute))
+    rows = list(hotels.values_list("id", "latitude", "longitude"))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    ids, latitudes, longitudes = (np.array(column) for column in zip(*rows))
+    distances = haversine_km(latitude, longitude, latitudes, longitudes)
+    inside = distances <= radius_km
+    return ids[inside], distances[inside]
+
+
+def nearest_hotels(food_name, latitude, longitude, k=NEAREST_DEFAULT_K, food_type=None,
+                   max_radius_km=NEAREST_MAX_RADIUS_KM, open_minute=None):
+    """
+    The k approved hotels nearest to (latitude, longitude) that serve
+    ``food_name``, closest first, each with its matching foods. Hotels
+    without coordinates are never returned, nor, with ``open_minute``,
+    hotels closed at that minute of the week.
+    """
+    foods = _matching_foods(food_name, food_type)
+
+    radius = min(NEAREST_START_RADIUS_KM, max_radius_km)
+    while True:
+        ids, distances = _hotels_within(latitude, longitude, radius, foods, open_minute)
+        if len(ids) >= k or radius >= max_radius_km:
+            break
+        radius = min(radius * 2, max_radius_km)
+
+    if len(ids) > k:
+        nearest = np.argpartition(distances, k - 1)[:k]
+        ids, distances = ids[nearest], distances[nearest]
+    order = np.lexsort((ids, distances))
+    ids, distances = ids[order].tolist(), distances[order].tolist()
+    if not ids:
+        return []
+
+    hotels = {
+        row["id"]: row
+        for row in Hotel.objects.filter(id__in=ids).values(
+            "id", "hotel_name", "location", "latitude", "longitude"
+        )
+    }
+    menu = {}
+    for row in foods.filter(hotel_id__in=ids).order_by("price", "id").values(
+        "id", "hotel_id", "food_name", "category", "price"
+    ):
+        menu.setdefault(row["hotel_id"], []).append({
+            "food_id": row["id"],
+            "food_name": row["food_name"],
+            "food_type": row["category"],
+            "price": row["price"],
+        })
+
+    return [
+        {
+            "hotel_id": hotel_id,
+            "hotel_name": hotels[hotel_id]["hotel_name"],
+            "location": hotels[hotel_id]["location"],
+            "latitude": hotels[hotel_id]["latitude"],
+            "longitude": hotels[hotel_id]["longitude"],
+            "distance_km": round(distance, 3),
+            "foods": menu.get(hotel_id, []),
+        }
+        for hotel_id, distance in zip(ids, distances)
+        if hotel_id in hotels
+    ]
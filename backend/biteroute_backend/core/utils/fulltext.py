@@ -0,0 +1,87 @@
+import re
+
+from django.db import connection, models
+from django.db.models import FloatField, Func, Lookup
+from django.db.utils import NotSupportedError
+
+# Backends the 0004 migration builds an index for. Anything else falls back
+# to icontains in the views.
+FULLTEXT_VENDORS = ("sqlite", "postgresql")
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fulltext_available(text):
+    """Whether ``text`` can be answered from the full-text index."""
+    return connection.vendor in FULLTEXT_VENDORS and bool(query_tokens(text))
+
+
+def query_tokens(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def to_fts5_query(text):
+    # "panner tika" -> "panner"* "tika"*  (every word, prefix match)
+    return " ".join(f'"{token}"*' for token in query_tokens(text))
+
+
+def to_tsquery(text):
+    return " & ".join(f"{token}:*" for token in query_tokens(text))
+
+
+class FullTextField(models.TextField):
+    """
+    Column holding the indexed document: the FTS5 hidden column on SQLite,
+    a tsvector column on Postgres. Only ever read through ``__match``.
+    """
+
+
+@FullTextField.register_lookup
+class FullTextMatch(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError("Full-text search is only available on SQLite and Postgres")
+
+    def as_sqlite(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        params = [to_fts5_query(p) for p in rhs_params]
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *params]
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        params = [to_tsquery(p) for p in rhs_params]
+        return f"{lhs} @@ to_tsquery('simple', {rhs})", [*lhs_params, *params]
+
+
+class FullTextRank(Func):
+    """
+    Relevance of the matched row, lower is better on every backend so it can
+    be used as an ascending sort / keyset key.
+
+    FullTextRank("search_entry__document", "paneer tikka")
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, document, text, **extra):
+        self.text = text
+        super().__init__(models.F(document), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError("Full-text search is only available on SQLite and Postgres")
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # FTS5 exposes bm25() through the hidden "rank" column; the column
+        # weights are configured when the table is created.
+        alias = self.source_expressions[0].alias
+        return f"{compiler.quote_name_unless_alias(alias)}.rank", []
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        document, params = compiler.compile(self.source_expressions[0])
+        return (
+            f"-ts_rank({document}, to_tsquery('simple', %s))",
+            [*params, to_tsquery(self.text)],
+        )
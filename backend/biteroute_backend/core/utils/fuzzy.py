@@ -0,0 +1,203 @@
+import math
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from ..models import SearchTerm, SearchTermTrigram
+from .fulltext import query_tokens
+
+# Set on fuzzy search responses when the query was rewritten.
+CORRECTED_QUERY_HEADER = "X-Corrected-Query"
+
+# A word must share at least this much of its trigrams (Jaccard) with the
+# typed word to be offered as a correction.
+FUZZY_MIN_SIMILARITY = 0.3
+# Terms returned per typed word, and words corrected per query. The rows
+# grouped per word still grow with the vocabulary: every term sharing a
+# trigram with the typed word and falling in its length window (see
+# correct_word) is counted before the best FUZZY_CANDIDATES are kept.
+FUZZY_CANDIDATES = 25
+FUZZY_MAX_WORDS = 6
+MAX_WORD_LENGTH = 100
+
+
+def trigrams(word):
+    # Same padding as pg_trgm: two spaces before, one after, so short words
+    # and word starts still produce grams.
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def vocabulary_words(text):
+    return {word for word in query_tokens(text) if len(word) <= MAX_WORD_LENGTH}
+
+
+def add_words(kind, text):
+    for word in vocabulary_words(text):
+        updated = SearchTerm.objects.filter(kind=kind, word=word).update(
+            occurrences=F("occurrences") + 1
+        )
+        if updated:
+            continue
+
+        grams = trigrams(word)
+        try:
+            with transaction.atomic():
+                term = SearchTerm.objects.create(
+                    kind=kind, word=word, occurrences=1, trigram_count=len(grams)
+                )
+                SearchTermTrigram.objects.bulk_create([
+                    SearchTermTrigram(term=term, kind=kind, trigram=gram) for gram in grams
+                ])
+        except IntegrityError:
+            # created by a concurrent request in the meantime
+            SearchTerm.objects.filter(kind=kind, word=word).update(
+                occurrences=F("occurrences") + 1
+            )
+
+
+def add_words_bulk(kind, texts):
+    """
+    add_words() for many texts at once (bulk imports, which skip the
+    post_save signal): one UPDATE per distinct increment for known words and
+    a bulk insert for new ones.
+    """
+    counts = {}
+    for text in texts:
+        for word in vocabulary_words(text):
+            counts[word] = counts.get(word, 0) + 1
+    if not counts:
+        return
+
+    known = set(SearchTerm.objects.filter(kind=kind, word__in=list(counts)).values_list("word", flat=True))
+    by_increment = {}
+    for word in known:
+        by_increment.setdefault(counts[word], []).append(word)
+    for increment, words in by_increment.items():
+        SearchTerm.objects.filter(kind=kind, word__in=words).update(
+            occurrences=F("occurrences") + increment
+        )
+
+    new_words = [word for word in counts if word not in known]
+    try:
+        with transaction.atomic():
+            terms = SearchTerm.objects.bulk_create([
+                SearchTerm(kind=kind, word=word, occurrences=counts[word], trigram_count=len(trigrams(word)))
+                for word in new_words
+            ])
+            if any(term.pk is None for term in terms):
+                terms = SearchTerm.objects.filter(kind=kind, word__in=new_words)
+            SearchTermTrigram.objects.bulk_create([
+                SearchTermTrigram(term=term, kind=kind, trigram=gram)
+                for term in terms
+                for gram in trigrams(term.word)
+            ])
+    except IntegrityError:
+        # another request added some of them meanwhile: go word by word
+        for word in new_words:
+            for _ in range(counts[word]):
+                add_words(kind, word)
+
+
+def remove_words(kind, text):
+    words = vocabulary_words(text)
+    if not words:
+        return
+
+    SearchTerm.objects.filter(kind=kind, word__in=words).update(
+        occurrences=F("occurrences") - 1
+    )
+    SearchTerm.objects.filter(kind=kind, word__in=words, occurrences__lte=0).delete()
+
+
+def remove_words_bulk(kind, texts):
+    """remove_words() for many texts at once (raw deletes skip post_delete)."""
+    counts = {}
+    for text in texts:
+        for word in vocabulary_words(text):
+            counts[word] = counts.get(word, 0) + 1
+    if not counts:
+        return
+
+    by_decrement = {}
+    for word, n in counts.items():
+        by_decrement.setdefault(n, []).append(word)
+    for decrement, words in by_decrement.items():
+        SearchTerm.objects.filter(kind=kind, word__in=words).update(
+            occurrences=F("occurrences") - decrement
+        )
+    SearchTerm.objects.filter(kind=kind, word__in=list(counts), occurrences__lte=0).delete()
+
+
+def rebuild_terms(kind, texts):
+    """Replaces the vocabulary of ``kind`` with the words of ``texts``."""
+    counts = {}
+    for text in texts:
+        for word in vocabulary_words(text):
+            counts[word] = counts.get(word, 0) + 1
+
+    with transaction.atomic():
+        SearchTerm.objects.filter(kind=kind).delete()
+        terms = SearchTerm.objects.bulk_create(
+            [
+                SearchTerm(kind=kind, word=word, occurrences=n, trigram_count=len(trigrams(word)))
+                for word, n in counts.items()
+            ],
+            batch_size=500,
+        )
+        if any(term.pk is None for term in terms):
+            terms = SearchTerm.objects.filter(kind=kind)
+
+        SearchTermTrigram.objects.bulk_create(
+            (
+                SearchTermTrigram(term=term, kind=kind, trigram=gram)
+                for term in terms
+                for gram in trigrams(term.word)
+            ),
+            batch_size=1000,
+        )
+
+    return len(counts)
+
+
+def correct_word(kind, word):
+    """
+    Closest known word to ``word`` by trigram similarity, or None when nothing
+    is close enough. A word that is already known is returned unchanged.
+    """
+    grams = trigrams(word)
+    # shared <= min(a, b), so a Jaccard score of at least FUZZY_MIN_SIMILARITY
+    # needs the term's trigram count b within [a * s, a / s]; terms outside
+    # that window are dropped before the grouping.
+    shortest = math.ceil(len(grams) * FUZZY_MIN_SIMILARITY)
+    longest = math.floor(len(grams) / FUZZY_MIN_SIMILARITY)
+
+    candidates = (
+        SearchTermTrigram.objects
+        .filter(kind=kind, trigram__in=grams, term__trigram_count__range=(shortest, longest))
+        .values("term_id", "term__word", "term__trigram_count", "term__occurrences")
+        .annotate(shared=Count("id"))
+        .order_by("-shared", "-term__occurrences")[:FUZZY_CANDIDATES]
+    )
+
+    best, best_score = None, FUZZY_MIN_SIMILARITY
+    for candidate in candidates:
+        if candidate["term__word"] == word:
+            return word
+
+        shared = candidate["shared"]
+        score = shared / (len(grams) + candidate["term__trigram_count"] - shared)
+        if score > best_score:
+            best, best_score = candidate["term__word"], score
+
+    return best
+
+
+def correct_query(kind, text):
+    """
+    Rewrites every word of ``text`` to its closest known word. Words without
+    a close match are kept as typed.
+    """
+    words = query_tokens(text)[:FUZZY_MAX_WORDS]
+    corrected = [correct_word(kind, word) or word for word in words]
+    return " ".join(corrected)
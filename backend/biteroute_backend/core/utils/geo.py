@@ -0,0 +1,155 @@
+import math
+
+import numpy as np
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Stored on Hotel; 9 characters is a cell of roughly 5 x 5 metres.
+GEOHASH_PRECISION = 9
+# A bounding box is covered by at most this many geohash cells: the
+# precision is lowered until it fits, so one lookup is a handful of index
+# range scans whatever the radius.
+GEO_MAX_CELLS = 16
+
+
+def parse_coordinates(latitude, longitude):
+    """
+    Returns (latitude, longitude) as floats. Raises ValueError when either is
+    missing, not a number or out of range.
+    """
+    try:
+        latitude = float(latitude)
+        longitude = float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError("latitude and longitude must be numbers")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("latitude must be within ±90 and longitude within ±180")
+    return latitude, longitude
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # geohash bits alternate longitude, latitude, longitude, ...
+
+    while len(chars) < precision:
+        span, point = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if point >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(height, width) of a geohash cell in degrees."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (south, west, north, east) of the box holding every point within
+    radius_km. Clamped at the poles and at ±180 longitude rather than
+    wrapped.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    lng_delta = 180.0 if cos_lat < 1e-9 else min(180.0, lat_delta / cos_lat)
+    return (
+        max(-90.0, latitude - lat_delta),
+        max(-180.0, longitude - lng_delta),
+        min(90.0, latitude + lat_delta),
+        min(180.0, longitude + lng_delta),
+    )
+
+
+def covering_cells(box, max_cells=GEO_MAX_CELLS):
+    """The geohash prefixes, as fine as max_cells allows, that cover box."""
+    south, west, north, east = box
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        first_row = math.floor((south + 90) / height)
+        last_row = math.floor((north + 90) / height)
+        first_col = math.floor((west + 180) / width)
+        last_col = math.floor((east + 180) / width)
+        if (last_row - first_row + 1) * (last_col - first_col + 1) <= max_cells:
+            break
+
+    cells = set()
+    for row in range(first_row, last_row + 1):
+        for col in range(first_col, last_col + 1):
+            center_lat = min(90.0, (row + 0.5) * height - 90)
+            center_lng = min(180.0, (col + 0.5) * width - 180)
+            cells.add(encode_geohash(center_lat, center_lng, precision))
+    return sorted(cells)
+
+
+def _prefix_end(prefix):
+    """The first geohash after every hash starting with prefix, or None."""
+    chars = list(prefix)
+    while chars:
+        position = GEOHASH_ALPHABET.index(chars[-1])
+        if position + 1 < len(GEOHASH_ALPHABET):
+            chars[-1] = GEOHASH_ALPHABET[position + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+
+def geohash_filter(cells, field="geohash", **equal):
+    """
+    Q matching rows whose geohash starts with one of ``cells``, written as
+    ``>= cell AND < next cell`` ranges so it is served by a plain b-tree
+    index on every backend (LIKE 'abc%' is not, on SQLite). Cells that
+    follow each other in geohash order share one range. ``equal`` lookups
+    are repeated inside every range, so a composite (column, geohash) index
+    seeks each range instead of scanning the whole column value.
+    """
+    ranges = []
+    for cell in sorted(cells):
+        end = _prefix_end(cell)
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1][1] = end
+        else:
+            ranges.append([cell, end])
+
+    condition = Q()
+    for start, end in ranges:
+        cell_range = Q(**equal, **{f"{field}__gte": start})
+        if end is not None:
+            cell_range &= Q(**{f"{field}__lt": end})
+        condition |= cell_range
+    return condition
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distances from one point to arrays of points, in km."""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    d_lat = lat2 - lat1
+    d_lng = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(d_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distance_matrix(latitudes, longitudes):
+    """Pairwise great-circle distances (km) between the given points."""
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    return haversine_km(latitudes[:, None], longitudes[:, None], latitudes[None, :], longitudes[None, :])
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from ..models import HotelStatusCounts
+
+COUNTS_ROW_ID = 1
+COUNTS_CACHE_KEY = "admin_dashboard:hotel_counts"
+# Per-process locmem caches are only cleared in the process that made the
+# change, so other workers may serve counts this old.
+COUNTS_CACHE_TTL = 30  # seconds
+# Counts are recomputed from Hotel when the row is older than this, which
+# also corrects changes that bypass the views (Django admin, owner deletes
+# cascading to their hotels, ...).
+RECONCILE_INTERVAL = timedelta(minutes=15)
+
+STATUSES = ("approved", "pending", "rejected")
+
+
+def _clear_cache():
+    transaction.on_commit(lambda: cache.delete(COUNTS_CACHE_KEY))
+
+
+def _count_by_status(hotel_model):
+    counts = dict.fromkeys(STATUSES, 0)
+    if any(field.name == "status" for field in hotel_model._meta.fields):
+        rows = hotel_model.objects.values("status").annotate(hotels=Count("id")).order_by()
+        counts.update({row["status"]: row["hotels"] for row in rows})
+        return counts
+
+    # Historical models before 0011 (migration 0010 reconciles through them)
+    # only have the flags. Aliases must not shadow the approved / rejected fields.
+    totals = hotel_model.objects.aggregate(
+        approved_count=Count("id", filter=Q(approved=True, rejected=False)),
+        pending_count=Count("id", filter=Q(approved=False, rejected=False)),
+        rejected_count=Count("id", filter=Q(rejected=True)),
+    )
+    return {status: totals[f"{status}_count"] for status in STATUSES}
+
+
+def reconcile(apps=global_apps):
+    """
+    Recomputes the counts from Hotel in one GROUP BY status query and stores
+    them. Returns {"approved", "pending", "rejected"}.
+    """
+    hotel_model = apps.get_model("core", "Hotel")
+    counts_model = apps.get_model("core", "HotelStatusCounts")
+
+    with transaction.atomic():
+        # Lock the row before counting: a concurrent adjust_hotel_counts()
+        # then waits and applies its delta on top of counts that did not
+        # include it yet.
+        counts_model.objects.select_for_update().filter(id=COUNTS_ROW_ID).first()
+
+        counts = _count_by_status(hotel_model)
+        counts_model.objects.update_or_create(
+            id=COUNTS_ROW_ID,
+            defaults={**counts, "reconciled_at": timezone.now()},
+        )
+        _clear_cache()
+
+    return counts
+
+
+def adjust_hotel_counts(old_status, new_status):
+    """
+    Moves one hotel between statuses ("approved" / "pending" / "rejected";
+    None for a created or deleted hotel). Call inside the transaction that
+    wrote the hotel.
+    """
+    if old_status == new_status:
+        return
+
+    deltas = {}
+    if old_status:
+        deltas[old_status] = F(old_status) - 1
+    if new_status:
+        deltas[new_status] = F(new_status) + 1
+
+    if not HotelStatusCounts.objects.filter(id=COUNTS_ROW_ID).update(**deltas):
+        # first write: counting now already includes this hotel
+        reconcile()
+        return
+    _clear_cache()
+
+
+def hotel_counts():
+    """Dashboard counts from the cache, else from the counters row."""
+    counts = cache.get(COUNTS_CACHE_KEY)
+    if counts is not None:
+        return counts
+
+    row = HotelStatusCounts.objects.filter(id=COUNTS_ROW_ID).values(*STATUSES, "reconciled_at").first()
+    if row is None or row["reconciled_at"] is None or row["reconciled_at"] < timezone.now() - RECONCILE_INTERVAL:
+        row = reconcile()
+
+    counts = {"total": sum(row[status] for status in STATUSES)}
+    counts.update({status: row[status] for status in STATUSES})
+    cache.set(COUNTS_CACHE_KEY, counts, COUNTS_CACHE_TTL)
+    return counts
@@ -0,0 +1,177 @@
+import bisect
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .fulltext import query_tokens
+
+# Bumped on every hotel write. With a shared cache backend configured, the
+# other workers see the new version and rebuild their copy; with the default
+# per-process locmem cache they fall back to the max age below.
+INDEX_VERSION_KEY = "hotel_name_index:version"
+INDEX_MAX_AGE = 300  # seconds
+
+TYPEAHEAD_LIMIT = 10
+
+
+class HotelNameIndex:
+    """
+    Per-process typeahead index: a sorted array of (word, hotel_id) for every
+    word of every hotel name and one of (normalized name, hotel_id), both
+    searched with bisect, plus each hotel's name and precomputed approval
+    status.
+
+    Matching is by word prefix ("spi hu" finds "Spice Hub"), not the
+    substring match hotel_name__icontains used to do ("ice" no longer finds
+    "Spice Hub").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._names = []
+        self._hotels = {}
+        self._version = None
+        self._built_at = None
+
+    # ---------- building ----------
+
+    def _load(self):
+        from ..models import Hotel
+
+        entries = []
+        names = []
+        hotels = {}
+        rows = Hotel.objects.values_list("id", "hotel_name", "status")
+        for hotel_id, name, status in rows.iterator(chunk_size=2000):
+            words = query_tokens(name)
+            hotels[hotel_id] = (name, status, words)
+            entries.extend((word, hotel_id) for word in set(words))
+            names.append((" ".join(words), hotel_id))
+        entries.sort()
+        names.sort()
+        return entries, names, hotels
+
+    def rebuild(self):
+        version = cache.get(INDEX_VERSION_KEY)
+        entries, names, hotels = self._load()
+        with self._lock:
+            self._entries = entries
+            self._names = names
+            self._hotels = hotels
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        stale = (
+            self._built_at is None
+            or time.monotonic() - self._built_at > INDEX_MAX_AGE
+            or cache.get(INDEX_VERSION_KEY) != self._version
+        )
+        if stale:
+            self.rebuild()
+
+    # ---------- incremental updates ----------
+
+    @staticmethod
+    def _discard(array, item):
+        i = bisect.bisect_left(array, item)
+        if i < len(array) and array[i] == item:
+            del array[i]
+
+    def _remove_locked(self, hotel_id):
+        previous = self._hotels.pop(hotel_id, None)
+        if not previous:
+            return
+        for word in set(previous[2]):
+            self._discard(self._entries, (word, hotel_id))
+        self._discard(self._names, (" ".join(previous[2]), hotel_id))
+
+    def upsert(self, hotel):
+        words = query_tokens(hotel.hotel_name)
+        status = hotel.status
+        with self._lock:
+            self._remove_locked(hotel.id)
+            self._hotels[hotel.id] = (hotel.hotel_name, status, words)
+            for word in set(words):
+                bisect.insort(self._entries, (word, hotel.id))
+            bisect.insort(self._names, (" ".join(words), hotel.id))
+        self._bump_version()
+
+    def remove(self, hotel_id):
+        with self._lock:
+            self._remove_locked(hotel_id)
+        self._bump_version()
+
+    def _bump_version(self):
+        try:
+            version = cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            version = 1
+            cache.set(INDEX_VERSION_KEY, version, None)
+        # Our own copy is already patched; only other workers need to reload.
+        if self._built_at is not None:
+            self._version = version
+
+    # ---------- lookups ----------
+
+    def search(self, query, limit=TYPEAHEAD_LIMIT):
+        words = query_tokens(query)
+        if not words:
+            return []
+
+        self._ensure_fresh()
+        return self._match(words, limit)
+
+    async def asearch(self, query, limit=TYPEAHEAD_LIMIT):
+        """search() for async views; only the freshness check leaves the event loop."""
+        words = query_tokens(query)
+        if not words:
+            return []
+
+        await sync_to_async(self._ensure_fresh)()
+        return self._match(words, limit)
+
+    def _match(self, words, limit):
+        # The last word is still being typed: match it as a prefix and the
+        # earlier ones as prefixes of any word of the name. Names starting
+        # with the typed text rank first, so they are collected first from
+        # the name array; the rest come from the word array in word order.
+        # Both scans stop once `limit` hotels are in hand.
+        prefix = words[-1]
+        others = words[:-1]
+        phrase = " ".join(words)
+
+        with self._lock:
+            leading = []
+            start = bisect.bisect_left(self._names, (phrase,))
+            for normalized, hotel_id in self._names[start:]:
+                if len(leading) == limit or not normalized.startswith(phrase):
+                    break
+                leading.append(hotel_id)
+
+            seen = set(leading)
+            rest = []
+            start = bisect.bisect_left(self._entries, (prefix,))
+            for i in range(start, len(self._entries)):
+                if len(seen) == limit:
+                    break
+                word, hotel_id = self._entries[i]
+                if not word.startswith(prefix):
+                    break
+                if hotel_id in seen:
+                    continue
+
+                name_words = self._hotels[hotel_id][2]
+                if all(any(w.startswith(o) for w in name_words) for o in others):
+                    seen.add(hotel_id)
+                    rest.append(hotel_id)
+
+            rest.sort(key=lambda hotel_id: (self._hotels[hotel_id][0].lower(), hotel_id))
+            matches = [(hotel_id, *self._hotels[hotel_id][:2]) for hotel_id in leading + rest]
+
+        return [{"id": hotel_id, "hotel_name": name, "status": status} for hotel_id, name, status in matches]
+
+hotel_name_index = HotelNameIndex()
@@ -0,0 +1,69 @@
+from rest_framework.response import Response
+
+from .pagination import page_limit, paginate, paginated_response
+
+HOTEL_PAGE_SIZE = 100
+HOTEL_MAX_PAGE_SIZE = 500
+
+# What HotelSerializer (fields="__all__") returns, in the same order. The
+# default when no fields= projection is given, so existing clients see the
+# same objects.
+HOTEL_LIST_FIELDS = (
+    "id",
+    "owner",
+    "hotel_name",
+    "location",
+    "food_type",
+    "open_time",
+    "close_time",
+    "description",
+    "approved",
+    "rejected",
+    "status",
+    "latitude",
+    "longitude",
+    "geohash",
+)
+HOTEL_LIST_ORDERING = ("id",)
+
+
+def projected_fields(raw, allowed):
+    """
+    Parses a comma separated ``fields=`` parameter. "id" is always included
+    since the cursor is built from it. Raises ValueError for unknown names.
+    """
+    if not raw:
+        return allowed
+
+    requested = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return ("id", *(name for name in allowed if name in requested and name != "id"))
+
+
+def hotel_list_response(request, queryset):
+    """
+    One page of ``queryset`` as plain values() dicts, keyset-paginated on id
+    (?cursor=, ?limit=) and projected to ?fields=. Only the requested columns
+    are selected, so e.g. descriptions are never loaded unless asked for.
+    """
+    try:
+        fields = projected_fields(request.GET.get("fields"), HOTEL_LIST_FIELDS)
+    except ValueError as e:
+        return Response({"message": str(e)}, status=400)
+
+    limit = page_limit(request.GET.get("limit"), HOTEL_PAGE_SIZE, HOTEL_MAX_PAGE_SIZE)
+
+    try:
+        rows, next_cursor = paginate(
+            queryset.values(*fields),
+            HOTEL_LIST_ORDERING,
+            request.GET.get("cursor"),
+            limit,
+        )
+    except ValueError:
+        return Response({"message": "Invalid cursor"}, status=400)
+
+    return paginated_response(rows, next_cursor)
@@ -0,0 +1,138 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from ..models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+KEY_TTL = timedelta(hours=24)
+# An in-flight key older than this belonged to a request that died before
+# it could record its response; a retry may take it over.
+IN_FLIGHT_TIMEOUT = timedelta(minutes=2)
+MAX_KEY_LENGTH = 255
+
+
+def _principal(request):
+    user = request.user
+    if isinstance(user, dict):
+        return f"{user.get('role')}:{user.get('id')}"
+    if getattr(user, "is_authenticated", False) and getattr(user, "pk", None) is not None:
+        return f"{user._meta.model_name}:{user.pk}"
+    return None
+
+
+def _request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def _acquire(scope, principal, key, request_hash):
+    """
+    Returns (record, created). Creating the row is the in-flight lock: the
+    unique constraint lets exactly one of several concurrent retries win.
+    """
+    now = timezone.now()
+    lookup = {"scope": scope, "principal": principal, "key": key}
+
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    **lookup,
+                    request_hash=request_hash,
+                    expires_at=now + KEY_TTL,
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(**lookup).first()
+            if record is None:
+                continue
+
+            abandoned = (
+                record.status == IdempotencyKey.STATUS_IN_FLIGHT
+                and record.created_at < now - IN_FLIGHT_TIMEOUT
+            )
+            if record.expires_at > now and not abandoned:
+                return record, False
+
+            # expired or abandoned: free the key and try to claim it again
+            IdempotencyKey.objects.filter(id=record.id, status=record.status).delete()
+
+    return IdempotencyKey.objects.get(**lookup), False
+
+
+def idempotent(scope):
+    """
+    Makes a DRF function view safe to retry. A request carrying an
+    Idempotency-Key header runs once; repeats with the same key get the
+    stored response back (with Idempotent-Replayed: true) without running
+    the view, and a repeat that arrives while the first one is still running
+    gets 409. Only successful (2xx) responses are stored, so a client can
+    fix a rejected request and retry with the same key.
+
+    Goes under @api_view so ``request.user`` is already authenticated.
+    Keys are scoped to the caller; anonymous requests have no scope another
+    client can't share, so their keys are ignored.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            principal = _principal(request)
+            if not key or principal is None:
+                return view(request, *args, **kwargs)
+
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({"status": False, "message": "Idempotency-Key is too long"}, status=400)
+
+            request_hash = _request_hash(request)
+            record, created = _acquire(scope, principal, key, request_hash)
+
+            if not created:
+                if record.request_hash != request_hash:
+                    return Response(
+                        {"status": False, "message": "Idempotency-Key was already used for a different request"},
+                        status=422,
+                    )
+                if record.status == IdempotencyKey.STATUS_IN_FLIGHT:
+                    return Response(
+                        {"status": False, "message": "A request with this Idempotency-Key is still in progress"},
+                        status=409,
+                    )
+
+                response = Response(record.response_body, status=record.response_status)
+                response[REPLAYED_HEADER] = "true"
+                return response
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+
+            if 200 <= response.status_code < 300:
+                record.status = IdempotencyKey.STATUS_COMPLETED
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=["status", "response_status", "response_body"])
+            else:
+                record.delete()
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def purge_expired_keys():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
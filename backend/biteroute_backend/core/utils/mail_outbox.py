@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import deque
+
+from django.core.mail import get_connection
+
+# An SMTP server drops idle sessions after a few minutes; close ours first
+# rather than finding out on the next send.
+IDLE_TIMEOUT = 120  # seconds
+LATENCY_WINDOW = 200  # last N sends kept for the latency figures
+
+
+class OutboxMetrics:
+    """Counters shared by every worker's outbox, read by the metrics endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.connections_opened = 0
+        self.reconnects = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "queue_depth": self.queued,
+                "sent": self.sent,
+                "failed": self.failed,
+                "connections_opened": self.connections_opened,
+                "reconnects": self.reconnects,
+                "send_latency_ms": {
+                    "avg": round(1000 * sum(latencies) / len(latencies), 2) if latencies else None,
+                    "p95": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else None,
+                    "max": round(1000 * latencies[-1], 2) if latencies else None,
+                },
+            }
+
+
+metrics = OutboxMetrics()
+
+
+class Outbox:
+    """
+    Queue of outgoing messages plus one long-lived SMTP connection, owned by
+    a single worker thread (see ``worker_outbox``). ``flush`` sends the queue
+    over that connection instead of a TLS handshake + login per message, and
+    reconnects once when the server has dropped the session.
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        self._connection = None
+        self._last_used = None
+
+    def __len__(self):
+        return len(self._queue)
+
+    def enqueue(self, message):
+        self._queue.append(message)
+        metrics.record(queued=1)
+
+    # ---------- connection ----------
+
+    def _open(self):
+        if self._connection is not None and time.monotonic() - self._last_used > IDLE_TIMEOUT:
+            self.close()
+        if self._connection is None:
+            self._connection = get_connection()
+            self._connection.open()
+            metrics.record(connections_opened=1)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _send(self, message):
+        start = time.perf_counter()
+        self._open().send_messages([message])
+        self._last_used = time.monotonic()
+        metrics.record_latency(time.perf_counter() - start)
+
+    # ---------- sending ----------
+
+    def flush(self):
+        """
+        Sends everything queued. Returns [(message, error_or_None), ...] in
+        queue order so callers can settle each message on its own.
+        """
+        results = []
+        while self._queue:
+            message = self._queue.popleft()
+            metrics.record(queued=-1)
+            try:
+                self._send(message)
+            except Exception:
+                # Stale / dropped session: reconnect and retry this message once
+                self.close()
+                metrics.record(reconnects=1)
+                try:
+                    self._send(message)
+                except Exception as e:
+                    self.close()
+                    metrics.record(failed=1)
+                    results.append((message, e))
+                    continue
+
+            metrics.record(sent=1)
+            results.append((message, None))
+        return results
+
+
+_local = threading.local()
+
+
+def worker_outbox():
+    """The calling thread's outbox (one SMTP connection per worker)."""
+    outbox = getattr(_local, "outbox", None)
+    if outbox is None:
+        outbox = _local.outbox = Outbox()
+    return outbox
@@ -0,0 +1,183 @@
+import codecs
+import csv
+import json
+
+from django.db import transaction
+
+from ..models import Food, SearchTerm
+from .fuzzy import add_words_bulk
+
+IMPORT_FORMATS = ("csv", "jsonl")
+IMPORT_MODES = ("merge", "replace")
+IMPORT_CHUNK_SIZE = 500
+MAX_IMPORT_ROWS = 5000
+# Errors beyond this are only counted, so a broken file can't blow up the response.
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_COLUMNS = ("category", "food_name", "price")
+FOOD_FIELDS = ("category", "food_name", "price", "description")
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+class MenuImportError(Exception):
+    pass
+
+
+def detect_format(filename, content_type):
+    for extension, fmt in EXTENSIONS.items():
+        if filename and filename.lower().endswith(extension):
+            return fmt
+    return CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+
+
+def _lines(stream):
+    """Decodes an uploaded file (or the request body) one line at a time."""
+    try:
+        yield from codecs.iterdecode(stream, "utf-8-sig")
+    except UnicodeDecodeError:
+        raise MenuImportError("File must be UTF-8 encoded")
+
+
+def iter_rows(stream, fmt):
+    """
+    Yields (row_number, dict) for every record in the upload without reading
+    it all first. Raises MenuImportError for an unreadable file.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(_lines(stream))
+        try:
+            header = reader.fieldnames or []
+            missing = [column for column in REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise MenuImportError(f"Missing columns: {', '.join(missing)}")
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as e:
+            raise MenuImportError(f"Line {reader.line_num}: {e}")
+
+    elif fmt == "jsonl":
+        for number, line in enumerate(_lines(stream), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+    else:
+        raise MenuImportError(f"Unknown format, use one of: {', '.join(IMPORT_FORMATS)}")
+
+
+def clean_row(record):
+    """Returns (values, None) or (None, message)."""
+    if not isinstance(record, dict):
+        return None, "Row must be a valid JSON object"
+
+    category = str(record.get("category") or "").strip()
+    food_name = str(record.get("food_name") or "").strip()
+    description = str(record.get("description") or "").strip()
+
+    if not category or not food_name or record.get("price") in (None, ""):
+        return None, "category, food_name and price are required"
+    if len(category) > 100 or len(food_name) > 200:
+        return None, "category or food_name is too long"
+    try:
+        price = int(record["price"])
+    except (TypeError, ValueError):
+        return None, "Price must be a number"
+    if price < 0:
+        return None, "Price must not be negative"
+
+    return {"category": category, "food_name": food_name, "price": price, "description": description}, None
+
+
+def _key(category, food_name):
+    return (category.lower(), food_name.lower())
+
+
+class MenuImport:
+    """
+    Applies an uploaded menu to one hotel. Rows matching an existing food
+    (same category and name, case-insensitive) update it in place when
+    something changed; other rows are inserted. In "replace" mode foods that
+    are not in the upload are deleted afterwards, unless some rows were
+    rejected. Inserts and updates are written every IMPORT_CHUNK_SIZE rows.
+    """
+
+    def __init__(self, hotel, replace=False):
+        self.hotel = hotel
+        self.replace = replace
+        self.existing = {
+            _key(category, food_name): (food_id, category, food_name, price, description)
+            for food_id, category, food_name, price, description in Food.objects.filter(hotel=hotel).values_list(
+                "id", *FOOD_FIELDS
+            )
+        }
+        self.seen = set()
+        self.to_create = []
+        self.to_update = []
+        self.new_names = []
+        self.errors = []
+        self.summary = {"created": 0, "updated": 0, "unchanged": 0, "deleted": 0, "error_count": 0}
+
+    def _error(self, row, message):
+        self.summary["error_count"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "message": message})
+
+    def _flush(self, force=False):
+        if self.to_create and (force or len(self.to_create) >= IMPORT_CHUNK_SIZE):
+            Food.objects.bulk_create(self.to_create)
+            self.summary["created"] += len(self.to_create)
+            self.new_names.extend(food.food_name for food in self.to_create)
+            self.to_create = []
+        if self.to_update and (force or len(self.to_update) >= IMPORT_CHUNK_SIZE):
+            Food.objects.bulk_update(self.to_update, FOOD_FIELDS)
+            self.summary["updated"] += len(self.to_update)
+            self.to_update = []
+
+    def add(self, row, record):
+        values, message = clean_row(record)
+        if message:
+            return self._error(row, message)
+
+        key = _key(values["category"], values["food_name"])
+        if key in self.seen:
+            return self._error(row, "Duplicate of an earlier row")
+        self.seen.add(key)
+
+        current = self.existing.get(key)
+        if current is None:
+            self.to_create.append(Food(hotel=self.hotel, **values))
+        elif current[1:] != tuple(values[field] for field in FOOD_FIELDS):
+            self.to_update.append(Food(id=current[0], hotel=self.hotel, **values))
+        else:
+            self.summary["unchanged"] += 1
+        self._flush()
+
+    def run(self, rows):
+        with transaction.atomic():
+            for count, (row, record) in enumerate(rows, start=1):
+                if count > MAX_IMPORT_ROWS:
+                    self._error(row, f"Only the first {MAX_IMPORT_ROWS} rows are imported")
+                    break
+                self.add(row, record)
+            self._flush(force=True)
+
+            if self.replace and not self.summary["error_count"]:
+                stale = [current[0] for key, current in self.existing.items() if key not in self.seen]
+                if stale:
+                    # a regular delete, so the vocabulary signals still run
+                    self.summary["deleted"] = Food.objects.filter(id__in=stale).delete()[1].get("core.Food", 0)
+
+            # bulk_create skips post_save, which feeds the fuzzy vocabulary
+            add_words_bulk(SearchTerm.KIND_FOOD, self.new_names)
+
+        return {**self.summary, "errors": self.errors}
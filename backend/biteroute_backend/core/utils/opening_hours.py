@@ -0,0 +1,131 @@
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Hotel, HotelOpenInterval
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+REBUILD_BATCH_SIZE = 2000
+
+
+def hotel_time_zone():
+    return ZoneInfo(getattr(settings, "HOTEL_TIME_ZONE", "Asia/Kolkata"))
+
+
+def _minute_of_day(value):
+    if isinstance(value, str):
+        # Hotel.objects.create(open_time="22:00") keeps the string on the instance
+        value = time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+def weekly_intervals(open_time, close_time):
+    """
+    The week's opening hours as sorted [start, end) minute ranges, one per
+    day. A close time at or before the open time means the kitchen closes
+    after midnight; Sunday night's hours wrap around to Monday morning.
+    Equal times mean open around the clock.
+    """
+    opens = _minute_of_day(open_time)
+    closes = _minute_of_day(close_time)
+    length = (closes - opens) % MINUTES_PER_DAY or MINUTES_PER_DAY
+
+    intervals = []
+    for day in range(7):
+        start = day * MINUTES_PER_DAY + opens
+        end = start + length
+        if end > MINUTES_PER_WEEK:
+            intervals.append((0, end - MINUTES_PER_WEEK))
+            end = MINUTES_PER_WEEK
+        intervals.append((start, end))
+    return sorted(intervals)
+
+
+def minute_of_week(moment):
+    """Minutes since Monday 00:00 of ``moment`` in the hotels' time zone."""
+    if timezone.is_aware(moment):
+        moment = moment.astimezone(hotel_time_zone())
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def parse_open_at(raw):
+    """
+    Parses the open_at= search parameter: "now", an ISO 8601 datetime
+    (read in HOTEL_TIME_ZONE unless it carries an offset) or "HH:MM" for
+    today. Returns the minute of the week. Raises ValueError.
+    """
+    raw = raw.strip()
+    if raw.lower() == "now":
+        return minute_of_week(timezone.now())
+
+    try:
+        if len(raw) <= 5:
+            today = timezone.now().astimezone(hotel_time_zone())
+            return today.weekday() * MINUTES_PER_DAY + _minute_of_day(raw)
+        moment = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError('open_at must be "now", HH:MM or an ISO 8601 datetime')
+    return minute_of_week(moment)
+
+
+def open_hotel_ids(minute):
+    """
+    Subquery of the hotels open at ``minute``. Ranges never exceed a day,
+    so only those starting within the day before are scanned.
+    """
+    return HotelOpenInterval.objects.filter(
+        start_minute__gt=minute - MINUTES_PER_DAY,
+        start_minute__lte=minute,
+        end_minute__gt=minute,
+    ).values("hotel_id")
+
+
+def sync_open_intervals(hotel):
+    """Rewrites one hotel's ranges, only if its hours actually changed."""
+    intervals = weekly_intervals(hotel.open_time, hotel.close_time)
+    current = list(
+        HotelOpenInterval.objects.filter(hotel_id=hotel.pk)
+        .order_by("start_minute")
+        .values_list("start_minute", "end_minute")
+    )
+    if current == intervals:
+        return False
+
+    with transaction.atomic():
+        HotelOpenInterval.objects.filter(hotel_id=hotel.pk).delete()
+        HotelOpenInterval.objects.bulk_create([
+            HotelOpenInterval(hotel_id=hotel.pk, start_minute=start, end_minute=end)
+            for start, end in intervals
+        ])
+    return True
+
+
+def rebuild_open_intervals(hotel_ids=None):
+    """Recomputes the ranges from Hotel (all hotels, or ``hotel_ids``)."""
+    hotels = Hotel.objects.all()
+    existing = HotelOpenInterval.objects.all()
+    if hotel_ids is not None:
+        hotels = hotels.filter(id__in=hotel_ids)
+        existing = existing.filter(hotel_id__in=hotel_ids)
+
+    rebuilt = 0
+    with transaction.atomic():
+        existing.delete()
+        batch = []
+        for hotel_id, open_time, close_time in hotels.values_list("id", "open_time", "close_time").iterator(
+            chunk_size=REBUILD_BATCH_SIZE
+        ):
+            batch.extend(
+                HotelOpenInterval(hotel_id=hotel_id, start_minute=start, end_minute=end)
+                for start, end in weekly_intervals(open_time, close_time)
+            )
+            rebuilt += 1
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                HotelOpenInterval.objects.bulk_create(batch)
+                batch = []
+        HotelOpenInterval.objects.bulk_create(batch)
+    return rebuilt
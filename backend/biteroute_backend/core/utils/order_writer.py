@@ -0,0 +1,171 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+
+from ..models import Food, Order, OrderItem
+from .analytics import record_orders
+from .geo import parse_coordinates
+
+# Same 5% GST the checkout page adds on top of the item subtotal.
+GST_RATE = Decimal("0.05")
+# Client totals are rounded to 2 decimals in JS; allow for that.
+TOTAL_TOLERANCE = Decimal("0.01")
+
+ORDER_FIELDS = ("name", "mobile", "address", "payment_method", "items")
+
+
+class OrderValidationError(Exception):
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.errors = errors or []
+
+
+def order_total(subtotal):
+    total = Decimal(subtotal) * (1 + GST_RATE)
+    return total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _order_items(data):
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def _validate(index, data, foods):
+    errors = []
+
+    if not isinstance(data, dict):
+        return [{"order": index, "message": "Order must be an object"}], None
+
+    missing = [field for field in ORDER_FIELDS if not data.get(field)]
+    if missing:
+        errors.append({"order": index, "message": f"Missing fields: {', '.join(missing)}"})
+        return errors, None
+    if not isinstance(data["items"], list) or not all(isinstance(i, dict) for i in data["items"]):
+        errors.append({"order": index, "message": "items must be a list of objects"})
+        return errors, None
+
+    lines = []
+    subtotal = 0
+    for item in data["items"]:
+        food = foods.get(_as_int(item.get("food_id")))
+        qty = _as_int(item.get("qty"))
+
+        if food is None:
+            errors.append({"order": index, "food_id": item.get("food_id"), "message": "Food not found"})
+            continue
+        if not qty or qty < 1:
+            errors.append({"order": index, "food_id": food.id, "message": "Quantity must be a positive number"})
+            continue
+        # Prices come from the menu; a stale client price is rejected
+        # instead of being written into the order.
+        if item.get("price") is not None and _as_int(item["price"]) != food.price:
+            errors.append({
+                "order": index,
+                "food_id": food.id,
+                "message": "Price has changed",
+                "price": food.price,
+            })
+            continue
+
+        lines.append((food, qty))
+        subtotal += food.price * qty
+
+    total = order_total(subtotal)
+    if data.get("total") not in (None, ""):
+        try:
+            client_total = Decimal(str(data["total"]))
+        except ArithmeticError:
+            client_total = None
+        if client_total is None or abs(client_total - total) > TOTAL_TOLERANCE:
+            errors.append({"order": index, "message": "Total does not match", "total": str(total)})
+
+    # optional drop-off position, used by the route planner
+    position = (None, None)
+    if data.get("latitude") not in (None, "") or data.get("longitude") not in (None, ""):
+        try:
+            position = parse_coordinates(data.get("latitude"), data.get("longitude"))
+        except ValueError as e:
+            errors.append({"order": index, "message": str(e)})
+
+    return errors, (lines, total, position)
+
+
+def _pickup_hotel_id(lines):
+    hotel_ids = {food.hotel_id for food, qty in lines}
+    return hotel_ids.pop() if len(hotel_ids) == 1 else None
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def place_orders(user, orders):
+    """
+    Validates and writes a batch of orders for ``user`` in one transaction:
+    one locked read of every food referenced by the batch, one bulk_create
+    for the orders and one for all their items, plus the analytics rollups.
+    The foods stay locked (SELECT ... FOR UPDATE where the database has it)
+    until the orders are written, so a price change or delete can't land
+    between pricing and insert. Nothing is written unless every order is
+    valid.
+
+    Returns the created Order objects; raises OrderValidationError.
+    """
+    if not orders:
+        raise OrderValidationError("No orders to place")
+
+    food_ids = {
+        _as_int(item.get("food_id"))
+        for data in orders
+        for item in _order_items(data)
+    }
+
+    with transaction.atomic():
+        # locked in id order, so concurrent checkouts can't deadlock
+        foods = {
+            food.id: food
+            for food in Food.objects.select_for_update().filter(
+                id__in=[food_id for food_id in food_ids if food_id is not None]
+            ).order_by("id")
+        }
+
+        errors = []
+        priced = []
+        for index, data in enumerate(orders):
+            order_errors, result = _validate(index, data, foods)
+            errors.extend(order_errors)
+            priced.append(result)
+
+        if errors:
+            raise OrderValidationError("Order validation failed", errors)
+
+        created = Order.objects.bulk_create([
+            Order(
+                user=user,
+                name=data["name"],
+                mobile=data["mobile"],
+                address=data["address"],
+                payment_method=data["payment_method"],
+                total_amount=float(total),
+                hotel_id=_pickup_hotel_id(lines),
+                latitude=latitude,
+                longitude=longitude,
+            )
+            for data, (lines, total, (latitude, longitude)) in zip(orders, priced)
+        ])
+
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, food=food, quantity=qty, price_at_time=food.price)
+            for order, (lines, total, position) in zip(created, priced)
+            for food, qty in lines
+        ])
+
+        record_orders(created, [lines for lines, total, position in priced])
+
+    return created
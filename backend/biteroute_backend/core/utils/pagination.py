@@ -0,0 +1,120 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.response import Response
+
+# Clients read the next page token from this header so list endpoints keep
+# returning a plain JSON array.
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Returns the list of keyset values stored in the cursor, or None when the
+    cursor is missing. Raises ValueError for a malformed cursor.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def page_limit(raw, default, maximum):
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def keyset_filter(fields, values):
+    """
+    Builds the row-value comparison (f1, f2, ...) > (v1, v2, ...) as a Q so
+    the next page starts right after the last row of the previous one.
+    """
+    if len(fields) != len(values):
+        raise ValueError("Invalid cursor")
+
+    condition = Q()
+    for i, field in enumerate(fields):
+        step = Q(**{f"{field}__gt": values[i]})
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            step &= Q(**{prev_field: prev_value})
+        condition |= step
+    return condition
+
+
+def _page_queryset(queryset, ordering, cursor, limit):
+    values = decode_cursor(cursor)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    return queryset.order_by(*ordering)[:limit + 1]
+
+
+def _split_page(rows, ordering, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[f] for f in ordering)
+        else:
+            next_cursor = encode_cursor(getattr(last, f) for f in ordering)
+
+    return rows, next_cursor
+
+
+def paginate(queryset, ordering, cursor, limit):
+    """
+    Applies keyset pagination over ``ordering`` (ascending field names, the
+    last one unique). Returns (rows, next_cursor) where rows is whatever the
+    queryset yields (model instances or values() dicts).
+    """
+    rows = list(_page_queryset(queryset, ordering, cursor, limit))
+    return _split_page(rows, ordering, limit)
+
+
+async def apaginate(queryset, ordering, cursor, limit):
+    """paginate() for async views, fetching the page through the async ORM."""
+    rows = [row async for row in _page_queryset(queryset, ordering, cursor, limit)]
+    return _split_page(rows, ordering, limit)
+
+
+def paginate_sorted(rows, ordering, cursor, limit):
+    """
+    paginate() for rows already in memory (dicts sorted by the ``ordering``
+    keys), for orderings the database can't produce. Same cursor format.
+    """
+    values = decode_cursor(cursor)
+    if values is not None:
+        if len(values) != len(ordering):
+            raise ValueError("Invalid cursor")
+        after = tuple(values)
+        rows = [row for row in rows if tuple(row[f] for f in ordering) > after]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][f] for f in ordering)
+    return rows, next_cursor
+
+
+def paginated_response(rows, next_cursor, status=200, response_class=Response):
+    response = response_class(rows, status=status)
+    if next_cursor:
+        response[CURSOR_HEADER] = next_cursor
+    return response
@@ -1,51 +1,76 @@
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from datetime import datetime
-import os
+from io import BytesIO
 
+WIDTH, HEIGHT = A4
 
-def generate_receipt_pdf(order):
-    """
-    order = {
-        order_id: str,
-        name: str,
-        email: str,
-        mobile: str,
-        address: str,
-        payment_method: str,
-        total: str,
-        items: [
-            { name: str, qty: int, price: float }
-        ]
-    }
-    """
+# Names of the form XObjects holding the static parts of the receipt. They
+# are drawn once per document and placed on every page with doForm().
+PAGE_CHROME = "receipt_chrome"
+ITEMS_HEADER = "receipt_items_header"
 
-    # 📁 Create receipts folder if not exists
-    os.makedirs("media/receipts", exist_ok=True)
+# Item rows stop here so they never run into the footer chrome.
+ITEMS_BOTTOM = 140
 
-    file_path = f"media/receipts/receipt_{order['order_id']}.pdf"
 
-    c = canvas.Canvas(file_path, pagesize=A4)
-    width, height = A4
+def _define_forms(c):
+    # ================= HEADER + FOOTER =================
+    c.beginForm(PAGE_CHROME)
 
-    # ================= HEADER =================
     c.setFont("Helvetica-Bold", 22)
-    c.drawCentredString(width / 2, height - 50, "BiteRoute 🍽️")
+    c.drawCentredString(WIDTH / 2, HEIGHT - 50, "BiteRoute 🍽️")
 
     c.setFont("Helvetica", 12)
-    c.drawCentredString(width / 2, height - 80, "Order Receipt")
+    c.drawCentredString(WIDTH / 2, HEIGHT - 80, "Order Receipt")
+
+    c.line(40, HEIGHT - 95, WIDTH - 40, HEIGHT - 95)
 
-    c.line(40, height - 95, width - 40, height - 95)
+    c.line(40, 80, WIDTH - 40, 80)
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(WIDTH / 2, 60, "Thank you for ordering with BiteRoute 🍕")
+    c.drawCentredString(WIDTH / 2, 45, "We hope to serve you again soon!")
+
+    c.endForm()
+
+    # ================= ITEMS TABLE HEADER =================
+    # Drawn with its top at y=0; callers translate it into place.
+    c.beginForm(ITEMS_HEADER, lowery=-50, uppery=0)
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(40, -12, "Order Items")
+
+    c.line(40, -22, WIDTH - 40, -22)
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(40, -40, "Item Name")
+    c.drawString(320, -40, "Qty")
+    c.drawRightString(WIDTH - 40, -40, "Price")
+
+    c.line(40, -48, WIDTH - 40, -48)
+
+    c.endForm()
+
+
+def _place(c, form, y):
+    c.saveState()
+    c.translate(0, y)
+    c.doForm(form)
+    c.restoreState()
+
+
+def _draw_receipt(c, order, printed_at):
+    c.doForm(PAGE_CHROME)
 
     # ================= ORDER INFO =================
-    y = height - 130
+    y = HEIGHT - 130
 
     c.setFont("Helvetica", 10)
     c.drawString(40, y, f"Order ID: {order['order_id']}")
     c.drawRightString(
-        width - 40,
+        WIDTH - 40,
         y,
-        f"Date: {datetime.now().strftime('%d %b %Y, %I:%M %p')}"
+        f"Date: {printed_at}"
     )
 
     y -= 22
@@ -71,49 +96,41 @@ def generate_receipt_pdf(order):
 
     # ================= ITEMS TABLE =================
     y -= 20
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(40, y, "Order Items")
-
-    y -= 10
-    c.line(40, y, width - 40, y)
-    y -= 18
-
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y, "Item Name")
-    c.drawString(320, y, "Qty")
-    c.drawRightString(width - 40, y, "Price")
-
-    y -= 8
-    c.line(40, y, width - 40, y)
-    y -= 18
-
-    c.setFont("Helvetica", 10)
+    _place(c, ITEMS_HEADER, y)
+    y -= 66
 
     for item in order["items"]:
+        # 📄 New page if space is less
+        if y < ITEMS_BOTTOM:
+            c.showPage()
+            c.doForm(PAGE_CHROME)
+            y = HEIGHT - 120
+            _place(c, ITEMS_HEADER, y)
+            y -= 66
+
         # Draw Hotel Name
         c.setFont("Helvetica-BoldOblique", 8)
         c.drawString(40, y + 2, f"Hotel: {item.get('hotel_name', 'BiteRoute Partner')}")
-        
+
         # Draw Food Item details
         c.setFont("Helvetica", 10)
         c.drawString(40, y - 10, item["name"])
         c.drawString(320, y - 10, str(item["qty"]))
         c.drawRightString(
-            width - 40,
+            WIDTH - 40,
             y - 10,
             f"₹ {item['price'] * item['qty']}"
         )
         y -= 30  # Increased spacing to accommodate hotel name
 
-        # 📄 New page if space is less
-        if y < 120:
-            c.showPage()
-            c.setFont("Helvetica", 10)
-            y = height - 80
-
     # ================= PAYMENT DETAILS =================
+    if y < ITEMS_BOTTOM:
+        c.showPage()
+        c.doForm(PAGE_CHROME)
+        y = HEIGHT - 120
+
     y -= 10
-    c.line(40, y, width - 40, y)
+    c.line(40, y, WIDTH - 40, y)
 
     y -= 25
     c.setFont("Helvetica-Bold", 11)
@@ -126,26 +143,57 @@ def generate_receipt_pdf(order):
     y -= 15
     c.drawString(40, y, f"Total Amount Paid: ₹ {order['total']}")
 
-    # ================= FOOTER =================
-    y -= 40
-    c.line(40, y, width - 40, y)
+    c.showPage()
 
-    y -= 20
-    c.setFont("Helvetica", 10)
-    c.drawCentredString(
-        width / 2,
-        y,
-        "Thank you for ordering with BiteRoute 🍕"
-    )
 
-    y -= 15
-    c.drawCentredString(
-        width / 2,
-        y,
-        "We hope to serve you again soon!"
-    )
+def _printed_at():
+    return datetime.now().strftime('%d %b %Y, %I:%M %p')
+
+
+def generate_receipt_pdf(order, printed_at=None):
+    """
+    order = {
+        order_id: str,
+        name: str,
+        email: str,
+        mobile: str,
+        address: str,
+        payment_method: str,
+        total: str,
+        items: [
+            { name: str, qty: int, price: float }
+        ]
+    }
 
-    # ✅ Save PDF
+    Returns the PDF as bytes, ready for EmailMessage.attach(); nothing is
+    written to disk.
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    _define_forms(c)
+    _draw_receipt(c, order, printed_at or _printed_at())
     c.save()
+    return buffer.getvalue()
+
+
+def generate_receipt_pdfs(orders, printed_at=None):
+    """
+    Renders many receipts into one PDF, each starting on a new page (e.g. a
+    hotel's printed batch of the day). The chrome and table header forms
+    are defined once for the whole batch and reused on every page, so the
+    static layout is drawn and stored a single time.
+
+    Returns the PDF as bytes.
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    _define_forms(c)
+    printed_at = printed_at or _printed_at()
+    for order in orders:
+        _draw_receipt(c, order, printed_at)
+    c.save()
+    return buffer.getvalue()
+
 
-    return file_path
+def receipt_filename(order):
+    return f"receipt_{order['order_id']}.pdf"
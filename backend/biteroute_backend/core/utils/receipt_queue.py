@@ -0,0 +1,218 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import ReceiptJob
+from .mail_outbox import worker_outbox
+from .pdf_receipt import generate_receipt_pdf, receipt_filename
+
+DEFAULTS = {
+    # Worker threads started inside the web process on the first enqueue.
+    # 0 leaves the queue to `python manage.py run_receipt_worker`.
+    "IN_PROCESS_WORKERS": 2,
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BASE_DELAY": 30,   # seconds, doubled after every failed attempt
+    "RETRY_MAX_DELAY": 3600,
+    "POLL_INTERVAL": 5,
+    # A job left "running" this long belonged to a worker that died.
+    "LOCK_TIMEOUT": 300,
+    "BATCH_SIZE": 10,
+}
+
+RECEIPT_FIELDS = ("name", "mobile", "address", "payment_method", "total", "items")
+
+
+def queue_config():
+    return {**DEFAULTS, **getattr(settings, "RECEIPT_QUEUE", {})}
+
+
+# ================= PRODUCER =================
+
+def enqueue_receipt(user, order):
+    job = ReceiptJob.objects.create(
+        user=user,
+        email=user.contact,
+        payload={field: order[field] for field in RECEIPT_FIELDS},
+        next_attempt_at=timezone.now(),
+    )
+    transaction.on_commit(wake_workers)
+    return job
+
+
+# ================= CONSUMER =================
+
+def _due_jobs(now, limit):
+    stale = now - timedelta(seconds=queue_config()["LOCK_TIMEOUT"])
+    due = (
+        ReceiptJob.objects
+        .filter(status=ReceiptJob.STATUS_PENDING, next_attempt_at__lte=now)
+        | ReceiptJob.objects.filter(status=ReceiptJob.STATUS_RUNNING, locked_at__lt=stale)
+    )
+    return list(due.order_by("id").values_list("id", "status", "locked_at")[:limit])
+
+
+def claim_jobs(limit):
+    """
+    Moves up to ``limit`` due jobs to "running" and returns them. The
+    conditional UPDATE makes each claim atomic, so several workers (threads
+    or processes) can poll the same table.
+    """
+    now = timezone.now()
+
+    claimed = []
+    for job_id, status, locked_at in _due_jobs(now, limit):
+        won = ReceiptJob.objects.filter(id=job_id, status=status, locked_at=locked_at).update(
+            status=ReceiptJob.STATUS_RUNNING,
+            locked_at=now,
+        )
+        if won:
+            claimed.append(job_id)
+
+    return list(ReceiptJob.objects.filter(id__in=claimed).order_by("id"))
+
+
+def build_receipt_email(job):
+    order = job.payload
+    receipt = {
+        "order_id": f"BR-{job.user_id}",
+        "name": order["name"],
+        "email": job.email,
+        "mobile": order["mobile"],
+        "address": order["address"],
+        "payment_method": order["payment_method"],
+        "total": order["total"],
+        "items": order["items"],
+    }
+    pdf = generate_receipt_pdf(receipt)
+
+    email = EmailMessage(
+        subject="BiteRoute Order Receipt 🍽️",
+        body=(
+            f"Hello {order['name']},\n\n"
+            "Thank you for ordering with BiteRoute.\n"
+            "Your receipt is attached.\n\n"
+            "Happy eating! 🍕"
+        ),
+        to=[job.email],
+    )
+    email.attach(receipt_filename(receipt), pdf, "application/pdf")
+    return email
+
+
+def retry_delay(attempts):
+    config = queue_config()
+    return min(config["RETRY_BASE_DELAY"] * 2 ** (attempts - 1), config["RETRY_MAX_DELAY"])
+
+
+def mark_sent(job):
+    job.status = ReceiptJob.STATUS_SENT
+    job.locked_at = None
+    job.last_error = ""
+    job.save(update_fields=["status", "attempts", "locked_at", "last_error", "updated_at"])
+
+
+def mark_failed(job, error):
+    job.last_error = str(error)
+    job.locked_at = None
+    if job.attempts >= queue_config()["MAX_ATTEMPTS"]:
+        job.status = ReceiptJob.STATUS_FAILED
+    else:
+        job.status = ReceiptJob.STATUS_PENDING
+        job.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+    job.save(update_fields=[
+        "status", "attempts", "locked_at", "last_error", "next_attempt_at", "updated_at",
+    ])
+
+
+def run_pending(limit=None):
+    """
+    Processes the jobs that are due right now through the calling worker's
+    outbox, i.e. one pooled SMTP connection for the whole batch. Returns how
+    many were sent.
+    """
+    outbox = worker_outbox()
+    jobs = {}
+
+    for job in claim_jobs(limit or queue_config()["BATCH_SIZE"]):
+        job.attempts += 1
+        try:
+            message = build_receipt_email(job)
+        except Exception as e:
+            print("❌ RECEIPT JOB FAILED:", job.id, str(e))
+            mark_failed(job, e)
+            continue
+        jobs[id(message)] = job
+        outbox.enqueue(message)
+
+    sent = 0
+    for message, error in outbox.flush():
+        job = jobs[id(message)]
+        if error is None:
+            mark_sent(job)
+            sent += 1
+        else:
+            print("❌ RECEIPT JOB FAILED:", job.id, str(error))
+            mark_failed(job, error)
+    return sent
+
+
+# ================= WORKER POOL =================
+
+class ReceiptWorkerPool:
+    """Threads that drain the queue, woken on enqueue and on a poll timer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self, workers):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < workers:
+                thread = threading.Thread(
+                    target=self._run,
+                    name=f"receipt-worker-{len(self._threads)}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                handled = run_pending()
+            except Exception as e:
+                print("❌ RECEIPT WORKER ERROR:", str(e))
+                handled = 0
+            finally:
+                close_old_connections()
+
+            if not handled:
+                self._wake.wait(queue_config()["POLL_INTERVAL"])
+                self._wake.clear()
+
+
+worker_pool = ReceiptWorkerPool()
+
+
+def wake_workers():
+    workers = queue_config()["IN_PROCESS_WORKERS"]
+    if workers:
+        worker_pool.start(workers)
+        worker_pool.wake()
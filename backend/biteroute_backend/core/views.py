@@ -1,24 +1,46 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from asgiref.sync import sync_to_async
 import os
 import requests
 import uuid
 from django.conf import settings
+from django.db import transaction
 from dotenv import load_dotenv
-from .utils.pdf_receipt import generate_receipt_pdf
+from .utils.receipt_queue import enqueue_receipt, RECEIPT_FIELDS
+from .utils.mail_outbox import metrics as outbox_metrics
+from .utils.order_writer import place_orders, OrderValidationError
+from .utils.idempotency import idempotent
+from .utils.analytics import hotel_analytics
+from .utils.food_search import (
+    asearch_foods, nearest_hotels, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE, SEARCH_SORTS,
+    NEAREST_DEFAULT_K, NEAREST_MAX_K, NEAREST_MAX_RADIUS_KM,
+)
+from .utils.geo import parse_coordinates
+from .utils.opening_hours import parse_open_at
+from .utils.dispatch import dispatch, recent_routes, route_response, DispatchError, MAX_API_TIME_BUDGET
+from .utils.pagination import page_limit, paginated_response
+from .utils.fuzzy import correct_query, CORRECTED_QUERY_HEADER
+from .utils.hotel_index import hotel_name_index
+from .utils.hotel_counts import hotel_counts, adjust_hotel_counts
+from .utils.hotel_listing import hotel_list_response
+from .utils.cart_summary import cart_items, cart_summary, empty_cart_summary
+from .utils.cart_writer import parse_cart_ops, CartOperationError
+from .utils.cart_store import cart_store
+from .utils.async_api import JSONResponse, async_api_view, jwt_required
+from .utils.menu_import import MenuImport, MenuImportError, IMPORT_MODES, detect_format, iter_rows
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import permission_classes, authentication_classes
 from django.utils.decorators import method_decorator
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from .authentication import JWTAuthentication
-from django.core.mail import EmailMessage
-from .models import User, Hotel, HotelOwner,Food,FoodMenu,CartItem,Cart,Order,OrderItem
+from .models import User, Hotel, HotelOwner,Food,FoodMenu,CartItem,Cart,Order,OrderItem,SearchTerm,LoginIdentity,ReceiptJob
 from .serializers import (
     UserSerializer, HotelSerializer, HotelOwnerSerializer,
     FoodSerializer,FoodMenuSerializer,CartItemSerializer,CartSerializer,
     OrderSerializer, OrderItemSerializer
 )
-from .auth_utils import hash_password, check_password, generate_token
+from .auth_utils import hash_password, check_password, dummy_password_check, generate_token
 
 
 # ================= ADMIN =================
@@ -47,45 +69,32 @@ def admin_login(request):
 
 @api_view(["GET"])
 def admin_dashboard_counts(request):
-    total = Hotel.objects.count()
-    approved = Hotel.objects.filter(approved=True, rejected=False).count()
-    pending = Hotel.objects.filter(approved=False, rejected=False).count()
-    rejected = Hotel.objects.filter(rejected=True).count()
-
-    return Response({
-        "total": total,
-        "approved": approved,
-        "pending": pending,
-        "rejected": rejected,
-    })
+    # ⚡ Materialized counters (cached), not four COUNT(*) scans per poll
+    return Response(hotel_counts())
 
 
 @api_view(["GET"])
 def admin_pending_hotels(request):
-    hotels = Hotel.objects.filter(approved=False, rejected=False)
-    serializer = HotelSerializer(hotels, many=True)
-    return Response(serializer.data)
+    hotels = Hotel.objects.filter(status=Hotel.STATUS_PENDING)
+    return hotel_list_response(request, hotels)
 
 
 @api_view(["GET"])
 def admin_approved_hotels(request):
-    hotels = Hotel.objects.filter(approved=True, rejected=False)
-    serializer = HotelSerializer(hotels, many=True)
-    return Response(serializer.data)
+    hotels = Hotel.objects.filter(status=Hotel.STATUS_APPROVED)
+    return hotel_list_response(request, hotels)
 
 
 @api_view(["GET"])
 def admin_rejected_hotels(request):
-    hotels = Hotel.objects.filter(rejected=True)
-    serializer = HotelSerializer(hotels, many=True)
-    return Response(serializer.data)
+    hotels = Hotel.objects.filter(status=Hotel.STATUS_REJECTED)
+    return hotel_list_response(request, hotels)
 
 
 @api_view(["GET"])
 def admin_all_hotels(request):
-    hotels = Hotel.objects.all()
-    serializer = HotelSerializer(hotels, many=True)
-    return Response(serializer.data)
+    # ⚡ values() of the listed columns, keyset pages with ?limit= / ?cursor=
+    return hotel_list_response(request, Hotel.objects.all())
 
 
 @api_view(["POST"])
@@ -96,10 +105,13 @@ def approve_hotel(request):
         return Response({"message": "Hotel ID is required"}, status=400)
 
     try:
-        hotel = Hotel.objects.get(id=hotel_id)
-        hotel.approved = True
-        hotel.rejected = False
-        hotel.save()
+        with transaction.atomic():
+            hotel = Hotel.objects.select_for_update().get(id=hotel_id)
+            old_status = hotel.status
+            hotel.approved = True
+            hotel.rejected = False
+            hotel.save()
+            adjust_hotel_counts(old_status, hotel.status)
 
         return Response({"message": "Hotel approved ✅"})
     except Hotel.DoesNotExist:
@@ -114,10 +126,13 @@ def reject_hotel(request):
         return Response({"message": "Hotel ID is required"}, status=400)
 
     try:
-        hotel = Hotel.objects.get(id=hotel_id)
-        hotel.rejected = True
-        hotel.approved = False
-        hotel.save()
+        with transaction.atomic():
+            hotel = Hotel.objects.select_for_update().get(id=hotel_id)
+            old_status = hotel.status
+            hotel.rejected = True
+            hotel.approved = False
+            hotel.save()
+            adjust_hotel_counts(old_status, hotel.status)
 
         return Response({"message": "Hotel rejected ❌"})
     except Hotel.DoesNotExist:
@@ -132,8 +147,11 @@ def delete_hotel(request):
         return Response({"message": "Hotel ID is required"}, status=400)
 
     try:
-        hotel = Hotel.objects.get(id=hotel_id)
-        hotel.delete()
+        with transaction.atomic():
+            hotel = Hotel.objects.select_for_update().get(id=hotel_id)
+            old_status = hotel.status
+            hotel.delete()
+            adjust_hotel_counts(old_status, None)
 
         return Response({"message": "Hotel deleted 🗑️"})
     except Hotel.DoesNotExist:
@@ -261,18 +279,42 @@ def common_login(request):
             "user": {"name": "Admin", "id": 999}
         })
 
-    # 2. Check User
-    try:
-        # Case insensitive contact match
-        user = User.objects.get(contact__iexact=contact)
-        
-        # Verify password (hashed)
-        # Assuming plain text check first based on previous D: drive code, 
-        # BUT C: drive code uses hash_password/check_password.
-        # Let's check if password matches hashed.
-        if check_password(password, user.password):
-             token = generate_token(user.id, "user")
-             return Response({
+    # 2. Resolve User / Hotel Owner with one indexed lookup on the
+    # lower-cased contact. When the contact is registered as both and both
+    # passwords match, the user role wins, like the per-table lookups did.
+    identities = LoginIdentity.objects.filter(contact=contact.strip().lower())
+
+    role_hint = request.data.get("role")
+    roles = [LoginIdentity.ROLE_USER, LoginIdentity.ROLE_OWNER]
+    if role_hint in ("hotel", "owner"):
+        roles = [LoginIdentity.ROLE_OWNER]
+    elif role_hint == "user":
+        roles = [LoginIdentity.ROLE_USER]
+
+    candidates = sorted(identities.filter(role__in=roles), key=lambda i: i.role != LoginIdentity.ROLE_USER)
+
+    # ⏱️ One password hash per role that could match, whether or not the
+    # contact is registered under it, so the response time doesn't tell
+    # which roles a contact has
+    matches = [i for i in candidates if check_password(password, i.password)]
+    for _ in range(len(roles) - len(candidates)):
+        dummy_password_check(password)
+
+    if not candidates:
+        print("❌ Account not found")
+        return Response({"message": "Invalid credentials found"}, status=401)
+
+    if not matches:
+        print("❌ Account found but password mismatch")
+        return Response({"message": "Invalid credentials found"}, status=401)
+    identity = matches[0]
+
+    # 3. Build the response for the resolved role
+    if identity.role == LoginIdentity.ROLE_USER:
+        user = User.objects.filter(id=identity.principal_id).first()
+        if user:
+            token = generate_token(user.id, "user")
+            return Response({
                 "message": "Login successful",
                 "role": "user",
                 "token": token,
@@ -282,17 +324,9 @@ def common_login(request):
                     "contact": user.contact
                 }
             })
-        print("❌ User found but password mismatch")
-        
-    except User.DoesNotExist:
-        print("❌ User not found")
-        pass
-
-    # 3. Check Hotel Owner
-    try:
-        owner = HotelOwner.objects.get(contact__iexact=contact)
-        
-        if check_password(password, owner.password):
+    else:
+        owner = HotelOwner.objects.filter(id=identity.principal_id).first()
+        if owner:
             token = generate_token(owner.id, "owner")
             return Response({
                 "message": "Login successful",
@@ -304,11 +338,6 @@ def common_login(request):
                     "contact": owner.contact
                 }
             })
-        print("❌ HotelOwner found but password mismatch")
-
-    except HotelOwner.DoesNotExist:
-        print("❌ HotelOwner not found")
-        pass
 
     return Response({"message": "Invalid credentials found"}, status=401)
 
@@ -326,19 +355,64 @@ def add_hotel_details(request):
     
     owner = request.user
 
-    Hotel.objects.create(
-        owner=owner,   # 🔥 MOST IMPORTANT LINE
-        hotel_name=request.data["hotel_name"],
-        location=request.data["location"],
-        food_type=request.data["food_type"],
-        open_time=request.data["open_time"],
-        close_time=request.data["close_time"],
-        description=request.data.get("description", "")
-    )
+    # 📍 map position is optional, but both or neither
+    latitude = request.data.get("latitude")
+    longitude = request.data.get("longitude")
+    if latitude not in (None, "") or longitude not in (None, ""):
+        try:
+            latitude, longitude = parse_coordinates(latitude, longitude)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=400)
+    else:
+        latitude = longitude = None
+
+    with transaction.atomic():
+        hotel = Hotel.objects.create(
+            owner=owner,   # 🔥 MOST IMPORTANT LINE
+            hotel_name=request.data["hotel_name"],
+            location=request.data["location"],
+            food_type=request.data["food_type"],
+            open_time=request.data["open_time"],
+            close_time=request.data["close_time"],
+            description=request.data.get("description", ""),
+            latitude=latitude,
+            longitude=longitude,
+        )
+        adjust_hotel_counts(None, hotel.status)
 
     return Response({"message": "Hotel registered successfully"})
 
 
+# 📍 Set (or move) a hotel's map position
+@api_view(["POST"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def set_hotel_location(request, hotel_id):
+    if not isinstance(request.user, HotelOwner):
+        return Response({"message": "Only hotel owners can update hotels"}, status=403)
+
+    try:
+        latitude, longitude = parse_coordinates(request.data.get("latitude"), request.data.get("longitude"))
+    except ValueError as e:
+        return Response({"message": str(e)}, status=400)
+
+    try:
+        hotel = Hotel.objects.get(id=hotel_id, owner=request.user)
+    except Hotel.DoesNotExist:
+        return Response({"message": "Hotel not found or you don't have permission"}, status=404)
+
+    hotel.latitude = latitude
+    hotel.longitude = longitude
+    hotel.save(update_fields=["latitude", "longitude"])
+
+    return Response({
+        "message": "Location updated ✅",
+        "latitude": hotel.latitude,
+        "longitude": hotel.longitude,
+        "geohash": hotel.geohash,
+    })
+
+
 @api_view(["GET"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
@@ -348,26 +422,20 @@ def hotel_count(request):
     return Response({"count": count})
 
 # ✅ Search hotel names for suggestions (typeahead)
-@api_view(["GET"])
-def search_hotel(request):
+# 🔀 async: served on the event loop under ASGI (see asgi.py)
+@async_api_view(["GET"])
+async def search_hotel(request):
     query = request.GET.get("q", "")
 
     if len(query) < 1:
-        return Response([])
-
-    hotels = Hotel.objects.filter(hotel_name__icontains=query)[:10]
+        return JSONResponse([])
 
-    data = []
-    for h in hotels:
-        status = "approved" if h.approved and not h.rejected else "rejected" if h.rejected else "pending"
+    if request.GET.get("fuzzy") in ("1", "true"):
+        query = await sync_to_async(correct_query)(SearchTerm.KIND_HOTEL, query) or query
 
-        data.append({
-            "id": h.id,
-            "hotel_name": h.hotel_name,
-            "status": status
-        })
-
-    return Response(data)
+    # ⚡ answered from the per-process name index, no DB round trip
+    # (matches word prefixes of the name, not arbitrary substrings)
+    return JSONResponse(await hotel_name_index.asearch(query))
 
 
 @api_view(["GET"])
@@ -383,16 +451,16 @@ def check_hotel_status(request):
         )
 
     try:
-        # ✅ Ensure it belongs to the logged-in owner
-        hotel = Hotel.objects.get(hotel_name__iexact=hotel_name, owner=request.user)
+        # ✅ Ensure it belongs to the logged-in owner (owner, hotel_name index)
+        hotel = Hotel.objects.only("status").get(owner=request.user, hotel_name__iexact=hotel_name)
 
-        if hotel.rejected:
+        if hotel.status == Hotel.STATUS_REJECTED:
             return Response({
                 "status": "rejected",
                 "message": "❌ Hotel rejected by admin"
             })
 
-        if hotel.approved:
+        if hotel.status == Hotel.STATUS_APPROVED:
             return Response({
                 "status": "approved",
                 "message": "✅ Your hotel is approved by admin"
@@ -433,11 +501,11 @@ def add_food(request):
 
     # ✅ Hotel must exist, belong to owner, and be approved
     try:
-        hotel = Hotel.objects.get(hotel_name__iexact=hotel_name, owner=request.user)
+        hotel = Hotel.objects.get(owner=request.user, hotel_name__iexact=hotel_name)
     except Hotel.DoesNotExist:
         return Response({"message": "Hotel not found or you don't have permission"}, status=404)
 
-    if hotel.approved == False:
+    if hotel.status != Hotel.STATUS_APPROVED:
         return Response({"message": "Hotel is not approved yet"}, status=403)
 
     # ✅ Save Food in DB
@@ -455,44 +523,107 @@ def add_food(request):
     )
 
 #to serach food item
-@api_view(["GET"])
-def user_search_food(request):
+@async_api_view(["GET"])
+async def user_search_food(request):
     food_type = request.GET.get("type")
     food_name = request.GET.get("food")
     location = request.GET.get("location")
 
     if not food_type or not food_name or not location:
-        return Response({"message": "type, food, location required"}, status=400)
+        return JSONResponse({"message": "type, food, location required"}, status=400)
+
+    limit = page_limit(request.GET.get("limit"), SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+
+    # 🕒 open_at=now / HH:MM / ISO datetime -> only kitchens open then
+    open_minute = None
+    if request.GET.get("open_at"):
+        try:
+            open_minute = parse_open_at(request.GET["open_at"])
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, status=400)
+
+    # 🛵 lat/lng -> every result carries an ETA; sort=eta ranks by it
+    near = None
+    if request.GET.get("lat") or request.GET.get("lng"):
+        try:
+            near = parse_coordinates(request.GET.get("lat"), request.GET.get("lng"))
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, status=400)
+
+    sort = request.GET.get("sort", "relevance")
+    if sort not in SEARCH_SORTS:
+        return JSONResponse({"message": f"sort must be one of: {', '.join(SEARCH_SORTS)}"}, status=400)
+    if sort == "eta" and near is None:
+        return JSONResponse({"message": "sort=eta needs lat and lng"}, status=400)
+
+    # 🔤 fuzzy=1 -> "panner tika" is searched as "paneer tikka"
+    corrected = None
+    if request.GET.get("fuzzy") in ("1", "true"):
+        corrected = await sync_to_async(correct_query)(SearchTerm.KIND_FOOD, food_name)
+        if corrected and corrected != food_name.lower():
+            food_name = corrected
+        else:
+            corrected = None
+
+    # ✅ only approved hotels + location match, one joined query
+    try:
+        results, next_cursor = await asearch_foods(
+            food_type,
+            food_name,
+            location,
+            cursor=request.GET.get("cursor"),
+            limit=limit,
+            open_minute=open_minute,
+            near=near,
+            sort=sort,
+        )
+    except ValueError:
+        return JSONResponse({"message": "Invalid cursor"}, status=400)
 
-    # ✅ only approved hotels + location match
-    hotels = Hotel.objects.filter(
-        approved=True,
-        rejected=False,
-        location__icontains=location
-    )
+    response = paginated_response(results, next_cursor, response_class=JSONResponse)
+    if corrected:
+        response[CORRECTED_QUERY_HEADER] = corrected
+    return response
+
+# 📍 K nearest approved hotels serving a food ("near me")
+@api_view(["GET"])
+def user_nearest_hotels(request):
+    food_name = request.GET.get("food")
 
-    results = []
+    if not food_name:
+        return Response({"message": "food, lat, lng required"}, status=400)
 
-    for hotel in hotels:
-        foods = Food.objects.filter(
-            hotel=hotel,
-            category__iexact=food_type,      # ✅ category is your type
-            food_name__icontains=food_name
-        )
+    try:
+        latitude, longitude = parse_coordinates(request.GET.get("lat"), request.GET.get("lng"))
+    except ValueError as e:
+        return Response({"message": str(e)}, status=400)
 
-        for f in foods:
-            results.append({
-                "food_id": f.id,                 # 🔥 ADD THIS
-                "hotel_id": hotel.id,
-                "hotel_name": hotel.hotel_name,
-                "location": hotel.location,
-                "food_name": f.food_name,
-                "food_type": f.category,      # ✅ show category
-                "price": f.price,
-                "description": f.description,
-            })
+    k = page_limit(request.GET.get("k"), NEAREST_DEFAULT_K, NEAREST_MAX_K)
+    try:
+        radius = float(request.GET.get("radius", NEAREST_MAX_RADIUS_KM))
+    except ValueError:
+        return Response({"message": "radius must be a number"}, status=400)
+    radius = max(0.1, min(radius, NEAREST_MAX_RADIUS_KM))
+
+    open_minute = None
+    if request.GET.get("open_at"):
+        try:
+            open_minute = parse_open_at(request.GET["open_at"])
+        except ValueError as e:
+            return Response({"message": str(e)}, status=400)
+
+    # ⚡ geohash cells + bounding box in SQL, exact distances in numpy
+    results = nearest_hotels(
+        food_name,
+        latitude,
+        longitude,
+        k=k,
+        food_type=request.GET.get("type"),
+        max_radius_km=radius,
+        open_minute=open_minute,
+    )
+    return Response(results)
 
-    return Response(results, status=200)
 
 @api_view(["POST"])
 @authentication_classes([JWTAuthentication])
@@ -507,28 +638,34 @@ def add_to_cart(request):
     # get user cart or create
     cart, created = Cart.objects.get_or_create(user_id=user_id)
 
-    # check if item already exists
-    item = CartItem.objects.filter(cart=cart, food_id=food_id).first()
+    try:
+        food_id = int(food_id)
+    except (TypeError, ValueError):
+        return Response({"message": "food_id must be a number"}, status=400)
 
-    if item:
-        item.quantity += 1
-        item.save()
-    else:
-        CartItem.objects.create(cart=cart, food_id=food_id, quantity=1)
+    if not Food.objects.filter(id=food_id).exists():
+        return Response({"message": "Food not found"}, status=404)
+
+    # ⚡ quantity + 1 as one UPDATE (or buffered by the write-behind store)
+    cart_store().add(cart.id, food_id)
 
     return Response({"message": "Added to cart ✅"})
 
 
 # ✅ Get cart items
-@api_view(["GET"])
-def get_cart(request, user_id):
-    cart = Cart.objects.filter(user_id=user_id).first()
+@async_api_view(["GET"])
+async def get_cart(request, user_id):
+    cart = await Cart.objects.filter(user_id=user_id).afirst()
 
     if not cart:
-        return Response({"items": []})
+        return JSONResponse(empty_cart_summary())
+
+    # buffered changes are written back first so item ids are real rows
+    await sync_to_async(cart_store().flush)(cart.id)
 
-    serializer = CartSerializer(cart)
-    return Response(serializer.data)
+    # ⚡ Items joined with food + hotel in one query, totals computed here
+    items = [item async for item in cart_items(cart)]
+    return JSONResponse(cart_summary(cart, items))
 
 
 # ✅ Update quantity
@@ -538,12 +675,13 @@ def update_cart_item(request):
     quantity = request.data.get("quantity")
 
     try:
-        item = CartItem.objects.get(id=item_id)
-        item.quantity = quantity
-        item.save()
-        return Response({"message": "Updated ✅"})
-    except CartItem.DoesNotExist:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        return Response({"message": "Quantity must be a number"}, status=400)
+
+    if not cart_store().update_item(item_id, quantity):
         return Response({"message": "Item not found"}, status=404)
+    return Response({"message": "Updated ✅"})
 
 
 # ✅ Remove item
@@ -551,16 +689,42 @@ def update_cart_item(request):
 def remove_cart_item(request):
     item_id = request.data.get("item_id")
 
-    try:
-        CartItem.objects.get(id=item_id).delete()
-        return Response({"message": "Removed ✅"})
-    except CartItem.DoesNotExist:
+    if not cart_store().remove_item(item_id):
         return Response({"message": "Item not found"}, status=404)
+    return Response({"message": "Removed ✅"})
+
+
+# ✅ Several add / set / remove changes in one request and one transaction
+@api_view(["POST"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def batch_update_cart(request):
+    if not isinstance(request.user, User):
+        return Response({"message": "Only customers have carts"}, status=403)
+
+    # the cart belongs to the token's user; user_id is only checked
+    user_id = request.data.get("user_id")
+    if user_id not in (None, "") and str(user_id) != str(request.user.id):
+        return Response({"message": "You can only change your own cart"}, status=403)
+
+    operations = request.data.get("operations")
+    if not operations:
+        return Response({"message": "operations required"}, status=400)
+
+    try:
+        changes = parse_cart_ops(operations)
+    except CartOperationError as e:
+        return Response({"message": e.message, "errors": e.errors}, status=400)
+
+    cart, created = Cart.objects.get_or_create(user=request.user)
+    store = cart_store()
+    store.apply(cart.id, changes)
+
+    # the updated cart, so the client needs no follow-up GET
+    store.flush(cart.id)
+    return Response(cart_summary(cart))
 
 
-def send_email_in_background(email_obj):
-    email_obj.send()
-    
 @csrf_exempt
 @api_view(["POST"])
 @permission_classes([AllowAny])
@@ -572,40 +736,24 @@ def send_receipt_to_email(request):
         if not user_id:
             return Response({"message": "user_id required"}, status=400)
 
+        missing = [field for field in RECEIPT_FIELDS if field not in order]
+        if missing:
+            return Response({"message": f"Missing fields: {', '.join(missing)}"}, status=400)
+
         # Get user
         user = User.objects.get(id=user_id)
-        registered_email = user.contact
-
-        pdf_path = generate_receipt_pdf({
-            "order_id": f"BR-{user_id}",
-            "name": order["name"],
-            "email": registered_email,
-            "mobile": order["mobile"],
-            "address": order["address"],
-            "payment_method": order["payment_method"],
-            "total": order["total"],
-            "items": order["items"],
-        })
-
-        email = EmailMessage(
-            subject="BiteRoute Order Receipt 🍽️",
-            body=(
-                f"Hello {order['name']},\n\n"
-                "Thank you for ordering with BiteRoute.\n"
-                "Your receipt is attached.\n\n"
-                "Happy eating! 🍕"
-            ),
-            to=[registered_email],
-        )
 
-        email.attach_file(pdf_path)
-        email.send()
+        # 📨 Rendering + SMTP happen in the receipt workers
+        job = enqueue_receipt(user, order)
 
         return Response({
             "status": True,
-            "message": "Receipt sent to registered email"
-        })
+            "message": "Receipt queued for registered email",
+            "job_id": job.id
+        }, status=202)
 
+    except User.DoesNotExist:
+        return Response({"message": "User not found"}, status=404)
     except Exception as e:
         print("❌ ERROR:", str(e))
         return Response(
@@ -614,17 +762,44 @@ def send_receipt_to_email(request):
         )
 
 
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def receipt_status(request, job_id):
+    try:
+        job = ReceiptJob.objects.get(id=job_id)
+    except ReceiptJob.DoesNotExist:
+        return Response({"message": "Receipt job not found"}, status=404)
+
+    return Response({
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "next_attempt_at": job.next_attempt_at if job.status == ReceiptJob.STATUS_PENDING else None,
+        "error": job.last_error or None,
+    })
+
+
+@api_view(["GET"])
+def email_outbox_metrics(request):
+    data = outbox_metrics.snapshot()
+    data["pending_receipts"] = ReceiptJob.objects.filter(status=ReceiptJob.STATUS_PENDING).count()
+    data["failed_receipts"] = ReceiptJob.objects.filter(status=ReceiptJob.STATUS_FAILED).count()
+    return Response(data)
+
+
 @api_view(["GET"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def my_hotels(request):
     # ✅ Use request.user directly
     hotels = Hotel.objects.filter(owner=request.user)
-    serializer = HotelSerializer(hotels, many=True)
-    return Response(serializer.data)
+    return hotel_list_response(request, hotels)
 
 
 @api_view(["POST"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+@idempotent("cashfree.create_order")
 def cashfree_create_order(request):
     amount = request.data.get("amount")
 
@@ -644,120 +819,114 @@ def cashfree_create_order(request):
     })
 
 
-@api_view(["GET"])
-@authentication_classes([JWTAuthentication])
-@permission_classes([IsAuthenticated])
-def get_hotel_food_items(request, hotel_id):
+@async_api_view(["GET"])
+@jwt_required
+async def get_hotel_food_items(request, hotel_id):
     try:
-        hotel = Hotel.objects.get(id=hotel_id, owner=request.user)
+        hotel = await Hotel.objects.aget(id=hotel_id, owner=request.user)
         
-        if hotel.rejected:
-            return Response({"message": "❌ Hotel rejected by admin"}, status=403)
+        if hotel.status == Hotel.STATUS_REJECTED:
+            return JSONResponse({"message": "❌ Hotel rejected by admin"}, status=403)
 
-        if not hotel.approved:
-            return Response({"message": "⏳ Your hotel approval is pending"}, status=403)
+        if hotel.status != Hotel.STATUS_APPROVED:
+            return JSONResponse({"message": "⏳ Your hotel approval is pending"}, status=403)
             
-        foods = Food.objects.filter(hotel=hotel)
+        foods = [food async for food in Food.objects.filter(hotel=hotel)]
         serializer = FoodSerializer(foods, many=True)
-        return Response({
+        return JSONResponse({
             "hotel_name": hotel.hotel_name,
             "food_type": hotel.food_type,
             "foods": serializer.data
         })
     except Hotel.DoesNotExist:
-        return Response({"message": "Hotel not found or permission denied"}, status=404)
+        return JSONResponse({"message": "Hotel not found or permission denied"}, status=404)
 
 
 @api_view(["POST"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
+@idempotent("orders.place")
 def place_order(request):
+    if not isinstance(request.user, User):
+        return Response({"status": False, "message": "Only customers can place orders"}, status=403)
+
     try:
         data = request.data
-        user = request.user
-        
-        # Create Order
-        order = Order.objects.create(
-            user=user,
-            name=data["name"],
-            mobile=data["mobile"],
-            address=data["address"],
-            payment_method=data["payment_method"],
-            total_amount=float(data["total"])
-        )
-        
-        # Create Order Items
-        items = data["items"]
-        for item in items:
-            food = Food.objects.get(id=item["food_id"])
-            OrderItem.objects.create(
-                order=order,
-                food=food,
-                quantity=item["qty"],
-                price_at_time=item["price"]
-            )
-            
-        return Response({"status": True, "message": "Order saved to DB", "order_id": order.id})
+
+        # 📦 {"orders": [...]} places a batch (aggregator integration)
+        batch = isinstance(data.get("orders"), list)
+        orders = data["orders"] if batch else [data]
+
+        # 🛒 checkout: buffered cart changes reach the database first
+        cart_store().flush_user(request.user.id)
+
+        created = place_orders(request.user, orders)
+
+        if batch:
+            return Response({
+                "status": True,
+                "message": f"{len(created)} orders saved to DB",
+                "order_ids": [order.id for order in created],
+            })
+
+        order = created[0]
+        return Response({
+            "status": True,
+            "message": "Order saved to DB",
+            "order_id": order.id,
+            "total": order.total_amount,
+        })
+    except OrderValidationError as e:
+        return Response({"status": False, "message": e.message, "errors": e.errors}, status=400)
     except Exception as e:
         print("❌ ERROR PLACING ORDER:", str(e))
         return Response({"status": False, "message": str(e)}, status=500)
 
 
+# 🛵 GET: latest delivery routes, POST: batch pending orders into routes
+@api_view(["GET", "POST"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def hotel_routes(request, hotel_id):
+    if not isinstance(request.user, HotelOwner):
+        return Response({"message": "Only hotel owners can dispatch orders"}, status=403)
+
+    if not Hotel.objects.filter(id=hotel_id, owner=request.user).exists():
+        return Response({"message": "Hotel not found or you don't have permission"}, status=404)
+
+    if request.method == "GET":
+        return Response(recent_routes(hotel_id))
+
+    options = {}
+    for name, cast in (("window_minutes", int), ("max_stops", int), ("time_budget", float)):
+        if request.data.get(name) not in (None, ""):
+            try:
+                options[name] = cast(request.data[name])
+            except (TypeError, ValueError):
+                return Response({"message": f"{name} must be a number"}, status=400)
+    options["time_budget"] = min(options.get("time_budget", MAX_API_TIME_BUDGET), MAX_API_TIME_BUDGET)
+
+    try:
+        routes, stats = dispatch(hotel_ids=[hotel_id], **options)
+    except DispatchError as e:
+        return Response({"message": str(e)}, status=409)
+
+    return Response({
+        "message": f"{len(routes)} routes planned ✅",
+        "stats": stats,
+        "routes": [route_response(route) for route in routes],
+    })
+
+
 @api_view(["GET"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def get_hotel_analytics(request, hotel_id):
-    from django.db.models import Sum, Count
-    from django.db.models.functions import TruncMonth
-
     try:
         hotel = Hotel.objects.get(id=hotel_id, owner=request.user)
-        
-        # Get all order items for this hotel
-        order_items = OrderItem.objects.filter(food__hotel=hotel)
-        
-        # Total Revenue
-        total_revenue = order_items.aggregate(total=Sum('price_at_time'))['total'] or 0
-        total_orders = order_items.values('order').distinct().count()
-        total_items_sold = order_items.aggregate(total=Sum('quantity'))['total'] or 0
-        
-        # Monthly Revenue for Graph
-        monthly_data = order_items.annotate(
-            month=TruncMonth('order__created_at')
-        ).values('month').annotate(
-            revenue=Sum('price_at_time'),
-            orders=Count('order', distinct=True)
-        ).order_by('month')
-        
-        # Format monthly data for chart
-        chart_data = []
-        for entry in monthly_data:
-            chart_data.append({
-                "month": entry['month'].strftime("%b %Y"),
-                "revenue": entry['revenue'],
-                "orders": entry['orders']
-            })
-            
-        # Best selling items
-        best_sellers = order_items.values('food__food_name').annotate(
-            sold_count=Sum('quantity')
-        ).order_by('-sold_count')[:5]
-        
-        best_sellers_data = []
-        for item in best_sellers:
-            best_sellers_data.append({
-                "name": item['food__food_name'],
-                "sold": item['sold_count']
-            })
 
-        return Response({
-            "hotel_name": hotel.hotel_name,
-            "total_revenue": total_revenue,
-            "total_orders": total_orders,
-            "total_items_sold": total_items_sold,
-            "chart_data": chart_data,
-            "best_sellers": best_sellers_data
-        })
+        # ⚡ Read from the per-month / per-food rollups instead of scanning OrderItem
+        return Response(hotel_analytics(hotel))
     except Hotel.DoesNotExist:
         return Response({"message": "Hotel not found or permission denied"}, status=404)
     except Exception as e:
@@ -765,6 +934,46 @@ def get_hotel_analytics(request, hotel_id):
         return Response({"status": False, "message": str(e)}, status=500)
 
 
+# 📥 Bulk menu upload: CSV or JSON lines, streamed row by row
+@api_view(["POST"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def import_menu(request, hotel_id):
+    if not isinstance(request.user, HotelOwner):
+        return Response({"message": "Only hotel owners can import menus"}, status=403)
+
+    try:
+        hotel = Hotel.objects.get(id=hotel_id, owner=request.user)
+    except Hotel.DoesNotExist:
+        return Response({"message": "Hotel not found or you don't have permission"}, status=404)
+
+    if hotel.status != Hotel.STATUS_APPROVED:
+        return Response({"message": "Hotel is not approved yet"}, status=403)
+
+    mode = request.GET.get("mode", "merge")
+    if mode not in IMPORT_MODES:
+        return Response({"message": f"mode must be one of: {', '.join(IMPORT_MODES)}"}, status=400)
+
+    # multipart "file" field, or the CSV / JSON lines document as the raw body
+    if request.content_type.startswith("multipart/"):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"message": "file is required"}, status=400)
+        stream, filename = upload, upload.name
+    else:
+        stream, filename = request._request, ""
+
+    # ?input=csv|jsonl; ?format= is DRF's renderer override
+    fmt = request.GET.get("input") or detect_format(filename, request.content_type)
+
+    try:
+        summary = MenuImport(hotel, replace=mode == "replace").run(iter_rows(stream, fmt))
+    except MenuImportError as e:
+        return Response({"message": str(e)}, status=400)
+
+    return Response({"message": "Menu imported ✅", **summary})
+
+
 @api_view(["DELETE"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
@@ -1,4 +1,5 @@
 import { useState } from "react";
+import { getAllPages } from "../api/axios";
 
 export default function SearchForm({ type, onSearch, onBack }) {
   const [food, setFood] = useState("");
@@ -47,15 +48,9 @@ export default function SearchForm({ type, onSearch, onBack }) {
     try {
       setLoading(true);
 
-      const res = await fetch(
-        `http://127.0.0.1:8000/api/user/search-food/?type=${encodeURIComponent(
-          type
-        )}&food=${encodeURIComponent(food)}&location=${encodeURIComponent(
-          location
-        )}`
-      );
-
-      const data = await res.json();
+      const data = await getAllPages("/api/user/search-food/", {
+        params: { type, food, location }
+      });
 
       onSearch({
         type,
@@ -21,4 +21,22 @@ api.interceptors.request.use(
     }
 );
 
+// List endpoints return one page per request and put the next page's
+// cursor in X-Next-Cursor; follow it until the last page.
+export const getAllPages = async (url, config = {}) => {
+    const rows = [];
+    let cursor = null;
+
+    do {
+        const res = await api.get(url, {
+            ...config,
+            params: { ...config.params, ...(cursor && { cursor }) },
+        });
+        rows.push(...res.data);
+        cursor = res.headers['x-next-cursor'];
+    } while (cursor);
+
+    return rows;
+};
+
 export default api;
@@ -2,7 +2,7 @@ import { useState, useEffect } from "react";
 import { useLocation } from "react-router-dom";
 import "./Login.css";
 import type from "../data/type"; // ✅ your array
-import api from "../api/axios";
+import api, { getAllPages } from "../api/axios";
 import { useAuth } from "../context/AuthContext";
 
 export default function AddFoodMenu() {
@@ -35,8 +35,7 @@ export default function AddFoodMenu() {
 
     const fetchMyHotels = async () => {
       try {
-        const res = await api.get("/api/hotel/my-hotels/");
-        setMyHotels(res.data);
+        setMyHotels(await getAllPages("/api/hotel/my-hotels/"));
       } catch (err) {
         console.error("Failed to fetch my hotels", err);
       }
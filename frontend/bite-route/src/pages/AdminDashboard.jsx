@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../api/axios";
+import api, { getAllPages } from "../api/axios";
 import { useAuth } from "../context/AuthContext";
 import "./Login.css";
 
@@ -41,8 +41,7 @@ export default function AdminDashboard() {
     if (tab === "total") url = "/api/admin/all-hotels/";
 
     try {
-      const res = await api.get(url);
-      setHotels(res.data);
+      setHotels(await getAllPages(url));
     } catch (err) {
       console.log("Hotel fetch error");
     }
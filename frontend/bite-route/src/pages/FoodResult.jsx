@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import { useLocation, useNavigate } from "react-router-dom";
 import { dispatchCartUpdate } from "./cartService";
-import api from "../api/axios";
+import { getAllPages } from "../api/axios";
 
 export default function FoodResults() {
   const locationData = useLocation();
@@ -22,11 +22,10 @@ export default function FoodResults() {
     const fetchResults = async () => {
       setLoading(true);
       try {
-        const res = await api.get("/api/user/search-food/", {
+        const data = await getAllPages("/api/user/search-food/", {
           params: { type, food, location }
         });
 
-        const data = res.data;
         setResults(data);
       } catch (err) {
         setResults([]);
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import api from "../api/axios";
+import { getAllPages } from "../api/axios";
 import { useAuth } from "../context/AuthContext";
 
 export default function HotelData() {
@@ -13,8 +13,7 @@ export default function HotelData() {
 
     const fetchHotels = async () => {
       try {
-        const res = await api.get("/api/hotel/my-hotels/");
-        setHotels(res.data);
+        setHotels(await getAllPages("/api/hotel/my-hotels/"));
       } catch (err) {
         console.error("Failed to fetch hotels", err);
       }